@@ -34,13 +34,30 @@ module kb_Metrics {
     typedef tuple<epoch e_lowerbound, epoch e_upperbound> epoch_range;
     typedef tuple<string ws_name, string narrative_name, int narrative_version> narrative_name_map;
     
+    /*
+        limit - the most job states to return (default 0 for all of them);
+            when there are more, the result has a continuation_token
+        continuation_token - the continuation_token of the previous page,
+            to get the next one (with the same user_ids and epoch_range)
+        fields - the fields of the job states to return (e.g., job_id,
+            status, app_id, creation_time); all of them by default. Only the
+            data the given fields are assembled from is read.
+    */
     typedef structure {
         list<user_id> user_ids;
         epoch_range epoch_range;
+        int limit;
+        string continuation_token;
+        list<string> fields;
     } AppMetricsParams;
 
+    /*
+        continuation_token - set when there are job states left after this
+            page, see AppMetricsParams
+    */
     typedef structure {
         UnspecifiedObject job_states;
+        string continuation_token;
     } AppMetricsResult;
 
     typedef structure {
@@ -54,14 +71,33 @@ module kb_Metrics {
     funcdef map_ws_narrative_names(list<int> ws_ids)
         returns (list<MapWsNarrNamesResult> return_records) authentication optional;
 
-    /* unified input/output parameters*/
+    /* unified input/output parameters
+       incremental - used by update_metrics only; if set to 1, each update
+           phase only processes the data recorded after its last successful
+           checkpoint instead of the whole epoch_range (default 0)
+       limit, continuation_token - used by get_user_details and
+           get_nonkbuser_details only; page through the users as the
+           AppMetricsParams ones do through the job states
+       fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at);
+           all of them by default
+    */
     typedef structure {
         list<user_id> user_ids;
         epoch_range epoch_range;
+        int incremental;
+        int limit;
+        string continuation_token;
+        list<string> fields;
     } MetricsInputParams;
 
+    /*
+        continuation_token - set when there are records left after this
+            page, see MetricsInputParams
+    */
     typedef structure {
         UnspecifiedObject metrics_result;
+        string continuation_token;
     } MetricsOutput;
    
     /** For writing to mongodb metrics **/ 
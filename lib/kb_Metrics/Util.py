@@ -1,7 +1,13 @@
 
 from dateutil.parser import parse
+import base64
+import binascii
 import datetime
 
+from bson import json_util
+
+_TOKEN_JSON_OPTIONS = json_util.JSONOptions(tz_aware=False)
+
 
 # utility functions
 
@@ -30,3 +36,81 @@ def _convert_to_datetime(dt):
         return _datetime_from_utc(dt)
     else:
         raise ValueError('Cannot convert {} to datetime'.format(dt))
+
+
+def _day_start(dt):
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _days(first_day, end_day):
+    """
+    the (starts of the) days from first_day up to end_day
+    """
+    day = first_day
+    while day < end_day:
+        yield day
+        day += datetime.timedelta(days=1)
+
+
+def _month_start(dt):
+    return _day_start(dt).replace(day=1)
+
+
+def _next_month(dt):
+    """
+    the start of the month after the one dt falls in
+    """
+    if dt.month == 12:
+        return datetime.datetime(dt.year + 1, 1, 1)
+    return datetime.datetime(dt.year, dt.month + 1, 1)
+
+
+def _hashable(obj):
+    """
+    Turn a (nested) dict/list, e.g., a mongo query filter, into an
+    equivalent hashable value so that it can be used as a dict key.
+    """
+    if isinstance(obj, dict):
+        return tuple(sorted((k, _hashable(v)) for k, v in obj.items()))
+    if isinstance(obj, (list, tuple)):
+        return tuple(_hashable(v) for v in obj)
+    return obj
+
+
+def _narrow_projection(projection, fields):
+    """
+    The mongo projection narrowed down to the given fields (keeping its
+    exclusions, e.g., '_id': 0), or all of it when fields is None.
+    """
+    if fields is None:
+        return projection
+    narrowed = {k: v for k, v in projection.items() if not v or k in fields}
+    # one of exclusions only (or an empty one) would read all the fields
+    if all(not v for v in narrowed.values()):
+        narrowed['_id'] = 1
+    return narrowed
+
+
+def _encode_page_token(sort_key):
+    """
+    The opaque continuation token of a page of a paged query, from the
+    sort_key (the list of the sort field values, e.g., datetimes and
+    ObjectIds) of the last document of the page.
+    """
+    return base64.urlsafe_b64encode(
+        json_util.dumps(sort_key).encode('utf-8')).decode('ascii')
+
+
+def _decode_page_token(token):
+    """
+    The sort_key a continuation token was made of by _encode_page_token.
+    """
+    try:
+        sort_key = json_util.loads(
+            base64.urlsafe_b64decode(str(token)).decode('utf-8'),
+            json_options=_TOKEN_JSON_OPTIONS)
+    except (TypeError, ValueError, binascii.Error):
+        sort_key = None
+    if not isinstance(sort_key, list):
+        raise ValueError('Invalid continuation_token {}.'.format(token))
+    return sort_key
@@ -0,0 +1,125 @@
+import datetime
+import json
+import struct
+
+import msgpack
+import zstandard
+from bson.objectid import ObjectId
+
+try:
+    _STR_TYPES = (str, unicode)  # py2
+    _JSON_SCALARS = (str, unicode, int, long, float, bool, type(None))
+except NameError:
+    _STR_TYPES = (str,)  # py3
+    _JSON_SCALARS = (str, int, float, bool, type(None))
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+_MICROS = struct.Struct('>q')
+
+# msgpack extension type codes
+_EXT_DATETIME = 1
+_EXT_OBJECTID = 2
+_EXT_TUPLE = 3
+
+# first byte of a MsgpackCodec payload
+_RAW = b'\x00'
+_ZSTD = b'\x01'
+
+
+def _json_exact(value):
+    """
+    _json_exact--whether value comes back unchanged from a JSON round trip
+    (no tuples, datetimes, ObjectIds or non-string dict keys)
+    """
+    if isinstance(value, dict):
+        return all(isinstance(k, _STR_TYPES) and _json_exact(v)
+                   for k, v in value.items())
+    if isinstance(value, list):
+        return all(_json_exact(v) for v in value)
+    return isinstance(value, _JSON_SCALARS)
+
+
+class JsonCodec:
+    '''
+    JsonCodec--cached values as JSON; only those that come back unchanged
+    can be encoded.
+    '''
+    name = 'json'
+
+    def encode(self, value):
+        """
+        encode--the payload of value, or None if it cannot be encoded
+        """
+        if not _json_exact(value):
+            return None
+        return json.dumps(value).encode('utf-8')
+
+    def decode(self, payload):
+        return json.loads(payload.decode('utf-8'))
+
+
+class MsgpackCodec:
+    '''
+    MsgpackCodec--cached values as msgpack, with extension types for the
+    (naive, UTC) datetimes, ObjectIds and tuples of the mongo query results.
+    Payloads of compress_min_bytes or more are compressed with zstd.
+    '''
+    name = 'msgpack'
+
+    def __init__(self, compress_min_bytes=1024, level=3):
+        self.compress_min_bytes = compress_min_bytes
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._unpack_opts = {'raw': False, 'ext_hook': self._ext_hook}
+        if msgpack.version >= (1, 0, 0):
+            # e.g., the int ws_id keys
+            self._unpack_opts['strict_map_key'] = False
+
+    def _default(self, obj):
+        if isinstance(obj, datetime.datetime) and obj.tzinfo is None:
+            delta = obj - _EPOCH
+            micros = ((delta.days * 86400 + delta.seconds) * 1000000 +
+                      delta.microseconds)
+            return msgpack.ExtType(_EXT_DATETIME, _MICROS.pack(micros))
+        if isinstance(obj, ObjectId):
+            return msgpack.ExtType(_EXT_OBJECTID, obj.binary)
+        if isinstance(obj, tuple):
+            return msgpack.ExtType(_EXT_TUPLE, self._pack(list(obj)))
+        raise TypeError('{!r} cannot be cached as msgpack'.format(obj))
+
+    def _ext_hook(self, code, data):
+        if code == _EXT_DATETIME:
+            return _EPOCH + datetime.timedelta(
+                microseconds=_MICROS.unpack(data)[0])
+        if code == _EXT_OBJECTID:
+            return ObjectId(data)
+        if code == _EXT_TUPLE:
+            return tuple(msgpack.unpackb(data, **self._unpack_opts))
+        return msgpack.ExtType(code, data)
+
+    def _pack(self, value):
+        # strict_types sends tuples (and dict/list subclasses) to _default
+        return msgpack.packb(value, use_bin_type=True, strict_types=True,
+                             default=self._default)
+
+    def encode(self, value):
+        """
+        encode--the payload of value, or None if it cannot be encoded
+        """
+        try:
+            packed = self._pack(value)
+        except (TypeError, ValueError, OverflowError):
+            return None
+        if len(packed) >= self.compress_min_bytes:
+            return _ZSTD + self._compressor.compress(packed)
+        return _RAW + packed
+
+    def decode(self, payload):
+        if payload[:1] == _ZSTD:
+            packed = self._decompressor.decompress(payload[1:])
+        else:
+            packed = payload[1:]
+        return msgpack.unpackb(packed, **self._unpack_opts)
+
+
+CODECS = {JsonCodec.name: JsonCodec, MsgpackCodec.name: MsgpackCodec}
@@ -125,6 +125,9 @@ $return_records is a kb_Metrics.AppMetricsResult
 AppMetricsParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -132,6 +135,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 AppMetricsResult is a reference to a hash where the following keys are defined:
 	job_states has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -144,6 +148,9 @@ $return_records is a kb_Metrics.AppMetricsResult
 AppMetricsParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -151,6 +158,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 AppMetricsResult is a reference to a hash where the following keys are defined:
 	job_states has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -323,6 +331,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -330,6 +342,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -342,6 +355,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -349,6 +366,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -425,6 +443,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -432,6 +454,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -444,6 +467,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -451,6 +478,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -527,6 +555,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -534,6 +566,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -546,6 +579,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -553,6 +590,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -629,6 +667,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -636,6 +678,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -648,6 +691,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -655,6 +702,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -731,6 +779,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -738,6 +790,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -750,6 +803,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -757,6 +814,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -833,6 +891,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -840,6 +902,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -852,6 +915,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -859,6 +926,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -935,6 +1003,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -942,6 +1014,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -954,6 +1027,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -961,6 +1038,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -1037,6 +1115,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1044,6 +1126,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -1056,6 +1139,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1063,6 +1150,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -1139,6 +1227,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1146,6 +1238,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -1158,6 +1251,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1165,6 +1262,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -1241,6 +1339,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1248,6 +1350,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -1260,6 +1363,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1267,6 +1374,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -1343,6 +1451,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1350,6 +1462,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -1362,6 +1475,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1369,6 +1486,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -1445,6 +1563,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1452,6 +1574,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -1464,6 +1587,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1471,6 +1598,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -1547,6 +1675,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1554,6 +1686,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 </pre>
 
@@ -1566,6 +1699,10 @@ $return_records is a kb_Metrics.MetricsOutput
 MetricsInputParams is a reference to a hash where the following keys are defined:
 	user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 	epoch_range has a value which is a kb_Metrics.epoch_range
+	incremental has a value which is an int
+	limit has a value which is an int
+	continuation_token has a value which is a string
+	fields has a value which is a reference to a list where each element is a string
 user_id is a string
 epoch_range is a reference to a list containing 2 items:
 	0: (e_lowerbound) a kb_Metrics.epoch
@@ -1573,6 +1710,7 @@ epoch_range is a reference to a list containing 2 items:
 epoch is an int
 MetricsOutput is a reference to a hash where the following keys are defined:
 	metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+	continuation_token has a value which is a string
 
 
 =end text
@@ -1925,6 +2063,17 @@ a reference to a list containing 3 items:
 
 
 
+=item Description
+
+limit - the most job states to return (default 0 for all of them);
+    when there are more, the result has a continuation_token
+continuation_token - the continuation_token of the previous page,
+    to get the next one (with the same user_ids and epoch_range)
+fields - the fields of the job states to return (e.g., job_id,
+    status, app_id, creation_time); all of them by default. Only the
+    data the given fields are assembled from is read.
+
+
 =item Definition
 
 =begin html
@@ -1933,6 +2082,9 @@ a reference to a list containing 3 items:
 a reference to a hash where the following keys are defined:
 user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 epoch_range has a value which is a kb_Metrics.epoch_range
+limit has a value which is an int
+continuation_token has a value which is a string
+fields has a value which is a reference to a list where each element is a string
 
 </pre>
 
@@ -1943,6 +2095,9 @@ epoch_range has a value which is a kb_Metrics.epoch_range
 a reference to a hash where the following keys are defined:
 user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 epoch_range has a value which is a kb_Metrics.epoch_range
+limit has a value which is an int
+continuation_token has a value which is a string
+fields has a value which is a reference to a list where each element is a string
 
 
 =end text
@@ -1957,6 +2112,12 @@ epoch_range has a value which is a kb_Metrics.epoch_range
 
 
 
+=item Description
+
+continuation_token - set when there are job states left after this
+    page, see AppMetricsParams
+
+
 =item Definition
 
 =begin html
@@ -1964,6 +2125,7 @@ epoch_range has a value which is a kb_Metrics.epoch_range
 <pre>
 a reference to a hash where the following keys are defined:
 job_states has a value which is an UnspecifiedObject, which can hold any non-null object
+continuation_token has a value which is a string
 
 </pre>
 
@@ -1973,6 +2135,7 @@ job_states has a value which is an UnspecifiedObject, which can hold any non-nul
 
 a reference to a hash where the following keys are defined:
 job_states has a value which is an UnspecifiedObject, which can hold any non-null object
+continuation_token has a value which is a string
 
 
 =end text
@@ -2022,6 +2185,15 @@ narr_name_map has a value which is a kb_Metrics.narrative_name_map
 =item Description
 
 unified input/output parameters
+incremental - used by update_metrics only; if set to 1, each update
+    phase only processes the data recorded after its last successful
+    checkpoint instead of the whole epoch_range (default 0)
+limit, continuation_token - used by get_user_details and
+    get_nonkbuser_details only; page through the users as the
+    AppMetricsParams ones do through the job states
+fields - used by get_user_details and get_nonkbuser_details only;
+    the fields of the users to return (e.g., username, signup_at);
+    all of them by default
 
 
 =item Definition
@@ -2032,6 +2204,10 @@ unified input/output parameters
 a reference to a hash where the following keys are defined:
 user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 epoch_range has a value which is a kb_Metrics.epoch_range
+incremental has a value which is an int
+limit has a value which is an int
+continuation_token has a value which is a string
+fields has a value which is a reference to a list where each element is a string
 
 </pre>
 
@@ -2042,6 +2218,10 @@ epoch_range has a value which is a kb_Metrics.epoch_range
 a reference to a hash where the following keys are defined:
 user_ids has a value which is a reference to a list where each element is a kb_Metrics.user_id
 epoch_range has a value which is a kb_Metrics.epoch_range
+incremental has a value which is an int
+limit has a value which is an int
+continuation_token has a value which is a string
+fields has a value which is a reference to a list where each element is a string
 
 
 =end text
@@ -2056,6 +2236,12 @@ epoch_range has a value which is a kb_Metrics.epoch_range
 
 
 
+=item Description
+
+continuation_token - set when there are records left after this
+    page, see MetricsInputParams
+
+
 =item Definition
 
 =begin html
@@ -2063,6 +2249,7 @@ epoch_range has a value which is a kb_Metrics.epoch_range
 <pre>
 a reference to a hash where the following keys are defined:
 metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+continuation_token has a value which is a string
 
 </pre>
 
@@ -2072,6 +2259,7 @@ metrics_result has a value which is an UnspecifiedObject, which can hold any non
 
 a reference to a hash where the following keys are defined:
 metrics_result has a value which is an UnspecifiedObject, which can hold any non-null object
+continuation_token has a value which is a string
 
 
 =end text
@@ -35,15 +35,26 @@ class kb_Metrics(object):
 
     def get_app_metrics(self, params, context=None):
         """
-        :param params: instance of type "AppMetricsParams" -> structure:
-           parameter "user_ids" of list of type "user_id" (A string for the
-           user id), parameter "epoch_range" of type "epoch_range" -> tuple
-           of size 2: parameter "e_lowerbound" of type "epoch" (A Unix epoch
-           (the time since 00:00:00 1/1/1970 UTC) in milliseconds.),
-           parameter "e_upperbound" of type "epoch" (A Unix epoch (the time
-           since 00:00:00 1/1/1970 UTC) in milliseconds.)
-        :returns: instance of type "AppMetricsResult" -> structure: parameter
-           "job_states" of unspecified object
+        :param params: instance of type "AppMetricsParams" (limit - the most
+           job states to return (default 0 for all of them); when there are
+           more, the result has a continuation_token continuation_token - the
+           continuation_token of the previous page, to get the next one (with
+           the same user_ids and epoch_range) fields - the fields of the job
+           states to return (e.g., job_id, status, app_id, creation_time);
+           all of them by default. Only the data the given fields are
+           assembled from is read.) -> structure: parameter "user_ids" of
+           list of type "user_id" (A string for the user id), parameter
+           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
+           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
+           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
+           UTC) in milliseconds.), parameter "limit" of Long, parameter
+           "continuation_token" of String, parameter "fields" of list of
+           String
+        :returns: instance of type "AppMetricsResult" (continuation_token -
+           set when there are job states left after this page, see
+           AppMetricsParams) -> structure: parameter "job_states" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_app_metrics',
@@ -66,15 +77,27 @@ class kb_Metrics(object):
         """
         For writing to mongodb metrics *
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.update_metrics',
@@ -84,15 +107,27 @@ class kb_Metrics(object):
         """
         For retrieving from mongodb metrics *
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_user_details',
@@ -101,15 +136,27 @@ class kb_Metrics(object):
     def get_nonkbuser_details(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_nonkbuser_details',
@@ -118,15 +165,27 @@ class kb_Metrics(object):
     def get_signup_returning_users(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_signup_returning_users',
@@ -135,15 +194,27 @@ class kb_Metrics(object):
     def get_signup_returning_nonkbusers(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_signup_returning_nonkbusers',
@@ -152,15 +223,27 @@ class kb_Metrics(object):
     def get_user_counts_per_day(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_user_counts_per_day',
@@ -169,15 +252,27 @@ class kb_Metrics(object):
     def get_total_logins(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_total_logins',
@@ -186,15 +281,27 @@ class kb_Metrics(object):
     def get_nonkb_total_logins(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_nonkb_total_logins',
@@ -203,15 +310,27 @@ class kb_Metrics(object):
     def get_user_logins(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_user_logins',
@@ -220,15 +339,27 @@ class kb_Metrics(object):
     def get_user_numObjs(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_user_numObjs',
@@ -237,15 +368,27 @@ class kb_Metrics(object):
     def get_narrative_stats(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_narrative_stats',
@@ -254,15 +397,27 @@ class kb_Metrics(object):
     def get_all_narrative_stats(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_all_narrative_stats',
@@ -271,15 +426,27 @@ class kb_Metrics(object):
     def get_user_ws_stats(self, params, context=None):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         return self._client.call_method(
             'kb_Metrics.get_user_ws_stats',
@@ -2,6 +2,7 @@
 #BEGIN_HEADER
 # The header block is where all import statments should live
 from kb_Metrics.metricsdb_controller import MetricsMongoDBController
+from kb_Metrics import metrics_cache
 #END_HEADER
 
 
@@ -43,22 +44,34 @@ This KBase SDK module implements methods for generating various KBase metrics.
 
     def get_app_metrics(self, ctx, params):
         """
-        :param params: instance of type "AppMetricsParams" -> structure:
-           parameter "user_ids" of list of type "user_id" (A string for the
-           user id), parameter "epoch_range" of type "epoch_range" -> tuple
-           of size 2: parameter "e_lowerbound" of type "epoch" (A Unix epoch
-           (the time since 00:00:00 1/1/1970 UTC) in milliseconds.),
-           parameter "e_upperbound" of type "epoch" (A Unix epoch (the time
-           since 00:00:00 1/1/1970 UTC) in milliseconds.)
-        :returns: instance of type "AppMetricsResult" -> structure: parameter
-           "job_states" of unspecified object
+        :param params: instance of type "AppMetricsParams" (limit - the most
+           job states to return (default 0 for all of them); when there are
+           more, the result has a continuation_token continuation_token - the
+           continuation_token of the previous page, to get the next one (with
+           the same user_ids and epoch_range) fields - the fields of the job
+           states to return (e.g., job_id, status, app_id, creation_time);
+           all of them by default. Only the data the given fields are
+           assembled from is read.) -> structure: parameter "user_ids" of
+           list of type "user_id" (A string for the user id), parameter
+           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
+           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
+           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
+           UTC) in milliseconds.), parameter "limit" of Long, parameter
+           "continuation_token" of String, parameter "fields" of list of
+           String
+        :returns: instance of type "AppMetricsResult" (continuation_token -
+           set when there are job states left after this page, see
+           AppMetricsParams) -> structure: parameter "job_states" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
         #BEGIN get_app_metrics
-        return_records = self.mdb_controller.get_user_job_states(ctx['user_id'],
-                                                                 params,
-                                                                 ctx['token'])
+        # the server streams the results, so they may be assembled lazily
+        return_records = self.mdb_controller.get_user_job_states(
+            ctx['user_id'], params, ctx['token'],
+            stream=ctx.get('stream', False))
         #END get_app_metrics
 
         # At some point might do deeper type checking...
@@ -96,15 +109,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
         """
         For writing to mongodb metrics *
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -125,21 +150,34 @@ This KBase SDK module implements methods for generating various KBase metrics.
         """
         For retrieving from mongodb metrics *
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
         #BEGIN get_user_details
         return_records = self.mdb_controller.get_user_details(
-            ctx['user_id'], params, ctx['token'])
+            ctx['user_id'], params, ctx['token'],
+            stream=ctx.get('stream', False))
         #END get_user_details
 
         # At some point might do deeper type checking...
@@ -152,21 +190,34 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_nonkbuser_details(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
         #BEGIN get_nonkbuser_details
         return_records = self.mdb_controller.get_user_details(
-            ctx['user_id'], params, ctx['token'], exclude_kbstaff=True)
+            ctx['user_id'], params, ctx['token'], exclude_kbstaff=True,
+            stream=ctx.get('stream', False))
         #END get_nonkbuser_details
 
         # At some point might do deeper type checking...
@@ -179,15 +230,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_signup_returning_users(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -206,15 +269,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_signup_returning_nonkbusers(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -233,15 +308,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_user_counts_per_day(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -260,15 +347,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_total_logins(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -287,15 +386,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_nonkb_total_logins(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -314,15 +425,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_user_logins(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -341,15 +464,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_user_numObjs(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -368,15 +503,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_narrative_stats(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -395,15 +542,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_all_narrative_stats(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -422,15 +581,27 @@ This KBase SDK module implements methods for generating various KBase metrics.
     def get_user_ws_stats(self, ctx, params):
         """
         :param params: instance of type "MetricsInputParams" (unified
-           input/output parameters) -> structure: parameter "user_ids" of
-           list of type "user_id" (A string for the user id), parameter
-           "epoch_range" of type "epoch_range" -> tuple of size 2: parameter
-           "e_lowerbound" of type "epoch" (A Unix epoch (the time since
-           00:00:00 1/1/1970 UTC) in milliseconds.), parameter "e_upperbound"
+           input/output parameters incremental - used by update_metrics only;
+           if set to 1, each update phase only processes the data recorded
+           after its last successful checkpoint instead of the whole
+           epoch_range (default 0) limit, continuation_token - used by
+           get_user_details and get_nonkbuser_details only; page through the
+           users as the AppMetricsParams ones do through the job states
+           fields - used by get_user_details and get_nonkbuser_details only;
+           the fields of the users to return (e.g., username, signup_at); all
+           of them by default) -> structure: parameter "user_ids" of list of
+           type "user_id" (A string for the user id), parameter "epoch_range"
+           of type "epoch_range" -> tuple of size 2: parameter "e_lowerbound"
            of type "epoch" (A Unix epoch (the time since 00:00:00 1/1/1970
-           UTC) in milliseconds.)
-        :returns: instance of type "MetricsOutput" -> structure: parameter
-           "metrics_result" of unspecified object
+           UTC) in milliseconds.), parameter "e_upperbound" of type "epoch"
+           (A Unix epoch (the time since 00:00:00 1/1/1970 UTC) in
+           milliseconds.), parameter "incremental" of Long, parameter "limit"
+           of Long, parameter "continuation_token" of String, parameter
+           "fields" of list of String
+        :returns: instance of type "MetricsOutput" (continuation_token - set
+           when there are records left after this page, see
+           MetricsInputParams) -> structure: parameter "metrics_result" of
+           unspecified object, parameter "continuation_token" of String
         """
         # ctx is the context object
         # return variables are: return_records
@@ -451,6 +622,7 @@ This KBase SDK module implements methods for generating various KBase metrics.
                      'message': "",
                      'version': self.VERSION,
                      'git_url': self.GIT_URL,
-                     'git_commit_hash': self.GIT_COMMIT_HASH}
+                     'git_commit_hash': self.GIT_COMMIT_HASH,
+                     'cache_stats': metrics_cache.stats()}
         #END_STATUS
         return [returnVal]
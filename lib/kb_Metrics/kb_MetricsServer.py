@@ -5,6 +5,8 @@ import sys
 import json
 import traceback
 import datetime
+import itertools
+from collections import Iterator
 from multiprocessing import Process
 from getopt import getopt, GetoptError
 from jsonrpcbase import JSONRPCService, InvalidParamsError, KeywordError,\
@@ -21,6 +23,7 @@ from kb_Metrics.authclient import KBaseAuth as _KBaseAuth
 DEPLOY = 'KB_DEPLOYMENT_CONFIG'
 SERVICE = 'KB_SERVICE_NAME'
 AUTH = 'auth-service-url'
+CHUNK_BYTES = 'response-chunk-bytes'
 
 # Note that the error fields do not match the 2.0 JSONRPC spec
 
@@ -61,6 +64,97 @@ class JSONObjectEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+def _holds_lazy(obj):
+    """
+    Whether obj is a lazy sequence (an iterator, e.g., a generator or a
+    cursor) or a dict or sequence directly holding one.
+    """
+    if isinstance(obj, Iterator):
+        return True
+    if isinstance(obj, dict):
+        return any(isinstance(v, Iterator) for v in obj.itervalues())
+    if isinstance(obj, (list, tuple)):
+        return any(isinstance(v, Iterator) for v in obj)
+    return False
+
+
+class StreamingJSONEncoder(JSONObjectEncoder):
+    '''
+    Encodes a value piece by piece: its dicts and sequences are walked and
+    the lazy sequences are consumed as they are written, so that neither
+    the value nor its JSON has to be held in memory whole. The items of
+    the sequences (e.g., the records of a result) are encoded in one go,
+    but for those holding lazy sequences themselves.
+    '''
+
+    def default(self, obj):
+        # a lazy sequence inside a record is written out as a list
+        if isinstance(obj, Iterator):
+            return list(obj)
+        return JSONObjectEncoder.default(self, obj)
+
+    def _key(self, key):
+        if not isinstance(key, basestring):
+            if not isinstance(key, (int, long, float, bool, type(None))):
+                raise TypeError('key {!r} is not a string'.format(key))
+            key = self.encode(key)
+        return self.encode(key)
+
+    def iter_json(self, obj):
+        """
+        Returns an iterator over the pieces of the JSON string of obj.
+        """
+        if isinstance(obj, dict):
+            yield '{'
+            for i, (key, value) in enumerate(obj.iteritems()):
+                yield ((self.item_separator if i else '') + self._key(key) +
+                       self.key_separator)
+                for piece in self.iter_json(value):
+                    yield piece
+            yield '}'
+        elif isinstance(obj, (list, tuple, Iterator)):
+            yield '['
+            for i, item in enumerate(obj):
+                if i:
+                    yield self.item_separator
+                if _holds_lazy(item):
+                    for piece in self.iter_json(item):
+                        yield piece
+                else:
+                    yield self.encode(item)
+            yield ']'
+        else:
+            yield self.encode(obj)
+
+
+def _holds_lazy_result(respond):
+    """
+    Whether the return values of respond (a jsonrpc response, or a batch
+    of them) hold lazy sequences.
+    """
+    if isinstance(respond, list):
+        return any(_holds_lazy_result(r) for r in respond)
+    result = respond.get('result')
+    return isinstance(result, list) and any(_holds_lazy(r) for r in result)
+
+
+def _chunked(pieces, chunk_bytes):
+    """
+    Joins the pieces into chunks of at least chunk_bytes (but the last).
+    """
+    chunk = []
+    size = 0
+    for piece in pieces:
+        chunk.append(piece)
+        size += len(piece)
+        if size >= chunk_bytes:
+            yield ''.join(chunk)
+            chunk = []
+            size = 0
+    if chunk:
+        yield ''.join(chunk)
+
+
 class JSONRPCServiceCustom(JSONRPCService):
 
     def call(self, ctx, jsondata):
@@ -77,6 +171,29 @@ class JSONRPCServiceCustom(JSONRPCService):
 
         return None
 
+    def call_iter(self, ctx, jsondata, chunk_bytes):
+        """
+        Calls jsonrpc service's method and returns its return value as call()
+        does, unless it holds lazy sequences: then it is returned as an
+        iterator over chunks of (at least) chunk_bytes of its JSON string,
+        the lazy sequences being consumed as the chunks are. The first chunk
+        is encoded here, so that the errors raised early on still come from
+        this call.
+
+        Arguments:
+        jsondata -- remote method call in jsonrpc format
+        chunk_bytes -- the size of the chunks
+        """
+        result = self.call_py(ctx, jsondata)
+        if result is None:
+            return None
+        if not _holds_lazy_result(result):
+            return json.dumps(result, cls=JSONObjectEncoder)
+
+        chunks = _chunked(StreamingJSONEncoder().iter_json(result),
+                          chunk_bytes)
+        return itertools.chain([next(chunks)], chunks)
+
     def _call_method(self, ctx, request):
         """Calls given method with given params and returns it value."""
         method = self.method_data[request['method']]['method']
@@ -398,6 +515,10 @@ class Application(object):
                              types=[dict])
         authurl = config.get(AUTH) if config else None
         self.auth_client = _KBaseAuth(authurl)
+        # the results assembled lazily are streamed in chunks of this size
+        # (0 to read them whole and send them with their content-length)
+        self.chunk_bytes = int(config.get(CHUNK_BYTES, 65536)
+                               if config else 65536)
 
     def __call__(self, environ, start_response):
         # Context object, equivalent to the perl impl CallContext
@@ -470,7 +591,13 @@ class Application(object):
                         self.log(log.INFO, ctx, 'X-Forwarded-For: ' +
                                  environ.get('HTTP_X_FORWARDED_FOR'))
                     self.log(log.INFO, ctx, 'start method')
-                    rpc_result = self.rpc_service.call(ctx, req)
+                    if self.chunk_bytes > 0:
+                        # the methods may return their records lazily
+                        ctx['stream'] = True
+                        rpc_result = self.rpc_service.call_iter(
+                            ctx, req, self.chunk_bytes)
+                    else:
+                        rpc_result = self.rpc_service.call(ctx, req)
                     self.log(log.INFO, ctx, 'end method')
                     status = '200 OK'
                 except JSONRPCError as jre:
@@ -497,20 +624,36 @@ class Application(object):
         # print 'Result from the method call is:\n%s\n' % \
         #    pprint.pformat(rpc_result)
 
+        response_headers = [
+            ('Access-Control-Allow-Origin', '*'),
+            ('Access-Control-Allow-Headers', environ.get(
+                'HTTP_ACCESS_CONTROL_REQUEST_HEADERS', 'authorization')),
+            ('content-type', 'application/json')]
+        if isinstance(rpc_result, Iterator):
+            # without a content-length, the body is sent chunked (HTTP/1.1)
+            start_response(status, response_headers)
+            return self.stream_body(rpc_result, ctx)
+
         if rpc_result:
             response_body = rpc_result
         else:
             response_body = ''
 
-        response_headers = [
-            ('Access-Control-Allow-Origin', '*'),
-            ('Access-Control-Allow-Headers', environ.get(
-                'HTTP_ACCESS_CONTROL_REQUEST_HEADERS', 'authorization')),
-            ('content-type', 'application/json'),
-            ('content-length', str(len(response_body)))]
+        response_headers.append(('content-length', str(len(response_body))))
         start_response(status, response_headers)
         return [response_body]
 
+    def stream_body(self, chunks, context):
+        try:
+            for chunk in chunks:
+                yield chunk
+        except Exception:
+            # the status is sent already, so the response can only be cut
+            # short, for the client to fail on
+            self.log(log.ERR, context,
+                     traceback.format_exc().split('\n')[0:-1])
+            raise
+
     def process_error(self, error, context, request, trace=None):
         if trace:
             self.log(log.ERR, context, trace.split('\n')[0:-1])
@@ -0,0 +1,755 @@
+import copy
+import datetime
+import hashlib
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+
+import redis
+from bson.objectid import ObjectId
+
+from kb_Metrics.cache_codec import CODECS, MsgpackCodec
+
+DEFAULT_EXPIRY = 60 * 60 * 24
+
+_KEY_PREFIX = 'kb_Metrics'
+_STATS_KEY = _KEY_PREFIX + ':stats'
+_REDIS_RETRY_SECS = 60  # wait between attempts to reach an absent redis
+_LEASE_POLL_SECS = 0.1  # wait between checks for another process' result
+_VERSION_REFRESH_SECS = 2  # wait between reads of the namespace versions
+_STATS_PUBLISH_SECS = 30  # wait between publications of a process' stats
+_STATS_TTL = 5 * 60  # after which the stats of a silent process are dropped
+_COUNTERS = ('hits', 'redis_hits', 'misses', 'loads', 'load_secs')
+_MISSING = object()
+
+
+class LRUCache:
+    '''
+    LRUCache--a thread-safe, in-process LRU store whose entries expire
+    after their own TTL and which is bounded both by entry count and by
+    the (approximate) number of bytes held. Expired entries are kept until
+    evicted, to be served as stale values while they are recomputed.
+    Keys are (group, key) tuples; a group may further cap its own entries.
+    '''
+
+    def __init__(self, max_entries, max_bytes):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # (group, key) -> (expires_at, n_bytes, value), oldest first
+        self._entries = OrderedDict()
+        self._group_counts = dict()
+        self._group_bytes = dict()
+        self._group_evictions = dict()
+        self._n_bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _evict(self, key, replaced=False):
+        entry = self._entries.pop(key)
+        self._n_bytes -= entry[1]
+        group = key[0]
+        self._group_counts[group] -= 1
+        self._group_bytes[group] -= entry[1]
+        if not replaced:
+            self._group_evictions[group] = \
+                self._group_evictions.get(group, 0) + 1
+
+    def get(self, key):
+        """
+        get--the live value stored under key (which becomes the most
+        recently used), or _MISSING
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                return _MISSING
+            # re-insert to move it to the most recently used end
+            del self._entries[key]
+            self._entries[key] = entry
+            return entry[2]
+
+    def get_stale(self, key):
+        """
+        get_stale--the value stored under key even if it has expired,
+        or _MISSING
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            return _MISSING if entry is None else entry[2]
+
+    def put(self, key, value, expire, n_bytes, group_limit=None):
+        """
+        put--store value under key for expire seconds, evicting the least
+        recently used entries (of key's group first if it is over
+        group_limit) to stay within bounds
+        """
+        if expire <= 0 or n_bytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._evict(key, replaced=True)
+            self._entries[key] = (time.time() + expire, n_bytes, value)
+            self._n_bytes += n_bytes
+            group = key[0]
+            self._group_counts[group] = self._group_counts.get(group, 0) + 1
+            self._group_bytes[group] = \
+                self._group_bytes.get(group, 0) + n_bytes
+
+            if group_limit is not None and self._group_counts[group] > group_limit:
+                oldest = next(k for k in self._entries if k[0] == group)
+                self._evict(oldest)
+            while (len(self._entries) > self.max_entries or
+                   self._n_bytes > self.max_bytes):
+                self._evict(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._group_counts.clear()
+            self._group_bytes.clear()
+            self._group_evictions.clear()
+            self._n_bytes = 0
+
+    def group_stats(self):
+        """
+        group_stats--{group: (entries, bytes, evictions)} of the groups
+        """
+        with self._lock:
+            return dict((group, (self._group_counts.get(group, 0),
+                                 self._group_bytes.get(group, 0),
+                                 self._group_evictions.get(group, 0)))
+                        for group in set(self._group_counts) |
+                        set(self._group_evictions))
+
+
+class RedisStore:
+    '''
+    RedisStore--the shared, second cache tier. Connecting is lazy and an
+    unreachable redis is only retried every _REDIS_RETRY_SECS, so that
+    without one every lookup is a cheap miss instead of a network error.
+    '''
+
+    def __init__(self, host='localhost', port=6379, db=0, password=None,
+                 lease_secs=60):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.lease_secs = lease_secs
+        self._conn = None
+        self._next_try = 0
+
+    def connection(self):
+        if self._conn is None and time.time() >= self._next_try:
+            try:
+                conn = redis.StrictRedis(host=self.host, port=self.port,
+                                         db=self.db, password=self.password,
+                                         socket_connect_timeout=1,
+                                         socket_timeout=1)
+                conn.ping()
+                self._conn = conn
+            except redis.RedisError:
+                self._next_try = time.time() + _REDIS_RETRY_SECS
+        return self._conn
+
+    def _drop(self, err):
+        logging.warning('redis cache tier unavailable: {}'.format(err))
+        self._conn = None
+        self._next_try = time.time() + _REDIS_RETRY_SECS
+
+    def get(self, key):
+        """
+        get--(payload, remaining ttl in seconds) stored under key, or None
+        """
+        return self.get_many([key])[0]
+
+    def get_many(self, keys):
+        """
+        get_many--get of each of keys, read in a single round trip
+        """
+        conn = self.connection()
+        if conn is None:
+            return [None] * len(keys)
+        try:
+            pipe = conn.pipeline()
+            for key in keys:
+                pipe.get(key)
+                pipe.pttl(key)
+            replies = pipe.execute()
+        except redis.RedisError as e:
+            self._drop(e)
+            return [None] * len(keys)
+        stored = []
+        for payload, pttl in zip(replies[::2], replies[1::2]):
+            if payload is None or pttl is None or pttl <= 0:
+                stored.append(None)
+            else:
+                stored.append((payload, pttl / 1000.0))
+        return stored
+
+    def set(self, key, payload, expire):
+        self.set_many([(key, payload)], expire)
+
+    def set_many(self, items, expire):
+        """
+        set_many--set each of the (key, payload) items, in a single round trip
+        """
+        conn = self.connection()
+        if conn is None:
+            return
+        try:
+            pipe = conn.pipeline()
+            for key, payload in items:
+                pipe.setex(key, int(expire), payload)
+            pipe.execute()
+        except redis.RedisError as e:
+            self._drop(e)
+
+    def counters(self, keys):
+        """
+        counters--the integer values stored under keys, 0 for the missing
+        ones (and for all of them without a redis)
+        """
+        conn = self.connection()
+        if conn is None:
+            return [0] * len(keys)
+        try:
+            return [int(val or 0) for val in conn.mget(keys)]
+        except redis.RedisError as e:
+            self._drop(e)
+            return [0] * len(keys)
+
+    def incr(self, key):
+        conn = self.connection()
+        if conn is None:
+            return 0
+        try:
+            return conn.incr(key)
+        except redis.RedisError as e:
+            self._drop(e)
+            return 0
+
+    def lease(self, key, token):
+        """
+        lease--take the lease key for lease_secs unless another process
+        holds it; without a redis there is no one to share it with and
+        the lease is always granted
+        """
+        conn = self.connection()
+        if conn is None:
+            return True
+        try:
+            return bool(conn.set(key, token, nx=True,
+                                 px=int(self.lease_secs * 1000)))
+        except redis.RedisError as e:
+            self._drop(e)
+            return True
+
+    def leased(self, key):
+        conn = self.connection()
+        if conn is None:
+            return False
+        try:
+            return bool(conn.exists(key))
+        except redis.RedisError as e:
+            self._drop(e)
+            return False
+
+    def hset(self, key, field, value):
+        conn = self.connection()
+        if conn is None:
+            return
+        try:
+            conn.hset(key, field, value)
+        except redis.RedisError as e:
+            self._drop(e)
+
+    def hgetall(self, key):
+        """
+        hgetall--the {field: value} hash stored under key, or None
+        without a redis
+        """
+        conn = self.connection()
+        if conn is None:
+            return None
+        try:
+            return conn.hgetall(key)
+        except redis.RedisError as e:
+            self._drop(e)
+            return None
+
+    def hdel(self, key, *fields):
+        conn = self.connection()
+        if conn is None:
+            return
+        try:
+            conn.hdel(key, *fields)
+        except redis.RedisError as e:
+            self._drop(e)
+
+    def release(self, key, token):
+        """
+        release--give the lease key up if it is still the one taken with
+        token (and has not expired and gone to another process since)
+        """
+        conn = self.connection()
+        if conn is None:
+            return
+        try:
+            with conn.pipeline() as pipe:
+                pipe.watch(key)
+                holder = pipe.get(key)
+                if holder is not None and holder.decode('utf-8') == token:
+                    pipe.multi()
+                    pipe.delete(key)
+                    pipe.execute()
+                else:
+                    pipe.unwatch()
+        except redis.WatchError:
+            pass
+        except redis.RedisError as e:
+            self._drop(e)
+
+
+_local = LRUCache(max_entries=4096, max_bytes=128 * 1024 * 1024)
+_remote = RedisStore()
+_codec = MsgpackCodec()  # of the values in redis
+
+# namespace -> the highest version of it seen by this process
+_versions = dict()
+# namespace -> when its version was last read from redis
+_versions_read = dict()
+
+# (func_name, arg_key) -> [lock of the one caller loading it, number of callers]
+_flights = dict()
+_flights_lock = threading.Lock()
+
+# func_name -> {counter: value} of this process, for _COUNTERS
+_counters = dict()
+_counters_lock = threading.Lock()
+_stats_field = '{}:{}'.format(socket.gethostname(), os.getpid())
+_next_publish = 0
+
+
+def configure(config):
+    """
+    configure--size the in-process tier, point the redis tier at the
+    server named in the (deploy) config and pick the codec of its values
+    """
+    global _codec
+    _local.max_entries = int(config.get('cache-max-entries',
+                                        _local.max_entries))
+    _local.max_bytes = int(config.get('cache-max-bytes', _local.max_bytes))
+    _remote.host = config.get('redis-host', _remote.host)
+    _remote.port = int(config.get('redis-port', _remote.port))
+    _remote.password = config.get('redis-password', _remote.password)
+    _remote.lease_secs = float(config.get('cache-lease-seconds',
+                                          _remote.lease_secs))
+    _remote._conn = None
+    _remote._next_try = 0
+
+    codec_name = config.get('cache-codec', _codec.name)
+    if codec_name not in CODECS:
+        raise ValueError('"cache-codec" must be one of {}'.format(
+            sorted(CODECS)))
+    _codec = CODECS[codec_name]()
+    if 'cache-compress-min-bytes' in config:
+        _codec.compress_min_bytes = int(config['cache-compress-min-bytes'])
+
+
+def clear():
+    """
+    clear--empty the in-process tier
+    """
+    _local.clear()
+
+
+def _count(func_name, counter, inc=1):
+    with _counters_lock:
+        counters = _counters.get(func_name)
+        if counters is None:
+            counters = _counters[func_name] = dict.fromkeys(_COUNTERS, 0)
+        counters[counter] += inc
+
+
+def _snapshot():
+    """
+    _snapshot--the stats of this process: the counters of each function
+    with the entries, bytes and evictions of its group in the LRU
+    """
+    with _counters_lock:
+        snap = dict((func_name, dict(counters))
+                    for func_name, counters in _counters.items())
+    for group, (entries, n_bytes, evictions) in _local.group_stats().items():
+        func_stats = snap.setdefault(group, dict.fromkeys(_COUNTERS, 0))
+        func_stats.update(entries=entries, bytes=n_bytes, evictions=evictions)
+    for func_stats in snap.values():
+        for stat in ('entries', 'bytes', 'evictions'):
+            func_stats.setdefault(stat, 0)
+    return snap
+
+
+def _publish_stats(force=False):
+    """
+    _publish_stats--store the stats of this process in redis, for stats()
+    to sum up with the other processes', at most every _STATS_PUBLISH_SECS
+    """
+    global _next_publish
+    now = time.time()
+    if not force and now < _next_publish:
+        return
+    _next_publish = now + _STATS_PUBLISH_SECS
+    _remote.hset(_STATS_KEY, _stats_field,
+                 json.dumps({'at': now, 'functions': _snapshot()}))
+
+
+def stats():
+    """
+    stats--the cache stats of each cached function, summed over the server
+    processes that published theirs lately (or of this process only, without
+    a redis): its hits (redis_hits of them served from redis), misses, loads
+    and the seconds they took, and the entries, bytes and evictions of the
+    in-process tier
+    """
+    _publish_stats(force=True)
+    published = _remote.hgetall(_STATS_KEY)
+    if published is None:
+        snapshots = [_snapshot()]
+    else:
+        snapshots = []
+        for field, payload in published.items():
+            published_stats = json.loads(payload)
+            if published_stats['at'] < time.time() - _STATS_TTL:
+                _remote.hdel(_STATS_KEY, field)
+            else:
+                snapshots.append(published_stats['functions'])
+
+    totals = dict()
+    for snap in snapshots:
+        for func_name, func_stats in snap.items():
+            total = totals.setdefault(func_name, dict())
+            for stat, value in func_stats.items():
+                total[stat] = total.get(stat, 0) + value
+    for total in totals.values():
+        total['load_secs'] = round(total['load_secs'], 3)
+    return {'processes': len(snapshots), 'functions': totals}
+
+
+def _key_default(obj):
+    if isinstance(obj, datetime.datetime):
+        return {'$date': obj.isoformat()}
+    if isinstance(obj, ObjectId):
+        return {'$oid': str(obj)}
+    if isinstance(obj, (set, frozenset)):
+        return sorted(obj)
+    raise TypeError('{!r} cannot be part of a cache key'.format(obj))
+
+
+def _version_key(namespace):
+    return '{}:version:{}'.format(_KEY_PREFIX, namespace)
+
+
+def namespace_versions(namespaces):
+    """
+    namespace_versions--the current versions of namespaces; they are kept
+    in redis, where there is one, for all the processes to agree on, and
+    read from it at most every _VERSION_REFRESH_SECS, so that the bumps of
+    the other processes are seen within that time
+    """
+    now = time.time()
+    stale = [ns for ns in namespaces
+             if now - _versions_read.get(ns, 0) >= _VERSION_REFRESH_SECS]
+    if stale:
+        remote = _remote.counters([_version_key(ns) for ns in stale])
+        for ns, remote_ver in zip(stale, remote):
+            _versions[ns] = max(_versions.get(ns, 0), remote_ver)
+            _versions_read[ns] = now
+    return [_versions.get(ns, 0) for ns in namespaces]
+
+
+def bump_namespaces(*namespaces):
+    """
+    bump_namespaces--move namespaces on to their next version, so that
+    every entry cached under the previous one is no longer looked up
+    """
+    for ns in namespaces:
+        remote_ver = _remote.incr(_version_key(ns))
+        _versions[ns] = max(_versions.get(ns, 0) + 1, remote_ver)
+
+
+def _make_key(args, kwargs, versions=None):
+    key_parts = [args, kwargs]
+    if versions is not None:
+        key_parts.append(versions)
+    arg_str = json.dumps(key_parts, sort_keys=True,
+                         separators=(',', ':'), default=_key_default)
+    return hashlib.md5(arg_str.encode('utf-8')).hexdigest()
+
+
+def _sizeof(value):
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += _sizeof(k) + _sizeof(v)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for v in value:
+            size += _sizeof(v)
+    return size
+
+
+def _fresh_copy(value):
+    """
+    _fresh_copy--a copy of the cached value the caller is free to mutate
+    (the immutable leaves are shared)
+    """
+    if type(value) is dict:
+        return dict((k, _fresh_copy(v)) for k, v in value.items())
+    if type(value) is list:
+        return [_fresh_copy(v) for v in value]
+    if isinstance(value, (dict, list, set)):
+        return copy.deepcopy(value)
+    return value
+
+
+def _redis_key(func_name, arg_key):
+    # the codec is part of the key, as its payloads are only its own to decode
+    return '{}:{}:{}:{}'.format(_KEY_PREFIX, _codec.name, func_name, arg_key)
+
+
+def _lookup(func_name, arg_key, limit=None):
+    """
+    _lookup--the value cached under (func_name, arg_key) in either tier,
+    or _MISSING; a value found in redis is kept in-process too
+    """
+    return _lookup_many(func_name, [arg_key], limit)[0]
+
+
+def _lookup_many(func_name, arg_keys, limit=None):
+    """
+    _lookup_many--_lookup of each of arg_keys, with the ones not found
+    in-process read from redis in a single round trip
+    """
+    values = [_local.get((func_name, arg_key)) for arg_key in arg_keys]
+    missing = [i for i, value in enumerate(values) if value is _MISSING]
+    if not missing:
+        return values
+    stored = _remote.get_many([_redis_key(func_name, arg_keys[i])
+                               for i in missing])
+    for i, entry in zip(missing, stored):
+        if entry is None:
+            continue
+        try:
+            value = _codec.decode(entry[0])
+        except Exception as e:
+            # e.g., written by a process with another codec version
+            logging.warning('undecodable cache entry {}: {}'.format(
+                _redis_key(func_name, arg_keys[i]), e))
+            continue
+        _count(func_name, 'redis_hits')
+        _local.put((func_name, arg_keys[i]), value, entry[1],
+                   _sizeof(value), limit)
+        values[i] = value
+    return values
+
+
+def _store(func_name, arg_key, value, expire, limit=None):
+    _store_many(func_name, [(arg_key, value)], expire, limit)
+
+
+def _store_many(func_name, items, expire, limit=None):
+    """
+    _store_many--cache each of the (arg_key, value) items in both tiers,
+    with those for redis written in a single round trip
+    """
+    payloads = []
+    for arg_key, value in items:
+        # the values the codec cannot encode are cached in-process only
+        payload = _codec.encode(value)
+        if payload is not None:
+            payloads.append((_redis_key(func_name, arg_key), payload))
+        _local.put((func_name, arg_key), value, expire, _sizeof(value),
+                   limit)
+    if payloads:
+        _remote.set_many(payloads, expire)
+
+
+def _ttl(expire, fallback_expire=None):
+    """
+    _ttl--expire, or fallback_expire (if given) while there is no redis
+    """
+    if fallback_expire is not None and _remote.connection() is None:
+        return fallback_expire
+    return expire
+
+
+def _await_lease(func_name, arg_key, lease_key, limit=None):
+    """
+    _await_lease--the value another process is loading under lease_key,
+    or _MISSING if it gave the lease up (or let it expire) without one
+    """
+    deadline = time.time() + _remote.lease_secs
+    while time.time() < deadline:
+        time.sleep(_LEASE_POLL_SECS)
+        value = _lookup(func_name, arg_key, limit)
+        if value is not _MISSING or not _remote.leased(lease_key):
+            return value
+    return _MISSING
+
+
+def _load_leased(func_name, arg_key, loader, expire, limit=None):
+    """
+    _load_leased--loader() run and cached by the process holding the
+    redis lease of the key; the others are served the expired value if
+    there is one, or wait for the holder's result
+    """
+    key = (func_name, arg_key)
+    lease_key = _redis_key(func_name, arg_key) + ':lease'
+    token = uuid.uuid4().hex
+    leased = _remote.lease(lease_key, token)
+    if not leased:
+        value = _local.get_stale(key)
+        if value is _MISSING:
+            value = _await_lease(func_name, arg_key, lease_key, limit)
+        if value is not _MISSING:
+            return value
+    try:
+        start = time.time()
+        value = loader()
+        _count(func_name, 'loads')
+        _count(func_name, 'load_secs', time.time() - start)
+        _store(func_name, arg_key, value, expire, limit)
+    finally:
+        if leased:
+            _remote.release(lease_key, token)
+    return value
+
+
+def _load(func_name, arg_key, loader, expire, limit=None):
+    """
+    _load--the value cached under (func_name, arg_key), with loader() run
+    by a single thread at a time. The threads that find it being loaded
+    are served the expired value if there is one, or wait for the result.
+    """
+    key = (func_name, arg_key)
+    with _flights_lock:
+        flight = _flights.setdefault(key, [threading.Lock(), 0])
+        flight[1] += 1
+    try:
+        if not flight[0].acquire(False):
+            value = _local.get_stale(key)
+            if value is not _MISSING:
+                return value
+            flight[0].acquire()
+        try:
+            value = _lookup(func_name, arg_key, limit)
+            if value is _MISSING:
+                value = _load_leased(func_name, arg_key, loader, expire, limit)
+            return value
+        finally:
+            flight[0].release()
+    finally:
+        with _flights_lock:
+            flight[1] -= 1
+            if not flight[1]:
+                del _flights[key]
+
+
+def get_value(name, key_args):
+    """
+    get_value--a copy of the value put_value stored under name and
+    key_args, or None if there is none (or key_args cannot be a key)
+    """
+    return get_values(name, [key_args])[0]
+
+
+def get_values(name, key_args_list):
+    """
+    get_values--get_value of each of key_args_list, with the ones not
+    cached in-process read from redis in a single round trip
+    """
+    try:
+        arg_keys = [_make_key(key_args, None) for key_args in key_args_list]
+    except (TypeError, ValueError):
+        return [None] * len(key_args_list)
+    values = _lookup_many(name, arg_keys)
+    for value in values:
+        _count(name, 'misses' if value is _MISSING else 'hits')
+    _publish_stats()
+    return [None if value is _MISSING else _fresh_copy(value)
+            for value in values]
+
+
+def put_value(name, key_args, value, expire=DEFAULT_EXPIRY,
+              fallback_expire=None):
+    """
+    put_value--cache value under name and key_args for expire seconds
+    (or fallback_expire, see cache_it)
+    """
+    put_values(name, [(key_args, value)], expire, fallback_expire)
+
+
+def put_values(name, items, expire=DEFAULT_EXPIRY, fallback_expire=None):
+    """
+    put_values--put_value of each of the (key_args, value) items, with
+    those for redis written in a single round trip
+    """
+    try:
+        items = [(_make_key(key_args, None), value)
+                 for key_args, value in items]
+    except (TypeError, ValueError):
+        return
+    _store_many(name, items, _ttl(expire, fallback_expire))
+
+
+def cache_it(limit=1024, expire=DEFAULT_EXPIRY, namespaces=None,
+             fallback_expire=None):
+    """
+    Two-tier replacement for redis_cache.cache_it_json on the
+    MongoMetricsDBI and MetricsMongoDBController methods.
+    Results are looked up in the in-process LRU first, then in redis;
+    values the configured codec cannot encode stay in-process only.
+    A missing result is loaded by one caller at a time (see _load).
+    :param limit: maximum number of entries of the method kept in-process
+    :param expire: time-to-live of an entry in seconds
+    :param namespaces: names of the (metrics) collections the method reads;
+                       bumping any of them invalidates its cached results
+    :param fallback_expire: time-to-live of an entry while there is no redis
+                            to share the namespace versions through, so
+                            that the bumps of the other processes go unseen
+                            (defaults to expire)
+    :return: decorated method
+    """
+    def decorator(function):
+        func_name = '{}.{}'.format(function.__module__, function.__name__)
+
+        @wraps(function)
+        def func(*args, **kwargs):
+            # the instance (args[0]) is not part of the key
+            try:
+                arg_key = _make_key(
+                    args[1:], kwargs,
+                    namespace_versions(namespaces) if namespaces else None)
+            except (TypeError, ValueError):
+                return function(*args, **kwargs)
+
+            value = _lookup(func_name, arg_key, limit)
+            if value is _MISSING:
+                _count(func_name, 'misses')
+                value = _load(func_name, arg_key,
+                              lambda: function(*args, **kwargs),
+                              _ttl(expire, fallback_expire), limit)
+            else:
+                _count(func_name, 'hits')
+            _publish_stats()
+            return _fresh_copy(value)
+        return func
+    return decorator
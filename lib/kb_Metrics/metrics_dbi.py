@@ -1,10 +1,16 @@
 import datetime
+from collections import OrderedDict
 from pymongo import MongoClient
 from pymongo import ASCENDING
-from pymongo.errors import BulkWriteError, WriteError, ConfigurationError
-from redis_cache import cache_it_json
-
-from kb_Metrics.Util import _convert_to_datetime
+from pymongo import UpdateOne
+from pymongo.errors import (BulkWriteError, WriteError, ConfigurationError,
+                            DuplicateKeyError)
+
+from kb_Metrics import metrics_cache
+from kb_Metrics.metrics_cache import cache_it
+from kb_Metrics.Util import (_convert_to_datetime, _day_start, _days,
+                             _hashable, _month_start, _next_month,
+                             _narrow_projection)
 from operator import itemgetter
 
 
@@ -24,6 +30,8 @@ class MongoMetricsDBI:
     _MT_USERS = 'users'  # 'test_users'#metrics.users
     _MT_DAILY_ACTIVITIES = 'daily_activities'
     _MT_NARRATIVES = 'narratives'  # metrics.narratives
+    _MT_CHECKPOINTS = 'update_checkpoints'  # metrics.update_checkpoints
+    _MT_WS_ROLLUP = 'monthly_user_ws_rollup'  # metrics.monthly_user_ws_rollup
 
     _USERPROFILES = 'profiles'  # user_profile_db.profiles
 
@@ -35,6 +43,54 @@ class MongoMetricsDBI:
     _WS_WORKSPACES = 'workspaces'  # workspace.workspaces
     _WS_WSOBJECTS = 'workspaceObjects'  # workspace.workspaceObjects
 
+    _BULK_BATCH_SIZE = 1000  # max number of write ops sent per bulk_write
+
+    # update_metrics phase -> cache namespace of the metrics collection it
+    # writes to; the entries cached off a collection are keyed on its version
+    _MT_CACHE_NS = {'users': 'metrics.' + _MT_USERS,
+                    'activities': 'metrics.' + _MT_DAILY_ACTIVITIES,
+                    'narratives': 'metrics.' + _MT_NARRATIVES,
+                    'ws_rollup': 'metrics.' + _MT_WS_ROLLUP}
+
+    # the checkpoint listing the months rolled up into _MT_WS_ROLLUP
+    _WS_ROLLUP_MONTHS = 'ws_rollup_months'
+
+    # the unique users of the days that are over are cached per day for
+    _CLOSED_DAY_EXPIRY = 60 * 60 * 24
+    _DAY_CACHE = 'kb_Metrics.metrics_dbi.closed_days'
+
+    # the monthly aggregations of the reports on workspace.workspaces:
+    # metric -> (monthly _id, [(count field, summand, its count in
+    # _MT_WS_ROLLUP)]). The per-user reports all group by the same _id, so
+    # their counts are aggregated together in one pass; a login is a
+    # workspace modified, so the logins are its numWs.
+    # The _id fields iterate in the order of the original pipelines' dict
+    # literals, which is the order {"$sort": {"_id": 1}} compares them in.
+    _WS_MONTH_AGGRS = {
+        'total_logins': ({"year": 1, "month": 1},
+                         [('year_mon_total_logins', 1, 'numWs')]),
+        'user_stats': ({"username": 1, "year": 1, "month": 1},
+                       [('numWs', 1, 'numWs'),
+                        ('numObjs', '$numObj', 'numObjs')])
+    }
+
+    # indexes backing the query and upsert paths on the metrics collections
+    _MT_INDEXES = {
+        _MT_USERS: [[('username', ASCENDING)],
+                    # the sort (and page) key of get_user_info
+                    [('signup_at', ASCENDING), ('username', ASCENDING)],
+                    [('kbase_staff', ASCENDING), ('signup_at', ASCENDING)]],
+        _MT_DAILY_ACTIVITIES: [[('_id.year_mod', ASCENDING),
+                                ('_id.month_mod', ASCENDING),
+                                ('_id.day_mod', ASCENDING)],
+                               [('_id.username', ASCENDING)]],
+        _MT_NARRATIVES: [[('object_id', ASCENDING),
+                          ('object_version', ASCENDING),
+                          ('workspace_id', ASCENDING)]],
+        _MT_WS_ROLLUP: [[('_id.year', ASCENDING), ('_id.month', ASCENDING)],
+                        [('ws_ids', ASCENDING)]]
+    }
+
     def __init__(self, mongo_host, mongo_dbs, mongo_user, mongo_psswd):
         self.mongo_clients = dict()
         self.metricsDBs = dict()
@@ -51,13 +107,64 @@ class MongoMetricsDBI:
                 raise ce
 
     # Begin functions to write to the metrics database...
+    def _bulk_write_batches(self, mt_coll, requests, batch_size=None):
+        """
+        _bulk_write_batches--send the write requests to mt_coll as unordered
+        bulk_write batches of at most batch_size operations.
+        Returns a tuple of (nModified, nUpserted) summed over all batches.
+        """
+        if not batch_size:
+            batch_size = MongoMetricsDBI._BULK_BATCH_SIZE
+
+        n_modified = 0
+        n_upserted = 0
+        batch = []
+        for req in requests:
+            batch.append(req)
+            if len(batch) >= batch_size:
+                n_mod, n_ups = self._bulk_write(mt_coll, batch)
+                n_modified += n_mod
+                n_upserted += n_ups
+                batch = []
+        if batch:
+            n_mod, n_ups = self._bulk_write(mt_coll, batch)
+            n_modified += n_mod
+            n_upserted += n_ups
+        return (n_modified, n_upserted)
+
+    def _bulk_write(self, mt_coll, batch, retry_dups=True):
+        """
+        _bulk_write--write one unordered batch and return its
+        (nModified, nUpserted). Two concurrent upserts on the same key can
+        fail with a duplicate key error (code=11000); those operations are
+        retried once, when they will match the now existing document.
+        """
+        try:
+            # get an instance of BulkWriteResult(bulk_api_result, acknowledged)
+            bulk_ret = mt_coll.bulk_write(batch, ordered=False)
+        except BulkWriteError as bwe:
+            w_errs = bwe.details['writeErrors']
+            panic = [x for x in w_errs if x['code'] != 11000]
+            if panic or not retry_dups:
+                print('BulkWriteError caught')
+                raise bwe
+            n_mod, n_ups = self._bulk_write(
+                mt_coll, [batch[x['index']] for x in w_errs],
+                retry_dups=False)
+            return (bwe.details['nModified'] + n_mod,
+                    bwe.details['nUpserted'] + n_ups)
+        return (bulk_ret.modified_count, bulk_ret.upserted_count)
+
+    def _user_upd_op(self, upd_data, kbstaff):
+        return {'$currentDate': {'recordLastUpdated': True},
+                '$set': upd_data,
+                '$setOnInsert': {'kbase_staff': kbstaff}}
+
     def update_user_records(self, upd_filter, upd_data, kbstaff):
         """
         update_user_records--update the user info in metrics.users
         """
-        upd_op = {'$currentDate': {'recordLastUpdated': True},
-                  '$set': upd_data,
-                  '$setOnInsert': {'kbase_staff': kbstaff}}
+        upd_op = self._user_upd_op(upd_data, kbstaff)
 
         # grab handle(s) to the database collection(s) targeted
         mt_users = self.metricsDBs['metrics'][MongoMetricsDBI._MT_USERS]
@@ -71,6 +178,22 @@ class MongoMetricsDBI:
             raise we
         return update_ret
 
+    def bulk_update_user_records(self, user_records, batch_size=None):
+        """
+        bulk_update_user_records--upsert the user info in metrics.users with
+        unordered bulk writes of batch_size operations each.
+        user_records is an iterable of (upd_filter, upd_data, kbstaff).
+        Returns a tuple of (nModified, nUpserted).
+        """
+        upd_reqs = (UpdateOne(upd_filter,
+                              self._user_upd_op(upd_data, kbstaff),
+                              upsert=True)
+                    for upd_filter, upd_data, kbstaff in user_records)
+
+        # grab handle(s) to the database collection(s) targeted
+        mt_users = self.metricsDBs['metrics'][MongoMetricsDBI._MT_USERS]
+        return self._bulk_write_batches(mt_users, upd_reqs, batch_size)
+
     def update_activity_records(self, upd_filter, upd_data):
         """
         update_activity_records--
@@ -91,6 +214,61 @@ class MongoMetricsDBI:
             raise e
         return update_ret
 
+    def bulk_update_activity_records(self, act_records, batch_size=None):
+        """
+        bulk_update_activity_records--upsert the daily activities in
+        metrics.daily_activities with unordered bulk writes of batch_size
+        operations each.
+        act_records is an iterable of (upd_filter, upd_data); the counters
+        of records sharing the same upd_filter are summed into one upsert.
+        Returns a tuple of (nModified, nUpserted).
+        """
+        merged = OrderedDict()
+        for upd_filter, upd_data in act_records:
+            f_key = _hashable(upd_filter)
+            if f_key in merged:
+                m_data = merged[f_key][1]
+                for k, v in upd_data.items():
+                    m_data[k] = m_data.get(k, 0) + v
+            else:
+                merged[f_key] = (upd_filter, dict(upd_data))
+
+        upd_reqs = (UpdateOne(upd_filter,
+                              {'$currentDate': {'recordLastUpdated': True},
+                               '$set': upd_data},
+                              upsert=True)
+                    for upd_filter, upd_data in merged.values())
+
+        # grab handle(s) to the database collection(s) targeted
+        mt_coll = self.metricsDBs['metrics'][
+            MongoMetricsDBI._MT_DAILY_ACTIVITIES]
+        return self._bulk_write_batches(mt_coll, upd_reqs, batch_size)
+
+    def delete_ownerless_activities(self, act_ids, batch_size=None):
+        """
+        delete_ownerless_activities--delete from metrics.daily_activities the
+        records of the workspace days of act_ids (the _ids of activities
+        with their usernames) that were keyed without a username, as all but
+        the first day of each workspace were before the owners got joined
+        into every activity; their counts are upserted under act_ids now.
+        Returns the number of records deleted.
+        """
+        if not batch_size:
+            batch_size = MongoMetricsDBI._BULK_BATCH_SIZE
+        day_fields = ('ws_id', 'year_mod', 'month_mod', 'day_mod')
+        day_conds = [dict(('_id.' + f, act_id[f]) for f in day_fields)
+                     for act_id in act_ids if 'username' in act_id]
+
+        # grab handle(s) to the database collection(s) targeted
+        mt_coll = self.metricsDBs['metrics'][
+            MongoMetricsDBI._MT_DAILY_ACTIVITIES]
+        n_deleted = 0
+        for i in range(0, len(day_conds), batch_size):
+            n_deleted += mt_coll.delete_many(
+                {'$or': day_conds[i:i + batch_size],
+                 '_id.username': {'$exists': False}}).deleted_count
+        return n_deleted
+
     def insert_activity_records(self, mt_docs):
         """
         Insert an iterable of user activity documents
@@ -108,8 +286,8 @@ class MongoMetricsDBI:
             insert_ret = mt_act.insert_many(mt_docs, ordered=False)
         except BulkWriteError as bwe:
             # skip duplicate key error (code=11000)
-            panic = filter(lambda x: x['code'] != 11000,
-                           bwe.details['writeErrors'])
+            panic = [x for x in bwe.details['writeErrors']
+                     if x['code'] != 11000]
             if panic:
                 print("really panic")
                 raise bwe
@@ -121,14 +299,18 @@ class MongoMetricsDBI:
                 len(insert_ret.inserted_ids)))
         return len(insert_ret.inserted_ids)
 
+    def _narrative_upd_op(self, upd_data):
+        # '$inc' sets access_count to 1 on insert (or on a record without it)
+        return {'$currentDate': {'recordLastUpdated': True},
+                '$setOnInsert': {'first_access': upd_data['last_saved_at']},
+                '$set': upd_data,
+                '$inc': {'access_count': 1}}
+
     def update_narrative_records(self, upd_filter, upd_data):
         """
         update_narrative_records--
         """
-        upd_op = {'$currentDate': {'recordLastUpdated': True},
-                  '$setOnInsert': {'first_access': upd_data['last_saved_at']},
-                  '$set': upd_data,
-                  '$inc': {'access_count': 1}}
+        upd_op = self._narrative_upd_op(upd_data)
 
         # grab handle(s) to the database collection(s) targeted
         mt_narrs = self.metricsDBs['metrics'][
@@ -141,31 +323,177 @@ class MongoMetricsDBI:
         except WriteError as we:
             print('WriteError caught')
             raise we
-        else:
-            # re-touch the newly inserted records
-            mt_narrs.update({'access_count': {'$exists': False}},
-                            {'$set': {'access_count': 1}},
-                            upsert=True, multi=True)
         return update_ret
-    # End functions to write to the metrics database
 
-    # Begin functions to query the metrics dbs...
-    def aggr_unique_users_per_day(self, minTime, maxTime, excluded_users=None):
+    def bulk_update_narrative_records(self, narr_records, batch_size=None):
         """
-        aggr_unique_users_per_day: as the function name says
+        bulk_update_narrative_records--upsert the narratives in
+        metrics.narratives with unordered bulk writes of batch_size
+        operations each.
+        narr_records is an iterable of (upd_filter, upd_data).
+        Returns a tuple of (nModified, nUpserted).
         """
-        # excluded_users has to be an array for '$nin'
-        if excluded_users is None:
-            excluded_users = []
+        upd_reqs = (UpdateOne(upd_filter,
+                              self._narrative_upd_op(upd_data),
+                              upsert=True)
+                    for upd_filter, upd_data in narr_records)
 
-        # Define the pipeline operations
-        minDate = _convert_to_datetime(minTime)
-        maxDate = _convert_to_datetime(maxTime)
+        # grab handle(s) to the database collection(s) targeted
+        mt_narrs = self.metricsDBs['metrics'][
+            MongoMetricsDBI._MT_NARRATIVES]
+        return self._bulk_write_batches(mt_narrs, upd_reqs, batch_size)
+
+    def update_ws_rollup(self, minTime, maxTime, batch_size=None):
+        """
+        update_ws_rollup--recount, from workspace.workspaces, the workspaces
+        (i.e., logins) and objects of each user in the whole months from the
+        one minTime falls in up to maxTime into metrics.monthly_user_ws_rollup
+        and record those months as rolled up. The month maxTime falls in is
+        left out unless it is over, as are the clones.
+        A workspace modified since the last rollup has moved out of the
+        month it was counted in, so the months holding (in their ws_ids)
+        any such workspace are recounted too.
+        Returns the number of rollup records written.
+        """
+        rolled_at = datetime.datetime.utcnow()
+        maxTime = min(maxTime, rolled_at)
+        months = []
+        month = _month_start(minTime)
+        while _next_month(month) <= maxTime + datetime.timedelta(milliseconds=1):
+            months.append(month)
+            month = _next_month(month)
 
+        kbworkspaces = self.metricsDBs['workspace'][
+            MongoMetricsDBI._WS_WORKSPACES]
+        mt_rollup = self.metricsDBs['metrics'][MongoMetricsDBI._MT_WS_ROLLUP]
+        mt_ckpts = self.metricsDBs['metrics'][MongoMetricsDBI._MT_CHECKPOINTS]
+        ckpt = mt_ckpts.find_one({'_id': MongoMetricsDBI._WS_ROLLUP_MONTHS})
+        if ckpt and ckpt.get('rolled_at'):
+            moved = [ws['ws'] for ws in kbworkspaces.find(
+                {'moddate': {'$gte': ckpt['rolled_at']}}, {'ws': 1})]
+            if moved:
+                for doc in mt_rollup.find({'ws_ids': {'$in': moved}},
+                                          {'_id': 1}):
+                    month = datetime.datetime(doc['_id']['year'],
+                                              doc['_id']['month'], 1)
+                    if month not in months:
+                        months.append(month)
+        if not months:
+            return 0
+        months.sort()
+
+        pipeline = [
+            {"$match": {"$or": [{"moddate": {"$gte": m,
+                                             "$lt": _next_month(m)}}
+                                for m in months],
+                        "cloning": {"$exists": False}}},
+            {"$group": {"_id": {"username": "$owner",
+                                "year": {"$year": "$moddate"},
+                                "month": {"$month": "$moddate"}},
+                        "numWs": {"$sum": 1},
+                        "numObjs": {"$sum": "$numObj"},
+                        "ws_ids": {"$push": "$ws"}}}
+        ]
+        # the _id fields in a fixed order, for the upserts to match
+        upd_reqs = (UpdateOne({'_id': OrderedDict(
+                                  (f, row['_id'][f])
+                                  for f in ('username', 'year', 'month'))},
+                              {'$set': {'numWs': row['numWs'],
+                                        'numObjs': row['numObjs'],
+                                        'ws_ids': row['ws_ids'],
+                                        'rolled_at': rolled_at}},
+                              upsert=True)
+                    for row in kbworkspaces.aggregate(pipeline))
+
+        up_dated, up_serted = self._bulk_write_batches(mt_rollup, upd_reqs,
+                                                       batch_size)
+        # the users without any workspace left in a recounted month
+        mt_rollup.delete_many(
+            {"$or": [{"_id.year": m.year, "_id.month": m.month}
+                     for m in months],
+             "rolled_at": {"$lt": rolled_at}})
+
+        mt_ckpts.update_one(
+            {'_id': MongoMetricsDBI._WS_ROLLUP_MONTHS},
+            {'$currentDate': {'recordLastUpdated': True},
+             '$set': {'rolled_at': rolled_at},
+             '$addToSet': {'months': {'$each': [
+                 '{:04d}-{:02d}'.format(m.year, m.month) for m in months]}}},
+            upsert=True)
+        return up_dated + up_serted
+
+    def advance_checkpoint(self, phase, high_water_mark):
+        """
+        advance_checkpoint--record high_water_mark (a datetime) as the point
+        up to which the given update_metrics phase has been processed.
+        '$max' makes the move atomic and forward-only, so a slower, older
+        run can never rewind a checkpoint set by a newer one.
+        """
+        upd_op = {'$currentDate': {'recordLastUpdated': True},
+                  '$max': {'high_water_mark': high_water_mark}}
+
+        # grab handle(s) to the database collection(s) targeted
+        mt_ckpts = self.metricsDBs['metrics'][MongoMetricsDBI._MT_CHECKPOINTS]
+        try:
+            # return an instance of UpdateResult(raw_result, acknowledged)
+            return mt_ckpts.update_one({'_id': phase}, upd_op, upsert=True)
+        except DuplicateKeyError:
+            # lost the race to insert the checkpoint, it exists now
+            return mt_ckpts.update_one({'_id': phase}, upd_op)
+
+    def save_resume_token(self, stream_id, resume_token):
+        """
+        save_resume_token--persist the resume token of a change stream
+        so that ingestion picks up where it left off after a restart
+        """
+        mt_ckpts = self.metricsDBs['metrics'][MongoMetricsDBI._MT_CHECKPOINTS]
+        return mt_ckpts.update_one(
+            {'_id': stream_id},
+            {'$currentDate': {'recordLastUpdated': True},
+             '$set': {'resume_token': resume_token}},
+            upsert=True)
+
+    def ensure_indexes(self):
+        """
+        ensure_indexes--build, in the background, the indexes declared in
+        _MT_INDEXES that are missing from the metrics collections.
+        An existing index over the same keys counts whatever its name.
+        Returns the list of 'collection.index_name' created.
+        """
+        created = []
+        for coll_name, idx_keys in sorted(MongoMetricsDBI._MT_INDEXES.items()):
+            # grab handle(s) to the database collection(s) targeted
+            mt_coll = self.metricsDBs['metrics'][coll_name]
+            existing = [idx['key']
+                        for idx in mt_coll.index_information().values()]
+            for keys in idx_keys:
+                if keys not in existing:
+                    idx_name = mt_coll.create_index(keys, background=True)
+                    created.append('{}.{}'.format(coll_name, idx_name))
+        return created
+    # End functions to write to the metrics database
+
+    # Begin functions to query the metrics dbs...
+    def _unique_users_day_rows(self, minDate, maxDate, excluded_users,
+                               from_day=None):
+        """
+        _unique_users_day_rows: the aggr_unique_users_per_day counts, each
+        still with its {year_mod, month_mod, day_mod} _id, of the days in the
+        years of minDate through maxDate (and on or after from_day if given)
+        """
         match_filter = {"_id.year_mod":
                         {"$gte": minDate.year, "$lte": maxDate.year},
                         "obj_numModified": {"$gt": 0}}
 
+        if from_day is not None:
+            match_filter["$or"] = [
+                {"_id.year_mod": from_day.year,
+                 "_id.month_mod": from_day.month,
+                 "_id.day_mod": {"$gte": from_day.day}},
+                {"_id.year_mod": from_day.year,
+                 "_id.month_mod": {"$gt": from_day.month}},
+                {"_id.year_mod": {"$gt": from_day.year}}]
+
         if excluded_users:
             match_filter['_id.username'] = {"$nin": excluded_users}
 
@@ -186,13 +514,66 @@ class MongoMetricsDBI:
                                               "$_id.month_mod", 0, -1]}, '-',
                                           {"$substr": [
                                               "$_id.day_mod", 0, -1]}]},
-                          "numOfUsers":1, "_id":0}}]
+                          "numOfUsers":1}}]
 
         # grab handle(s) to the db collection
         mt_acts = self.metricsDBs['metrics'][MongoMetricsDBI._MT_DAILY_ACTIVITIES]
-        return sorted(list(mt_acts.aggregate(pipeline)), key=itemgetter('yyyy-mm-dd'))
+        return list(mt_acts.aggregate(pipeline))
 
-    def get_user_info(self, userIds, minTime, maxTime, exclude_kbstaff=False):
+    def aggr_unique_users_per_day(self, minTime, maxTime, excluded_users=None):
+        """
+        aggr_unique_users_per_day: as the function name says.
+        The counts of the days that are over come from the per-day cache,
+        only the days from the first one not cached on are aggregated.
+        """
+        # excluded_users has to be an array for '$nin'
+        if excluded_users is None:
+            excluded_users = []
+
+        minDate = _convert_to_datetime(minTime)
+        maxDate = _convert_to_datetime(maxTime)
+        first_day = datetime.datetime(minDate.year, 1, 1)
+        end_day = min(datetime.datetime(maxDate.year + 1, 1, 1),
+                      _day_start(datetime.datetime.utcnow()))
+
+        key_args = ['unique_users_per_day', sorted(excluded_users),
+                    metrics_cache.namespace_versions(
+                        [MongoMetricsDBI._MT_CACHE_NS['activities']])]
+        cached, from_day = self._cached_days(key_args, first_day, end_day)
+
+        day_rows = self._unique_users_day_rows(
+            minDate, maxDate, excluded_users,
+            from_day if from_day > first_day else None)
+        fresh = {}
+        for row in day_rows:
+            day = datetime.datetime(row['_id']['year_mod'],
+                                    row['_id']['month_mod'],
+                                    row['_id']['day_mod'])
+            fresh.setdefault(day, []).append(
+                {'yyyy-mm-dd': row['yyyy-mm-dd'],
+                 'numOfUsers': row['numOfUsers']})
+        self._cache_closed_days(key_args, from_day, end_day, fresh)
+
+        ret = cached + [row for rows in fresh.values() for row in rows]
+        return sorted(ret, key=itemgetter('yyyy-mm-dd'))
+
+    @cache_it(limit=1024, expire=60 * 60 * 7 * 24,
+              namespaces=[_MT_CACHE_NS['users']], fallback_expire=60 * 60 / 2)
+    def get_user_info(self, userIds, minTime, maxTime, exclude_kbstaff=False,
+                      fields=None):
+        return list(self.iter_user_info(userIds, minTime, maxTime,
+                                        exclude_kbstaff, fields=fields))
+
+    def iter_user_info(self, userIds, minTime, maxTime, exclude_kbstaff=False,
+                       after=None, limit=0, fields=None):
+        """
+        iter_user_info--get_user_info as a cursor, sorted by (signup_at,
+        username) on the server along their index, to stream the users from.
+        Paged, it returns up to limit users (0 for all) from the one after
+        the (signup_at, username) given in after, with a range query on that
+        index, so that a page costs the same however deep it is.
+        Given fields, only those fields of the users are read.
+        """
         qry_filter = {}
 
         user_filter = {}
@@ -212,6 +593,11 @@ class MongoMetricsDBI:
         if signup_time_filter:
             qry_filter['signup_at'] = signup_time_filter
 
+        if after is not None:
+            qry_filter['$or'] = [{'signup_at': {'$gt': after[0]}},
+                                 {'signup_at': after[0],
+                                  'username': {'$gt': after[1]}}]
+
         projection = {
             '_id': 0,
             'username': 1,
@@ -225,7 +611,91 @@ class MongoMetricsDBI:
 
         # grab handle(s) to the database collection
         mt_users = self.metricsDBs['metrics'][MongoMetricsDBI._MT_USERS]
-        return sorted(list(mt_users.find(qry_filter, projection)), key=itemgetter('signup_at'))
+        return mt_users.find(
+            qry_filter, _narrow_projection(projection, fields)).sort(
+            [('signup_at', ASCENDING), ('username', ASCENDING)]).limit(limit)
+
+    def get_checkpoint(self, phase):
+        """
+        get_checkpoint--the high water mark (a datetime) of the given
+        update_metrics phase, or None if the phase has never completed
+        """
+        mt_ckpts = self.metricsDBs['metrics'][MongoMetricsDBI._MT_CHECKPOINTS]
+        ckpt = mt_ckpts.find_one({'_id': phase})
+        return ckpt['high_water_mark'] if ckpt else None
+
+    def get_resume_token(self, stream_id):
+        mt_ckpts = self.metricsDBs['metrics'][MongoMetricsDBI._MT_CHECKPOINTS]
+        ckpt = mt_ckpts.find_one({'_id': stream_id})
+        return ckpt.get('resume_token') if ckpt else None
+
+    def get_rollup_months(self):
+        """
+        get_rollup_months--the set of (year, month) rolled up into
+        metrics.monthly_user_ws_rollup
+        """
+        mt_ckpts = self.metricsDBs['metrics'][MongoMetricsDBI._MT_CHECKPOINTS]
+        ckpt = mt_ckpts.find_one({'_id': MongoMetricsDBI._WS_ROLLUP_MONTHS})
+        return set(tuple(int(p) for p in m.split('-'))
+                   for m in (ckpt or {}).get('months', []))
+
+    def _rollup_rows(self, metric, userIds, excluded_users, months):
+        """
+        _rollup_rows: the monthly counts of metric in the (year, month) months
+        from metrics.monthly_user_ws_rollup, sorted by the monthly _id
+        """
+        month_id, counts = MongoMetricsDBI._WS_MONTH_AGGRS[metric]
+
+        match_cond = {"$or": [{"_id.year": y, "_id.month": m}
+                              for y, m in months]}
+        owner_cond = {}
+        if userIds:
+            owner_cond["$in"] = userIds
+        if excluded_users:
+            owner_cond["$nin"] = excluded_users
+        if owner_cond:
+            match_cond["_id.username"] = owner_cond
+
+        group = {"_id": dict((f, "$_id." + f) for f in month_id)}
+        for count_field, _, rollup_field in counts:
+            group[count_field] = {"$sum": "$" + rollup_field}
+
+        # Define the pipeline operations
+        pipeline = [
+            {"$match": match_cond},
+            {"$group": group},
+            {"$sort": {"_id": ASCENDING}}
+        ]
+
+        # grab handle(s) to the database collection(s) targeted
+        mt_rollup = self.metricsDBs['metrics'][MongoMetricsDBI._MT_WS_ROLLUP]
+        return list(mt_rollup.aggregate(pipeline))
+
+    def _cached_days(self, key_args, first_day, end_day):
+        """
+        _cached_days: the rows cached for the consecutive days from first_day
+        (up to end_day) and the first of those days not cached
+        """
+        days = list(_days(first_day, end_day))
+        rows = []
+        for day, day_rows in zip(days, metrics_cache.get_values(
+                MongoMetricsDBI._DAY_CACHE,
+                [key_args + [day] for day in days])):
+            if day_rows is None:
+                return rows, day
+            rows.extend(day_rows)
+        return rows, end_day
+
+    def _cache_closed_days(self, key_args, first_day, end_day, rows_by_day):
+        """
+        _cache_closed_days: cache the rows of each of the days from first_day
+        up to end_day, an empty list for the days without any
+        """
+        metrics_cache.put_values(
+            MongoMetricsDBI._DAY_CACHE,
+            [(key_args + [day], rows_by_day.get(day, []))
+             for day in _days(first_day, end_day)],
+            MongoMetricsDBI._CLOSED_DAY_EXPIRY, fallback_expire=60 * 60 / 2)
 
     # End functions to query the metrics db
 
@@ -238,6 +708,7 @@ class MongoMetricsDBI:
             {"$project": {"year_mod": {"$year": "$moddate"},
                           "month_mod": {"$month": "$moddate"},
                           "date_mod": {"$dayOfMonth": "$moddate"},
+                          "moddate": 1,
                           "obj_name": "$name",
                           "obj_id": "$id",
                           "obj_version": "$numver",
@@ -246,16 +717,23 @@ class MongoMetricsDBI:
                                 "year_mod": "$year_mod",
                                 "month_mod": "$month_mod",
                                 "day_mod": "$date_mod"},
-                        "obj_numModified": {"$sum": 1}}}]
+                        "obj_numModified": {"$sum": 1},
+                        "last_moddate": {"$max": "$moddate"}}}]
 
         return sorted(
             list(self.metricsDBs['workspace'][MongoMetricsDBI._WS_WSOBJECTS].aggregate(pipeline)),
             key=itemgetter('_id'))
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
-    def list_ws_owners(self):
+    @cache_it(limit=1024, expire=60 * 60 / 2)
+    def list_ws_owners(self, ws_list=None):
+        """
+        list_ws_owners--the owners of all workspaces, or of only those
+        in ws_list if given
+        """
         # Define the pipeline operations
         match_filter = {"cloning": {"$exists": False}}
+        if ws_list:
+            match_filter["ws"] = {"$in": ws_list}
         pipeline = [
             {"$match": match_filter},
             {"$project": {"username": "$owner",
@@ -266,7 +744,7 @@ class MongoMetricsDBI:
             MongoMetricsDBI._WS_WORKSPACES]
         return list(kbworkspaces.aggregate(pipeline))
 
-    @cache_it_json(limit=1024, expire=60 * 60 * 1)
+    @cache_it(limit=1024, expire=60 * 60 * 1)
     def list_narrative_info(self, wsid_list=None, owner_list=None, excluded_users=None):
         """
         list_narrative_info--retrieve the name/ws_id/owner of narratives
@@ -305,7 +783,7 @@ class MongoMetricsDBI:
             MongoMetricsDBI._WS_WORKSPACES]
         return list(kbworkspaces.aggregate(pipeline))
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
+    @cache_it(limit=1024, expire=60 * 60 / 2)
     def list_ws_narratives(self, minT=0, maxT=0, include_del=False):
         match_filter = {"meta": {"$elemMatch":
                                  {"$or":
@@ -342,21 +820,24 @@ class MongoMetricsDBI:
         kbworkspaces = self.metricsDBs['workspace'][MongoMetricsDBI._WS_WORKSPACES]
         return list(kbworkspaces.aggregate(pipeline))
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
+    @cache_it(limit=1024, expire=60 * 60 / 2)
     def list_user_objects_from_wsobjs(self, minTime, maxTime, ws_list=None):
         """
-        list_user_objects_from_wsobjs:
+        list_user_objects_from_wsobjs: the objects saved in the time range,
+        or, without minTime, up to maxTime
         """
         # has to be an array for '$in' and/or $nin'
         if ws_list is None:
             ws_list = []
 
-        minTime = datetime.datetime.fromtimestamp(minTime / 1000.0)
         maxTime = datetime.datetime.fromtimestamp(maxTime / 1000.0)
+        time_range = {"$lte": maxTime}
+        if minTime:
+            time_range["$gte"] = datetime.datetime.fromtimestamp(
+                minTime / 1000.0)
 
         # Define the pipeline operations
-        match_filter = {"del": False,
-                        "moddate": {"$gte": minTime, "$lte": maxTime}}
+        match_filter = {"del": False, "moddate": time_range}
         if ws_list:
             match_filter["ws"] = {"$in": ws_list}
 
@@ -373,7 +854,7 @@ class MongoMetricsDBI:
             MongoMetricsDBI._WS_WSOBJECTS]
         return list(kbwsobjs.aggregate(pipeline))
 
-    @cache_it_json(limit=1024, expire=60 * 60 * 24)
+    @cache_it(limit=1024, expire=60 * 60 * 24)
     def list_ws_firstAccess(self, minTime, maxTime, ws_list=None):
         """
         list_ws_firstAccess--retrieve the ws_ids and first access month (yyyy-mm)
@@ -428,7 +909,7 @@ class MongoMetricsDBI:
         m_cursor = kbwsobjs.aggregate(pipeline)
         return list(m_cursor)
 
-    @cache_it_json(limit=1024, expire=60 * 60 * 24)
+    @cache_it(limit=1024, expire=60 * 60 * 24)
     def list_ws_lastAccess(self, minTime, maxTime, ws_list=None):
         """
         list_ws_lastAccess--retrieve the ws_ids and last access month (yyyy-mm)
@@ -467,7 +948,8 @@ class MongoMetricsDBI:
         m_cursor = kbwsobjs.aggregate(pipeline)
         return list(m_cursor)
 
-    @cache_it_json(limit=1024, expire=60 * 60 * 7 * 24)
+    @cache_it(limit=1024, expire=60 * 60 * 7 * 24,
+              namespaces=[_MT_CACHE_NS['users']], fallback_expire=60 * 60 / 2)
     def list_kbstaff_usernames(self):
         kbstaff_filter = {'kbase_staff': {"$in": [True, 1]}}
         projection = {'_id': 0, 'username': 1}
@@ -476,8 +958,16 @@ class MongoMetricsDBI:
 
         return list(kbusers.find(kbstaff_filter, projection))
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
+    @cache_it(limit=1024, expire=60 * 60 / 2)
     def list_exec_tasks(self, minTime, maxTime):
+        return list(self.iter_exec_tasks(minTime, maxTime))
+
+    def iter_exec_tasks(self, minTime, maxTime, ujs_job_ids=None):
+        """
+        iter_exec_tasks--list_exec_tasks as a cursor, sorted by
+        creation_time on the server; of only the tasks of the given
+        ujs_job_ids if any
+        """
         qry_filter = {}
 
         creation_time_filter = {}
@@ -487,6 +977,8 @@ class MongoMetricsDBI:
             creation_time_filter['$lte'] = maxTime
         if creation_time_filter:
             qry_filter['creation_time'] = creation_time_filter
+        if ujs_job_ids is not None:
+            qry_filter['ujs_job_id'] = {'$in': ujs_job_ids}
 
         projection = {
             '_id': 0,
@@ -497,18 +989,38 @@ class MongoMetricsDBI:
         }
         # grab handle(s) to the database collection
         kbtasks = self.metricsDBs['exec_engine'][MongoMetricsDBI._EXEC_TASKS]
-        return sorted(list(kbtasks.find(qry_filter, projection)),
-                      key=itemgetter('creation_time'))
+        return kbtasks.find(qry_filter, projection).sort('creation_time',
+                                                         ASCENDING)
+
+    @cache_it(limit=1024, expire=60 * 60 / 2)
+    def aggr_user_details(self, userIds, minTime, maxTime, excluded_users=None,
+                          include_logins=False):
+        """
+        aggr_user_details: users created in the time range, or, with
+        include_logins, users either created or logged in during that range
+        """
+        return list(self.iter_user_details(userIds, minTime, maxTime,
+                                           excluded_users, include_logins))
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
-    def aggr_user_details(self, userIds, minTime, maxTime, excluded_users=None):
+    def iter_user_details(self, userIds, minTime, maxTime, excluded_users=None,
+                          include_logins=False):
+        """
+        iter_user_details: aggr_user_details as a cursor, sorted by signup
+        time on the server; the sort right after the $match can use an index
+        on the creation time of auth2.users
+        """
         # excluded_users has to be an array for '$nin'
         if excluded_users is None:
             excluded_users = []
 
         # Define the pipeline operations
-        match_cond = {"create": {"$gte": _convert_to_datetime(minTime),
-                                 "$lte": _convert_to_datetime(maxTime)}}
+        time_range = {"$gte": _convert_to_datetime(minTime),
+                      "$lte": _convert_to_datetime(maxTime)}
+        if include_logins:
+            match_cond = {"$or": [{"create": time_range},
+                                  {"login": time_range}]}
+        else:
+            match_cond = {"create": time_range}
         if not userIds:
             match_cond["user"] = {"$nin": excluded_users}
         else:
@@ -516,6 +1028,7 @@ class MongoMetricsDBI:
 
         pipeline = [
             {"$match": match_cond},
+            {"$sort": {"create": ASCENDING}},
             {"$project": {"username": "$user", "email": "$email",
                           "full_name": "$display",
                           "signup_at": "$create",
@@ -524,13 +1037,23 @@ class MongoMetricsDBI:
 
         # grab handle(s) to the db collection
         kbusers = self.metricsDBs['auth2'][MongoMetricsDBI._AUTH2_USERS]
-        return sorted(list(kbusers.aggregate(pipeline)), key=itemgetter('signup_at'))
+        return kbusers.aggregate(pipeline)
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
+    @cache_it(limit=1024, expire=60 * 60 * 7 * 24,
+              namespaces=[_MT_CACHE_NS['users']], fallback_expire=60 * 60 / 2)
     def aggr_signup_retn_users(self, userIds, minTime, maxTime, excluded_users=None):
         """
         aggr_signup_retn_users: count signup and returning users
         """
+        return list(self.iter_signup_retn_users(userIds, minTime, maxTime,
+                                                excluded_users))
+
+    def iter_signup_retn_users(self, userIds, minTime, maxTime,
+                               excluded_users=None):
+        """
+        iter_signup_retn_users: aggr_signup_retn_users as a cursor, sorted
+        by _id on the server
+        """
         # excluded_users has to be an array for '$nin'
         if excluded_users is None:
             excluded_users = []
@@ -560,14 +1083,27 @@ class MongoMetricsDBI:
             {"$group": {"_id": {"year": "$year_signup",
                                 "month": "$month_signup"},
                         "user_signups": {"$sum": 1},
-                        "returning_user_count": {"$sum": "$returning"}}}]
+                        "returning_user_count": {"$sum": "$returning"}}},
+            {"$sort": {"_id": ASCENDING}}]
 
         # grab handle(s) to the db collection
         mtusers = self.metricsDBs['metrics'][MongoMetricsDBI._MT_USERS]
-        return sorted(list(mtusers.aggregate(pipeline)), key=itemgetter('_id'))
+        return mtusers.aggregate(pipeline)
+
+    @cache_it(limit=1024, expire=60 * 60 / 2)
+    def list_ujs_results(self, userIds, minTime, maxTime, fields=None):
+        return list(self.iter_ujs_results(userIds, minTime, maxTime,
+                                          fields=fields))
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
-    def list_ujs_results(self, userIds, minTime, maxTime):
+    def iter_ujs_results(self, userIds, minTime, maxTime, after=None, limit=0,
+                         fields=None):
+        """
+        iter_ujs_results--list_ujs_results as a cursor. Paged, it returns up
+        to limit jobs (0 for all) in the order of (created, _id) from the one
+        after the (created, _id) given in after, with a range query rather
+        than skipping the previous pages.
+        Given fields, only those fields (and the _id) of the jobs are read.
+        """
         qry_filter = {}
 
         user_filter = {}
@@ -585,6 +1121,10 @@ class MongoMetricsDBI:
             qry_filter['created'] = created_filter
         # qry_filter['desc'] = {'$exists': True}
         # qry_filter['status'] = {'$exists': True}
+        if after is not None:
+            qry_filter['$or'] = [{'created': {'$gt': after[0]}},
+                                 {'created': after[0],
+                                  '_id': {'$gt': after[1]}}]
 
         projection = {
             'user': 1,
@@ -601,124 +1141,154 @@ class MongoMetricsDBI:
 
         # grab handle(s) to the database collections needed
         jobstate = self.metricsDBs['userjobstate'][MongoMetricsDBI._JOBSTATE]
-        return list(jobstate.find(qry_filter, projection))
-
-    # BEGIN putting the deleted functions back for reporting
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
-    def aggr_user_logins_from_ws(self, userIds, minTime, maxTime):
-
-        match_filter = {"moddate": {"$gte": minTime, "$lte": maxTime}}
-        match_filter["cloning"] = {"$exists": False}
-
-        if userIds:
-            match_filter["owner"] = {"$in": userIds}
-
-        # Define the pipeline operations
+        ujs_cur = jobstate.find(qry_filter,
+                                _narrow_projection(projection, fields))
+        if after is not None or limit:
+            # with the limit, an unindexed sort keeps only the page in memory
+            ujs_cur = ujs_cur.sort([('created', ASCENDING),
+                                    ('_id', ASCENDING)]).limit(limit)
+        return ujs_cur
+
+    def watch_ws_changes(self, resume_token=None, max_await_ms=1000):
+        """
+        watch_ws_changes--open a change stream on the workspace db that
+        reports the inserts/updates of workspaceObjects and workspaces with
+        their moddate; the workspace db has to be served by a replica set
+        (of MongoDB 4.0 or later, for a change stream on a whole db).
+        """
         pipeline = [
-            {"$match": match_filter},
-            {"$project": {"year": {"$year": "$moddate"},
-                          "month": {"$month": "$moddate"},
-                          "date": {"$dayOfMonth": "$moddate"},
-                          "owner": 1, "ws_id": "$ws", "_id": 0}},
-            {"$group": {"_id": {"username": "$owner",
-                                "year": "$year",
-                                "month": "$month"},
-                        "year_mon_user_logins": {"$sum": 1}}},
-            {"$sort": {"_id": ASCENDING}}
+            {"$match": {"ns.coll": {"$in": [MongoMetricsDBI._WS_WSOBJECTS,
+                                            MongoMetricsDBI._WS_WORKSPACES]},
+                        "operationType": {"$in": ["insert", "update",
+                                                  "replace"]}}},
+            {"$project": {"ns": 1, "fullDocument.moddate": 1}}
         ]
+        return self.metricsDBs['workspace'].watch(
+            pipeline, full_document='updateLookup',
+            resume_after=resume_token, max_await_time_ms=max_await_ms)
 
-        # grab handle(s) to the database collection
-        kbworkspaces = self.metricsDBs['workspace'][MongoMetricsDBI._WS_WORKSPACES]
-        return list(kbworkspaces.aggregate(pipeline))
-
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
-    def aggr_total_logins(self, userIds, minTime, maxTime, excluded_users=None):
-        # excluded_users has to be an array for '$nin'
-        if excluded_users is None:
-            excluded_users = []
+    # BEGIN putting the deleted functions back for reporting
+    def _ws_month_rows(self, metric, userIds, excluded_users, time_ranges):
+        """
+        _ws_month_rows: the monthly counts of metric over the (list of)
+        moddate time_ranges, sorted by the monthly _id
+        """
+        month_id, counts = MongoMetricsDBI._WS_MONTH_AGGRS[metric]
 
-        match_cond = {"moddate": {"$gte": minTime, "$lte": maxTime}}
+        if len(time_ranges) == 1:
+            match_cond = {"moddate": time_ranges[0]}
+        else:
+            match_cond = {"$or": [{"moddate": t_rng} for t_rng in time_ranges]}
         match_cond["cloning"] = {"$exists": False}
 
-        if not userIds:
-            match_cond["owner"] = {"$nin": excluded_users}
-        else:
-            match_cond["owner"] = {"$in": userIds, "$nin": excluded_users}
+        owner_cond = {}
+        if userIds:
+            owner_cond["$in"] = userIds
+        if excluded_users:
+            owner_cond["$nin"] = excluded_users
+        if owner_cond:
+            match_cond["owner"] = owner_cond
+
+        id_fields = {"username": "$owner",
+                     "year": {"$year": "$moddate"},
+                     "month": {"$month": "$moddate"}}
+        group = {"_id": dict((f, id_fields[f]) for f in month_id)}
+        for count_field, summand, _ in counts:
+            group[count_field] = {"$sum": summand}
 
         # Define the pipeline operations
         pipeline = [
             {"$match": match_cond},
-            {"$project": {"year": {"$year": "$moddate"},
-                          "month": {"$month": "$moddate"},
-                          "date": {"$dayOfMonth": "$moddate"},
-                          "owner": 1, "ws_id": "$ws", "_id": 0}},
-            {"$group": {"_id": {"username": "$owner",
-                                "year": "$year",
-                                "month": "$month"},
-                        "count_user_ws_logins": {"$sum": 1}}},
-            {"$group": {"_id": {"year": "$_id.year",
-                                "month": "$_id.month"},
-                        "year_mon_total_logins": {
-                            "$sum": "$count_user_ws_logins"}}},
+            {"$group": group},
             {"$sort": {"_id": ASCENDING}}
         ]
+
         # grab handle(s) to the database collection
         kbworkspaces = self.metricsDBs['workspace'][MongoMetricsDBI._WS_WORKSPACES]
         return list(kbworkspaces.aggregate(pipeline))
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
-    def aggr_user_numObjs(self, userIds, minTime, maxTime):
+    def _aggr_ws_monthly(self, metric, userIds, minTime, maxTime,
+                         excluded_users=None):
+        """
+        _aggr_ws_monthly: the monthly counts of metric over [minTime, maxTime].
+        The whole months in the range that are rolled up come from
+        metrics.monthly_user_ws_rollup; the rest of the range (its partial
+        first and last months and the months not rolled up) is counted
+        on workspace.workspaces, all in one aggregation.
+        """
+        one_ms = datetime.timedelta(milliseconds=1)
+        rolled_up = self.get_rollup_months()
+        months = []
+        time_ranges = []
+        range_start = minTime
+        month = _month_start(minTime)
+        while month <= maxTime:
+            next_month = _next_month(month)
+            if month >= minTime and next_month <= maxTime + one_ms and \
+                    (month.year, month.month) in rolled_up:
+                if range_start < month:
+                    time_ranges.append({"$gte": range_start,
+                                        "$lte": month - one_ms})
+                months.append((month.year, month.month))
+                range_start = next_month
+            month = next_month
+        if range_start <= maxTime:
+            time_ranges.append({"$gte": range_start, "$lte": maxTime})
+
+        ws_rows = []
+        if time_ranges:
+            ws_rows = self._ws_month_rows(metric, userIds, excluded_users,
+                                          time_ranges)
+        if not months:
+            return ws_rows
+        rollup_rows = self._rollup_rows(metric, userIds, excluded_users,
+                                        months)
+        if not ws_rows:
+            return rollup_rows
+
+        # a month is either rolled up or counted on the workspaces, so the
+        # two sorted lists only need merging
+        month_id = MongoMetricsDBI._WS_MONTH_AGGRS[metric][0]
+        return sorted(ws_rows + rollup_rows,
+                      key=lambda row: [(row['_id'].get(f) is not None,
+                                        row['_id'].get(f)) for f in month_id])
+
+    @cache_it(limit=1024, expire=60 * 60 / 2,
+              namespaces=[_MT_CACHE_NS['ws_rollup']])
+    def aggr_user_ws_stats(self, userIds, minTime, maxTime):
+        """
+        aggr_user_ws_stats--the monthly logins, number of objects and number
+        of workspaces of each user, all counted in one pass: the union of
+        the rows of aggr_user_logins_from_ws, aggr_user_numObjs and
+        aggr_user_ws, which are served from its cached result
+        """
+        return [{'_id': row['_id'],
+                 'year_mon_user_logins': row['numWs'],
+                 'count_user_numObjs': row['numObjs'],
+                 'count_user_ws': row['numWs']}
+                for row in self._aggr_ws_monthly('user_stats', userIds,
+                                                 minTime, maxTime)]
 
-        match_filter = {"moddate": {"$gte": minTime, "$lte": maxTime}}
-        match_filter["cloning"] = {"$exists": False}
+    def _user_ws_stat(self, count_field, userIds, minTime, maxTime):
+        return [{'_id': row['_id'], count_field: row[count_field]}
+                for row in self.aggr_user_ws_stats(userIds, minTime, maxTime)]
 
-        if userIds:
-            match_filter["owner"] = {"$in": userIds}
+    def aggr_user_logins_from_ws(self, userIds, minTime, maxTime):
+        return self._user_ws_stat('year_mon_user_logins', userIds,
+                                  minTime, maxTime)
 
-        # Define the pipeline operations
-        pipeline = [
-            {"$match": match_filter},
-            {"$project": {"year": {"$year": "$moddate"},
-                          "month": {"$month": "$moddate"},
-                          "date": {"$dayOfMonth": "$moddate"},
-                          "owner": 1, "ws_id": "$ws",
-                          "numObj": 1, "_id": 0}},
-            {"$group": {"_id": {"username": "$owner",
-                                "year": "$year",
-                                "month": "$month"},
-                        "count_user_numObjs": {"$sum": "$numObj"}}},
-            {"$sort": {"_id": ASCENDING}}
-        ]
+    @cache_it(limit=1024, expire=60 * 60 / 2,
+              namespaces=[_MT_CACHE_NS['ws_rollup']])
+    def aggr_total_logins(self, userIds, minTime, maxTime, excluded_users=None):
+        return self._aggr_ws_monthly('total_logins', userIds, minTime, maxTime,
+                                     excluded_users)
 
-        # grab handle(s) to the database collection
-        kbworkspaces = self.metricsDBs['workspace'][MongoMetricsDBI._WS_WORKSPACES]
-        return list(kbworkspaces.aggregate(pipeline))
+    def aggr_user_numObjs(self, userIds, minTime, maxTime):
+        return self._user_ws_stat('count_user_numObjs', userIds,
+                                  minTime, maxTime)
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
     def aggr_user_ws(self, userIds, minTime, maxTime):
-        match_filter = {"moddate": {"$gte": minTime, "$lte": maxTime}}
-        match_filter["cloning"] = {"$exists": False}
-
-        if userIds:
-            match_filter["owner"] = {"$in": userIds}
-
-        # Define the pipeline operations
-        pipeline = [
-            {"$match": match_filter},
-            {"$project": {"year": {"$year": "$moddate"},
-                          "month": {"$month": "$moddate"},
-                          "date": {"$dayOfMonth": "$moddate"},
-                          "owner": 1, "ws_id": "$ws", "_id": 0}},
-            {"$group": {"_id": {"username": "$owner",
-                                "year": "$year",
-                                "month": "$month"},
-                        "count_user_ws": {"$sum": 1}}},
-            {"$sort": {"_id": ASCENDING}}
-        ]
-
-        # grab handle(s) to the database collection
-        kbworkspaces = self.metricsDBs['workspace'][MongoMetricsDBI._WS_WORKSPACES]
-        return list(kbworkspaces.aggregate(pipeline))
+        return self._user_ws_stat('count_user_ws', userIds, minTime, maxTime)
 
     # END putting the deleted functions back for reporting
 
@@ -0,0 +1,141 @@
+import signal
+import sys
+import time
+import datetime
+from os import environ
+try:
+    from ConfigParser import ConfigParser  # py2
+except ImportError:
+    from configparser import ConfigParser  # py3
+
+from kb_Metrics.metricsdb_controller import MetricsMongoDBController, log
+
+
+class WorkspaceChangeIngester:
+    '''
+    WorkspaceChangeIngester--tails the change stream of workspace.workspaceObjects
+    and workspace.workspaces and keeps metrics.daily_activities and
+    metrics.narratives current with micro-batched upserts.
+    The stream's resume token is stored in metrics.update_checkpoints.
+    '''
+
+    _STREAM_ID = 'workspace_change_stream'
+
+    def __init__(self, config):
+        self.mdb_controller = MetricsMongoDBController(config)
+        self.metrics_dbi = self.mdb_controller.metrics_dbi
+
+        # a micro-batch is flushed when it is full or old enough
+        self.batch_size = int(config.get('ingest-batch-size', 500))
+        self.batch_secs = float(config.get('ingest-batch-seconds', 5))
+        self.running = False
+
+    def _moddate_range(self, changes, coll):
+        moddates = [c['fullDocument']['moddate'] for c in changes
+                    if c['ns']['coll'] == coll and c.get('fullDocument') and
+                    isinstance(c['fullDocument'].get('moddate'),
+                               datetime.datetime)]
+        if not moddates:
+            return None
+        return (min(moddates), max(moddates))
+
+    def _flush(self, changes):
+        """
+        _flush--recompute the activities and narratives touched by a batch
+        of change events; returns (activity_updates, narrative_updates)
+        """
+        act_upds = 0
+        narr_upds = 0
+        obj_range = self._moddate_range(changes, 'workspaceObjects')
+        if obj_range:
+            # per-day counts are $set, so recount from the start of the day
+            start_time = datetime.datetime.combine(obj_range[0].date(),
+                                                   datetime.time())
+            act_upds = self.mdb_controller._run_update_phase(
+                'activities', self.mdb_controller._update_daily_activities,
+                {'epoch_range': (start_time, obj_range[1])}, None, None)
+
+        ws_range = self._moddate_range(changes, 'workspaces')
+        if ws_range:
+            narr_upds = self.mdb_controller._run_update_phase(
+                'narratives', self.mdb_controller._update_narratives,
+                {'epoch_range': ws_range}, None, None)
+        return (act_upds, narr_upds)
+
+    def _flush_batch(self, batch):
+        """
+        _flush_batch--flush a micro-batch, then save the resume token of its
+        last change event
+        """
+        act_upds, narr_upds = self._flush(batch)
+        self.metrics_dbi.save_resume_token(self._STREAM_ID, batch[-1]['_id'])
+        log('Ingested {} change(s): {} activity and {} narrative '
+            'updates.'.format(len(batch), act_upds, narr_upds))
+
+    def ingest(self, max_batches=None):
+        """
+        ingest--tail the workspace change stream until stop() is called
+        (or max_batches micro-batches have been flushed); the batch pending
+        when stopped is flushed too
+        """
+        self.running = True
+        n_batches = 0
+        resume_token = self.metrics_dbi.get_resume_token(self._STREAM_ID)
+        log('Starting workspace change ingestion from {}'.format(
+            'resume token' if resume_token else 'now'))
+
+        with self.metrics_dbi.watch_ws_changes(resume_token) as stream:
+            batch = []
+            batch_start = time.time()
+            while self.running:
+                change = stream.try_next()
+                if change is not None:
+                    if not batch:
+                        batch_start = time.time()
+                    batch.append(change)
+                elif (not batch and stream.resume_token is not None and
+                      stream.resume_token != resume_token):
+                    # idle, the stream has moved on past the events filtered
+                    # out; save its token, for a restart not to rescan those
+                    resume_token = stream.resume_token
+                    self.metrics_dbi.save_resume_token(self._STREAM_ID,
+                                                       resume_token)
+                if batch and (len(batch) >= self.batch_size or
+                              time.time() - batch_start >= self.batch_secs):
+                    self._flush_batch(batch)
+                    resume_token = batch[-1]['_id']
+                    batch = []
+                    n_batches += 1
+                    if max_batches and n_batches >= max_batches:
+                        break
+            if batch:
+                self._flush_batch(batch)
+                n_batches += 1
+        self.running = False
+        return n_batches
+
+    def stop(self, *args):
+        self.running = False
+
+
+def get_config():
+    config_file = environ.get('KB_DEPLOYMENT_CONFIG', None)
+    if not config_file:
+        return None
+    retconfig = {}
+    config = ConfigParser()
+    config.read(config_file)
+    for nameval in config.items(environ.get('KB_SERVICE_NAME') or 'kb_Metrics'):
+        retconfig[nameval[0]] = nameval[1]
+    return retconfig
+
+
+if __name__ == "__main__":
+    config = get_config()
+    if config is None:
+        print('KB_DEPLOYMENT_CONFIG must be set to run the ingester')
+        sys.exit(1)
+    ingester = WorkspaceChangeIngester(config)
+    signal.signal(signal.SIGTERM, ingester.stop)
+    signal.signal(signal.SIGINT, ingester.stop)
+    ingester.ingest()
@@ -1,16 +1,52 @@
 import warnings
+import os
+import tempfile
 import time
 import datetime
-import copy
+import threading
 import re
 
-from redis_cache import cache_it_json
+from pymongo.errors import PyMongoError
 
+from kb_Metrics.metrics_cache import cache_it
+from kb_Metrics import metrics_cache
 from kb_Metrics.metrics_dbi import MongoMetricsDBI
+from kb_Metrics.narrative_index import NarrativeNameIndex
 from kb_Metrics.Util import (_unix_time_millis_from_datetime,
-                             _convert_to_datetime)
+                             _convert_to_datetime, _encode_page_token,
+                             _decode_page_token)
 from installed_clients.CatalogClient import Catalog
 
+# the userjobstate fields each field of a job state is assembled from
+# (besides the _id, which is always read)
+_JOB_STATE_SOURCES = {
+    'job_id': [],
+    'user': ['user'],
+    'status': ['status'],
+    'complete': ['complete'],
+    'error': ['error'],
+    'exec_start_time': ['started'],
+    'creation_time': ['created'],
+    'modification_time': ['updated', 'complete', 'error'],
+    'finish_time': ['updated', 'complete', 'error'],
+    'wsid': ['authparam', 'authstrat'],
+    'workspace_name': ['authparam', 'authstrat'],
+    'narrative_name': ['authparam', 'authstrat'],
+    'narrative_objNo': ['authparam', 'authstrat'],
+    'method': ['desc'],
+    'app_id': ['desc'],
+    'client_groups': ['desc']
+}
+# the job state fields assembled with the exec_task of the job
+_TASK_FIELDS = frozenset(['wsid', 'workspace_name', 'narrative_name',
+                          'narrative_objNo', 'method', 'app_id',
+                          'client_groups'])
+# the job state fields looked up by the narrative names of the workspace
+_NARRATIVE_FIELDS = frozenset(['workspace_name', 'narrative_name',
+                               'narrative_objNo'])
+_USER_FIELDS = ('username', 'email', 'full_name', 'signup_at',
+                'last_signin_at', 'kbase_staff', 'roles')
+
 
 def log(message, prefix_newline=False):
     """
@@ -74,29 +110,32 @@ class MetricsMongoDBController:
         """
         update user info
         If match not found, insert that record as new.
+        The latest signup or login read is left in params['high_water_mark'].
         """
         params = self._process_parameters(params)
+        # incremental runs also pick up the logins of existing users
         auth2_ret = self.metrics_dbi.aggr_user_details(
-            params['user_ids'], params['minTime'], params['maxTime'])
+            params['user_ids'], params['minTime'], params['maxTime'],
+            include_logins=bool(params.get('incremental')))
         if not auth2_ret:
             print("No user records returned for update!")
             return 0
+        params['high_water_mark'] = self._max_time_read(
+            [u_data[f] for u_data in auth2_ret
+             for f in ('signup_at', 'last_signin_at')], params)
 
-        up_dated = 0
-        up_serted = 0
         print('Retrieved {} user record(s) for update!'.format(len(auth2_ret)))
         id_keys = ['username', 'email']
         data_keys = ['full_name', 'signup_at', 'last_signin_at', 'roles']
+        user_records = []
         for u_data in auth2_ret:
             id_data = {x: u_data[x] for x in id_keys}
             user_data = {x: u_data[x] for x in data_keys}
             is_kbstaff = True if self._is_kbstaff(id_data['username']) else False
-            update_ret = self.metrics_dbi.update_user_records(
-                id_data, user_data, is_kbstaff)
-            if update_ret.raw_result['updatedExisting']:
-                up_dated += update_ret.raw_result['nModified']
-            elif update_ret.raw_result.get('upserted'):
-                up_serted += 1
+            user_records.append((id_data, user_data, is_kbstaff))
+
+        up_dated, up_serted = self.metrics_dbi.bulk_update_user_records(
+            user_records, self.bulk_batch_size)
         print('updated {} and upserted {} users.'.format(up_dated, up_serted))
         return up_dated + up_serted
 
@@ -104,45 +143,50 @@ class MetricsMongoDBController:
         """
         update user activities reported from Workspace.workspaceObjects.
         If match not found, insert that record as new.
+        The latest object moddate read is left in params['high_water_mark'].
         """
         ws_ret = self._get_activities_from_wsobjs(params, token)
         act_list = ws_ret['metrics_result']
         if not act_list:
             print("No daily activity records returned for update!")
             return 0
+        params['high_water_mark'] = self._max_time_read(
+            [a_data['last_moddate'] for a_data in act_list], params)
 
-        up_dated = 0
-        up_serted = 0
         print('Retrieved {} activity record(s) for '
               'update!'.format(len(act_list)))
         id_keys = ['_id']
         count_keys = ['obj_numModified']
+        act_records = []
         for a_data in act_list:
             id_data = {x: a_data[x] for x in id_keys}
             count_data = {x: a_data[x] for x in count_keys}
-            update_ret = self.metrics_dbi.update_activity_records(
-                id_data, count_data)
-            if update_ret.raw_result['updatedExisting']:
-                up_dated += update_ret.raw_result['nModified']
-            elif update_ret.raw_result.get('upserted'):
-                up_serted += 1
+            act_records.append((id_data, count_data))
 
-        print('updated {} and upserted {} '
-              'activities.'.format(up_dated, up_serted))
+        up_dated, up_serted = self.metrics_dbi.bulk_update_activity_records(
+            act_records, self.bulk_batch_size)
+        # the same days keyed without the owner by the older updates
+        n_deleted = self.metrics_dbi.delete_ownerless_activities(
+            [a_data['_id'] for a_data in act_list], self.bulk_batch_size)
+
+        print('updated {} and upserted {} activities, deleted {} without '
+              'their usernames.'.format(up_dated, up_serted, n_deleted))
         return up_dated + up_serted
 
     def _update_narratives(self, params, token):
         """
         update user narratives reported from Workspace.
         If match not found, insert that record as new.
+        The latest workspace moddate read is left in
+        params['high_water_mark'].
         """
         ws_ret = self._get_narratives_from_wsobjs(params, token)
         narr_list = ws_ret['metrics_result']
-        up_dated = 0
-        up_serted = 0
         if not narr_list:
             print("No narrative records returned for update!")
             return 0
+        params['high_water_mark'] = self._max_time_read(
+            [n_data['last_saved_at'] for n_data in narr_list], params)
 
         print('Retrieved {} narratives record(s) for '
               'update!'.format(len(narr_list)))
@@ -150,24 +194,42 @@ class MetricsMongoDBController:
         other_keys = ['name', 'last_saved_at', 'last_saved_by', 'numObj',
                       'deleted', 'nice_name', 'desc']
 
+        narr_records = []
         for n_data in narr_list:
             id_data = {x: n_data[x] for x in id_keys}
             other_data = {x: n_data[x] for x in other_keys}
-            update_ret = self.metrics_dbi.update_narrative_records(
-                id_data, other_data)
-            if update_ret.raw_result['updatedExisting']:
-                up_dated += update_ret.raw_result['nModified']
-            elif update_ret.raw_result['upserted']:
-                up_serted += 1
+            narr_records.append((id_data, other_data))
+
+        up_dated, up_serted = self.metrics_dbi.bulk_update_narrative_records(
+            narr_records, self.bulk_batch_size)
 
         print('updated {} and upserted {} '
               'narratives.'.format(up_dated, up_serted))
         return up_dated + up_serted
 
+    def _update_ws_rollup(self, params, token):
+        """
+        update the monthly per-user workspace counts rolled up from
+        Workspace.workspaces for the whole months in the time range.
+        Only the months that are over are rolled up, so the start of the
+        month maxTime falls in is left in params['high_water_mark'].
+        """
+        params = self._process_parameters(params)
+        max_time = min(_convert_to_datetime(params['maxTime']),
+                       datetime.datetime.utcnow())
+        upd_ret = self.metrics_dbi.update_ws_rollup(
+            _convert_to_datetime(params['minTime']), max_time,
+            self.bulk_batch_size)
+        params['high_water_mark'] = max_time.replace(
+            day=1, hour=0, minute=0, second=0, microsecond=0)
+        print('rolled up {} monthly user workspace '
+              'count(s).'.format(upd_ret))
+        return upd_ret
+
     # End functions to write to the metrics database
 
     # functions to get the requested records from other dbs...
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
+    @cache_it(limit=1024, expire=60 * 60 / 2)
     def _get_narratives_from_wsobjs(self, params, token):
         """
         _get_narratives_from_wsobjs--Given a time period, fetch the narrative
@@ -182,26 +244,30 @@ class MetricsMongoDBController:
             minT=params['minTime'], maxT=params['maxTime'])
         ws_ids = [wnarr['workspace_id'] for wnarr in ws_narrs]
 
-        wsobjs = self.metrics_dbi.list_user_objects_from_wsobjs(
-            params['minTime'], params['maxTime'], ws_ids)
+        # a workspace's moddate is set after its objects', so the narrative
+        # objects are looked up in the workspaces whatever their save time
+        wsobjs = []
+        if ws_ids:
+            wsobjs = self.metrics_dbi.list_user_objects_from_wsobjs(
+                None, params['maxTime'], ws_ids)
+
+        # index the objects by workspace, and each name's first position
+        ws_objs = {}
+        obj_pos = {}
+        for obj in wsobjs:
+            w_objs = ws_objs.setdefault(obj['workspace_id'], [])
+            obj_pos.setdefault((obj['workspace_id'], obj['object_name']),
+                               len(w_objs))
+            w_objs.append(obj)
 
         ws_narrs1 = []
         for wsn in ws_narrs:
-            for obj in wsobjs:
-                if wsn['workspace_id'] == obj['workspace_id']:
-                    if wsn['name'] == obj['object_name']:
-                        wsn['object_id'] = obj['object_id']
-                        wsn['object_version'] = obj['object_version']
-                        break
-                    elif ':' in wsn['name']:
-                        wts = wsn['name'].split(':')[1]
-                        if '_' in wts:
-                            wts = wts.split('_')[1]
-                        p = re.compile(wts, re.IGNORECASE)
-                        if p.search(obj['object_name']):
-                            wsn['object_id'] = obj['object_id']
-                            wsn['object_version'] = obj['object_version']
-                            break
+            obj = self._match_narrative_obj(
+                wsn['name'], ws_objs.get(wsn['workspace_id'], []),
+                obj_pos.get((wsn['workspace_id'], wsn['name'])))
+            if obj:
+                wsn['object_id'] = obj['object_id']
+                wsn['object_version'] = obj['object_version']
 
             if wsn.get('object_id'):
                 wsn['last_saved_by'] = wsn.pop('username')
@@ -213,68 +279,173 @@ class MetricsMongoDBController:
 
         return {'metrics_result': ws_narrs1}
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
+    def _match_narrative_obj(self, narr_name, w_objs, exact_pos):
+        """
+        _match_narrative_obj--the first object in w_objs (the objects of the
+        narrative's workspace) named narr_name, or, for a 'user:narrative_ts'
+        name, whose name contains the timestamp 'ts' (case-insensitive).
+        exact_pos is the position of the first object named narr_name.
+        """
+        if ':' not in narr_name:
+            return w_objs[exact_pos] if exact_pos is not None else None
+
+        # only the objects before the first exact match can win by pattern
+        end_pos = exact_pos if exact_pos is not None else len(w_objs)
+        if end_pos > 0:
+            wts = narr_name.split(':')[1]
+            if '_' in wts:
+                wts = wts.split('_')[1]
+            p = re.compile(wts, re.IGNORECASE)
+            for obj in w_objs[:end_pos]:
+                if p.search(obj['object_name']):
+                    return obj
+        return w_objs[exact_pos] if exact_pos is not None else None
+
     def _map_ws_narr_names(self, ws_id):
         """
         _map_ws_narr_names-returns the workspace/narrative name
         and version with given ws_id
         """
-        if self.narrative_name_map == {}:
-            self.narrative_name_map = self._get_narrative_name_map()
-        w_nm = ''
-        n_nm = ''
-        n_ver = '1'
-        try:
-            w_nm, n_nm, n_ver = self.narrative_name_map[int(ws_id)]
-        except ValueError as ve:
-            # e.g.,ws_id == "srividya22:1447279981090"
-            print(ve)
-            w_nm = ws_id
-            n_nm = ws_id
-        except KeyError as ke:
-            # no match, simply pass
-            # print('No workspace/narrative_name matched key {}'.format(ws_id))
-            print(ke)
-            pass
-        return (w_nm, n_nm, n_ver)
-
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
+        return self._map_ws_narr_names_list([ws_id])[0]
+
+    def _map_ws_narr_names_list(self, ws_ids):
+        """
+        _map_ws_narr_names_list--_map_ws_narr_names of each of ws_ids,
+        looked up in the narrative index in one batch
+        """
+        int_ids = []
+        for ws_id in ws_ids:
+            try:
+                int_ids.append(int(ws_id))
+            except ValueError as ve:
+                # e.g.,ws_id == "srividya22:1447279981090"
+                print(ve)
+                int_ids.append(None)
+        found = iter(self.narrative_index.lookup(
+            [i for i in int_ids if i is not None]))
+
+        ret = []
+        for ws_id, int_id in zip(ws_ids, int_ids):
+            if int_id is None:
+                ret.append((ws_id, ws_id, '1'))
+            else:
+                # no match, the default names
+                ret.append(next(found) or ('', '', '1'))
+        return ret
+
+    @cache_it(limit=1024, expire=60 * 60 / 2)
     def _get_activities_from_wsobjs(self, params, token):
 
         params = self._process_parameters(params)
 
         wsobjs_act = self.metrics_dbi.aggr_activities_from_wsobjs(
             params['minTime'], params['maxTime'])
-        ws_owners = self.metrics_dbi.list_ws_owners()
-
-        for wo in ws_owners:
-            for obj in wsobjs_act:
-                if wo['ws_id'] == obj['_id']['ws_id']:
-                    obj['_id']['username'] = wo['username']
-                    break
+        if not wsobjs_act:
+            return {'metrics_result': wsobjs_act}
+
+        # look up the owners of only the workspaces active in the time range
+        ws_ids = sorted(set(obj['_id']['ws_id'] for obj in wsobjs_act))
+        ws_owners = {wo['ws_id']: wo['username']
+                     for wo in self.metrics_dbi.list_ws_owners(ws_ids)}
+
+        for obj in wsobjs_act:
+            owner = ws_owners.get(obj['_id']['ws_id'])
+            if owner is not None:
+                obj['_id']['username'] = owner
         return {'metrics_result': wsobjs_act}
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
-    def _join_task_ujs(self, exec_tasks, ujs_jobs):
+    def _join_task_ujs(self, exec_tasks, ujs_jobs, fields=None):
         """
         combine/join exec_tasks with ujs_jobs list to get the final return data
         """
+        task_map = self._map_exec_tasks(exec_tasks)
+        return self._assemble_ujs_states(ujs_jobs, task_map, fields)
+
+    def _iter_job_states(self, exec_tasks, ujs_jobs, fields=None):
+        """
+        _iter_job_states--the job states of ujs_jobs joined with exec_tasks,
+        assembled stream_batch_size jobs at a time as they are yielded
+        """
+        task_map = self._map_exec_tasks(exec_tasks)
+        for i in range(0, len(ujs_jobs), self.stream_batch_size):
+            batch = self._convert_isodate_to_milis(
+                ujs_jobs[i:i + self.stream_batch_size],
+                ['created', 'started', 'updated'])
+            for u_j_s in self._assemble_ujs_states(batch, task_map, fields):
+                yield u_j_s
+
+    def _assemble_ujs_states(self, ujs_jobs, task_map, fields=None):
+        """
+        _assemble_ujs_states--the job states of ujs_jobs, with the narrative
+        names of all the jobs' workspaces looked up at once
+        """
+        narr_names = {}
+        if fields is None or not _NARRATIVE_FIELDS.isdisjoint(fields):
+            ws_ids = list(set(filter(None, (self._job_wsid(j, task_map)
+                                            for j in ujs_jobs))))
+            narr_names = dict(zip(ws_ids,
+                                  self._map_ws_narr_names_list(ws_ids)))
+
         ujs_ret = []
         for j in ujs_jobs:
-            u_j_s = self._assemble_ujs_state(j, exec_tasks)
+            u_j_s = self._assemble_ujs_state(j, task_map, narr_names, fields)
             ujs_ret.append(u_j_s)
         return ujs_ret
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
-    def _assemble_ujs_state(self, ujs, exec_tasks):
-        u_j_s = copy.deepcopy(ujs)
+    def _job_wsid(self, ujs, task_map):
+        """
+        _job_wsid--the wsid _assemble_ujs_state finds for a ujs job (if any),
+        for looking the narrative names up ahead of assembling the jobs
+        """
+        if ujs.get('authstrat') == 'kbaseworkspace' and ujs.get('authparam'):
+            return ujs['authparam']
+        et_job_in = task_map.get(str(ujs['_id']), {}).get('job_input', {})
+        if 'wsid' in et_job_in:
+            return et_job_in['wsid']
+        if et_job_in.get('params'):
+            p_ws = et_job_in['params'][0]
+            if isinstance(p_ws, dict):
+                return p_ws.get('ws_id')
+        return None
+
+    def _map_exec_tasks(self, exec_tasks):
+        """
+        _map_exec_tasks: index exec_tasks by their str(ujs_job_id),
+        keeping the first task listed for each job
+        """
+        task_map = {}
+        for exec_task in exec_tasks:
+            task_map.setdefault(str(exec_task['ujs_job_id']), exec_task)
+        return task_map
+
+    def _assemble_ujs_state(self, ujs, task_map, narr_names=None,
+                            fields=None):
+        """
+        _assemble_ujs_state--the job state of a ujs job joined with its
+        exec_task from task_map; the narrative names are taken from
+        narr_names ({wsid: (ws_nm, narr_nm, narr_ver)}) when given.
+        Given fields, the job state is cut down to them, and ujs only needs
+        the ones they are assembled from (see _JOB_STATE_SOURCES).
+        """
+        if narr_names is None:
+            narr_names = {}
+        look_up_names = fields is None or not _NARRATIVE_FIELDS.isdisjoint(
+            fields)
+
+        def map_ws_narr_names(wsid):
+            if wsid not in narr_names:
+                narr_names[wsid] = self._map_ws_narr_names(wsid)
+            return narr_names[wsid]
+
+        # only top-level keys are popped/set below, so a shallow copy will do
+        u_j_s = dict(ujs)
         u_j_s['job_id'] = str(u_j_s.pop('_id'))
         u_j_s['exec_start_time'] = u_j_s.pop('started', None)
-        u_j_s['creation_time'] = u_j_s.pop('created')
-        u_j_s['modification_time'] = u_j_s.pop('updated')
+        u_j_s['creation_time'] = u_j_s.pop('created', None)
+        u_j_s['modification_time'] = u_j_s.pop('updated', None)
 
-        authparam = u_j_s.pop('authparam')
-        authstrat = u_j_s.pop('authstrat')
+        authparam = u_j_s.pop('authparam', None)
+        authstrat = u_j_s.pop('authstrat', None)
         if authstrat == 'kbaseworkspace':
             u_j_s['wsid'] = authparam
 
@@ -283,34 +454,34 @@ class MetricsMongoDBController:
             if '.' in desc:
                 u_j_s['method'] = desc
 
-        for exec_task in exec_tasks:
-            if str(exec_task['ujs_job_id']) == u_j_s['job_id']:
-                if 'job_input' in exec_task:
-                    et_job_in = exec_task['job_input']
-                    u_j_s['app_id'] = self._parse_app_id(et_job_in)
-                    if not u_j_s.get('method'):
-                        u_j_s['method'] = self._parse_method(et_job_in)
-                    if not u_j_s.get('wsid'):
-                        if 'wsid' in et_job_in:
-                            u_j_s['wsid'] = et_job_in['wsid']
-                        elif 'params' in et_job_in and et_job_in['params']:
-                            p_ws = et_job_in['params'][0]
-                            if isinstance(p_ws, dict) and 'ws_id' in p_ws:
-                                u_j_s['wsid'] = p_ws['ws_id']
-
-                    # try to get workspace_name--first by wsid, then from 'job_input'
-                    if u_j_s.get('wsid') and not u_j_s.get('workspace_name'):
-                        ws_name = self._map_ws_narr_names(u_j_s['wsid'])[0]
-                        u_j_s['workspace_name'] = ws_name
-                    if not u_j_s.get('workspace_name') or u_j_s['workspace_name'] == '':
-                        if 'params' in et_job_in and et_job_in['params']:
-                            p_ws = et_job_in['params'][0]
-                            if isinstance(p_ws, dict):
-                                if 'workspace' in p_ws:
-                                    u_j_s['workspace_name'] = p_ws['workspace']
-                                elif 'workspace_name' in p_ws:
-                                    u_j_s['workspace_name'] = p_ws['workspace_name']
-                break
+        exec_task = task_map.get(u_j_s['job_id'])
+        if exec_task is not None:
+            if 'job_input' in exec_task:
+                et_job_in = exec_task['job_input']
+                u_j_s['app_id'] = self._parse_app_id(et_job_in)
+                if not u_j_s.get('method'):
+                    u_j_s['method'] = self._parse_method(et_job_in)
+                if not u_j_s.get('wsid'):
+                    if 'wsid' in et_job_in:
+                        u_j_s['wsid'] = et_job_in['wsid']
+                    elif 'params' in et_job_in and et_job_in['params']:
+                        p_ws = et_job_in['params'][0]
+                        if isinstance(p_ws, dict) and 'ws_id' in p_ws:
+                            u_j_s['wsid'] = p_ws['ws_id']
+
+                # try to get workspace_name--first by wsid, then from 'job_input'
+                if (look_up_names and u_j_s.get('wsid') and
+                        not u_j_s.get('workspace_name')):
+                    ws_name = map_ws_narr_names(u_j_s['wsid'])[0]
+                    u_j_s['workspace_name'] = ws_name
+                if not u_j_s.get('workspace_name') or u_j_s['workspace_name'] == '':
+                    if 'params' in et_job_in and et_job_in['params']:
+                        p_ws = et_job_in['params'][0]
+                        if isinstance(p_ws, dict):
+                            if 'workspace' in p_ws:
+                                u_j_s['workspace_name'] = p_ws['workspace']
+                            elif 'workspace_name' in p_ws:
+                                u_j_s['workspace_name'] = p_ws['workspace_name']
 
         if not u_j_s.get('app_id') and u_j_s.get('method'):
             u_j_s['app_id'] = u_j_s['method'].replace('.', '/')
@@ -326,8 +497,8 @@ class MetricsMongoDBController:
             u_j_s.pop('workspace_name')
 
         # get the narrative name and version via u_j_s['wsid']
-        if u_j_s.get('wsid'):
-            w_nm, n_name, n_ver = self._map_ws_narr_names(u_j_s['wsid'])
+        if look_up_names and u_j_s.get('wsid'):
+            w_nm, n_name, n_ver = map_ws_narr_names(u_j_s['wsid'])
             if n_name != '':
                 u_j_s['narrative_name'] = n_name
                 u_j_s['narrative_objNo'] = n_ver
@@ -337,15 +508,12 @@ class MetricsMongoDBController:
                 u_j_s['narrative_objNo'] = 1
 
         # get the client groups
-        u_j_s['client_groups'] = ['njs']  # default client groups to 'njs'
-        if self.client_groups:
-            for clnt in self.client_groups:
-                clnt_id = clnt['app_id']
-                ujs_a_id = str(u_j_s.get('app_id'))
-                if str(clnt_id).lower() == ujs_a_id.lower():
-                    u_j_s['client_groups'] = clnt['client_groups']
-                    break
+        # default client groups to 'njs'
+        u_j_s['client_groups'] = self.client_groups_map.get(
+            str(u_j_s.get('app_id')).lower(), ['njs'])
 
+        if fields is not None:
+            u_j_s = self._select_fields([u_j_s], fields)[0]
         return u_j_s
 
     def _process_parameters(self, params):
@@ -384,20 +552,87 @@ class MetricsMongoDBController:
 
         return params
 
-    @cache_it_json(limit=1024, expire=60 * 60 / 2)
+    def _process_query_parameters(self, params):
+        """
+        _process_query_parameters: _process_parameters for the read
+        endpoints, canonicalized so that logically identical queries share
+        their cache entries--the user_ids are sorted and a range reaching
+        into the current time bucket (e.g., the default most recent 48 hours)
+        is widened to whole buckets of cache-time-bucket-seconds.
+        The user_ids of the caller's params keep their order.
+        """
+        q_params = dict(self._process_parameters(params))
+        q_params['user_ids'] = sorted(set(q_params['user_ids']))
+
+        bucket_ms = self.time_bucket_secs * 1000
+        if bucket_ms > 0:
+            now_ms = _unix_time_millis_from_datetime(datetime.datetime.utcnow())
+            if q_params['maxTime'] > now_ms - now_ms % bucket_ms:
+                q_params['minTime'] -= q_params['minTime'] % bucket_ms
+                q_params['maxTime'] += -q_params['maxTime'] % bucket_ms
+        return q_params
+
+    def _page_parameters(self, params):
+        """
+        _page_parameters--the limit (0 for no limit) and the sort key to
+        start after (None on the first page) of a paged query
+        """
+        try:
+            limit = int(params.get('limit') or 0)
+        except (TypeError, ValueError):
+            limit = -1
+        if limit < 0:
+            raise ValueError('Variable limit must be a non-negative integer.')
+
+        token = params.get('continuation_token')
+        return limit, (_decode_page_token(token) if token else None)
+
+    def _field_parameters(self, params, known_fields):
+        """
+        _field_parameters--the fields of the records to return (sorted, so
+        that the same fields share their cache entries), or None for all
+        """
+        fields = params.get('fields')
+        if not fields:
+            return None
+        if not isinstance(fields, list):
+            raise ValueError('Variable fields must be a list.')
+        unknown = [f for f in fields if f not in known_fields]
+        if unknown:
+            raise ValueError('Invalid fields {}.'.format(unknown))
+        return sorted(set(fields))
+
+    def _select_fields(self, records, fields):
+        """
+        _select_fields--records cut down to the given fields (None for all)
+        """
+        if fields is None:
+            return records
+        return [{f: r[f] for f in fields if f in r} for r in records]
+
+    def _page_end(self, docs, limit, sort_fields):
+        """
+        _page_end--docs, of a query for limit + 1 of them, cut down to the
+        page and the continuation token to the next page (None on the last)
+        """
+        if not limit or len(docs) <= limit:
+            return docs, None
+        docs = docs[:limit]
+        return docs, _encode_page_token([docs[-1][f] for f in sort_fields])
+
     def _get_narrative_name_map(self):
         """
         _get_narrative_name_map: Fetch the narrative id and name
         (or narrative_nice_name if it exists) into a dictionary
         of {key=ws_id, value=(ws_nm, narr_nm, narr_ver)}
+        for (re)building self.narrative_index
         """
         # 1. get the ws_narrative data to start, including deleted ones
-        if self.ws_narratives is None:
-            self.ws_narratives = self.metrics_dbi.list_ws_narratives(include_del=True)
+        ws_narratives = self.metrics_dbi.list_ws_narratives(include_del=True)
 
-        # 2. loop through all self.ws_narratives
+        # 2. loop through all ws_narratives
         narrative_name_map = {}
-        for wsnarr in self.ws_narratives:
+        for wsnarr in ws_narratives:
             ws_nm = wsnarr.get('name', '')  # workspace_name or ''
             narr_nm = ws_nm  # default narrative_name
             narr_ver = '1'  # default narrative_objNo
@@ -412,7 +647,7 @@ class MetricsMongoDBController:
 
         return narrative_name_map
 
-    @cache_it_json(limit=1024, expire=60 * 60 * 1)
+    @cache_it(limit=1024, expire=60 * 60 * 1)
     def _get_client_groups_from_cat(self, token):
         """
         _get_client_groups_from_cat: Get the client_groups data from Catalog API
@@ -434,6 +669,33 @@ class MetricsMongoDBController:
                  'client_groups': client_group.get('client_groups')}
                 for client_group in client_groups]
 
+    def _map_client_groups(self, client_groups):
+        """
+        _map_client_groups: index the Catalog client_groups data by the
+        lower-cased app_id, keeping the first entry listed for each app
+        """
+        client_groups_map = {}
+        for clnt in client_groups or []:
+            client_groups_map.setdefault(str(clnt['app_id']).lower(),
+                                         clnt['client_groups'])
+        return client_groups_map
+
+    def _ensure_indexes(self):
+        """
+        _ensure_indexes: provision the metrics db indexes at startup (the
+        only time they are ensured, so a failure is retried by a restart);
+        a failure is only warned about so that it does not block the service
+        """
+        try:
+            created = self.metrics_dbi.ensure_indexes()
+        except PyMongoError as e:
+            warnings.warn('could not provision the metrics db '
+                          'indexes: {}'.format(e))
+            return []
+        if created:
+            print('created index(es): {}'.format(', '.join(created)))
+        return created
+
     def __init__(self, config):
         # grab config lists
         self.adminList = self._config_str_to_list(
@@ -451,22 +713,50 @@ class MetricsMongoDBController:
                 error_msg += 'to start a MetricsMongoDBController!'
                 raise ValueError(error_msg)
 
+        # size the in-process cache tier and locate the redis one
+        metrics_cache.configure(config)
+
         # instantiate the mongo client
         self.metrics_dbi = MongoMetricsDBI(config.get('mongodb-host'),
                                            self.mongodb_dbList,
                                            config.get('mongodb-user', ''),
                                            config.get('mongodb-pwd', ''))
 
+        # number of upserts sent per bulk_write when updating the metrics db
+        self.bulk_batch_size = int(config.get(
+            'mongodb-bulk-batch-size', MongoMetricsDBI._BULK_BATCH_SIZE))
+
+        # build any missing supporting indexes on the metrics collections,
+        # off the startup path as the mongo servers may not be up yet
+        if str(config.get('mongodb-ensure-indexes', 'true')).lower() != 'false':
+            idx_thread = threading.Thread(target=self._ensure_indexes)
+            idx_thread.daemon = True
+            idx_thread.start()
+
+        # number of jobs joined at a time for a streamed get_user_job_states
+        self.stream_batch_size = int(config.get('stream-batch-size', 500))
+
+        # "now"-relative query ranges are aligned to buckets of this size
+        self.time_bucket_secs = int(config.get('cache-time-bucket-seconds', 300))
+
         # for access to the Catalog API
         self.auth_service_url = config['auth-service-url']
         self.catalog_url = config['kbase-endpoint'] + '/catalog'
 
+        # the narrative names are looked up in an index file shared by the
+        # server processes, built on first use and refreshed in the background
+        index_path = config.get('narrative-index-path', os.path.join(
+            config.get('scratch', tempfile.gettempdir()),
+            'narrative_name_index'))
+        self.narrative_index = NarrativeNameIndex(
+            index_path, self._get_narrative_name_map,
+            int(config.get('narrative-index-refresh-seconds', 60 * 30)))
+
         # commonly used data
         self.kbstaff_list = None
-        self.ws_narratives = None
         self.client_groups = None
+        self.client_groups_map = {}
         self.cat_client = None
-        self.narrative_name_map = {}
 
     def map_ws_narrative_names(self, requesting_user, ws_ids, token):
         """
@@ -484,12 +774,12 @@ class MetricsMongoDBController:
                                  'invoke this action.')
 
         map_results = []
-        for w_id in ws_ids:
-            map_ret = self._map_ws_narr_names(w_id)
+        for w_id, map_ret in zip(ws_ids, self._map_ws_narr_names_list(ws_ids)):
             map_results.append({'ws_id': w_id, 'narr_name_map': map_ret})
         return map_results
 
-    def get_user_job_states(self, requesting_user, params, token):
+    def get_user_job_states(self, requesting_user, params, token,
+                            stream=False):
         """
         get_user_job_states--generate data for appcatalog/stats from querying
         execution_engine, userjobstates, catalog and workspace
@@ -497,28 +787,66 @@ class MetricsMongoDBController:
         To get the job's 'status', 'complete'=true/false, etc.,
         we can do joining as follows
         --userjobstate.jobstate['_id']==exec_engine.exec_tasks['ujs_job_id']
+        With stream=True, the job states of an unpaged request are yielded
+        as they are assembled (off the same cached reads) instead of listed.
+        Given the fields of the job states to return, only the data those
+        are assembled from is read.
         """
         if not self._is_admin(requesting_user):
             params['user_ids'] = [requesting_user]
+        fields = self._field_parameters(params, _JOB_STATE_SOURCES)
+        with_tasks = fields is None or not _TASK_FIELDS.isdisjoint(fields)
 
-        # 1. get the ws_narrative and client_groups data for lookups
-        if self.ws_narratives is None:
-            self.ws_narratives = self.metrics_dbi.list_ws_narratives(
-                include_del=True)
-        if self.client_groups is None:
+        # 1. get the client_groups data for lookups
+        if self.client_groups is None and (fields is None or
+                                           'client_groups' in fields):
             self.client_groups = self._get_client_groups_from_cat(token)
+            self.client_groups_map = self._map_client_groups(
+                self.client_groups)
 
         # 2. query dbs to get lists of tasks and jobs
-        params = self._process_parameters(params)
-        exec_tasks = self.metrics_dbi.list_exec_tasks(params['minTime'],
-                                                      params['maxTime'])
-        ujs_jobs = self.metrics_dbi.list_ujs_results(params['user_ids'],
-                                                     params['minTime'],
-                                                     params['maxTime'])
+        params = self._process_query_parameters(params)
+        limit, after = self._page_parameters(params)
+        paged = bool(limit) or after is not None
+        ujs_fields = None
+        if fields is not None:
+            ujs_fields = set(s for f in fields for s in _JOB_STATE_SOURCES[f])
+            if paged:
+                ujs_fields.add('created')  # the page key, with the _id
+            ujs_fields = sorted(ujs_fields)
+
+        next_token = None
+        exec_tasks = []
+        if paged:
+            # a page of the jobs, with the tasks of only those jobs
+            ujs_jobs, next_token = self._page_end(
+                list(self.metrics_dbi.iter_ujs_results(
+                    params['user_ids'], params['minTime'], params['maxTime'],
+                    after, limit + 1 if limit else 0, ujs_fields)),
+                limit, ['created', '_id'])
+            if with_tasks:
+                exec_tasks = list(self.metrics_dbi.iter_exec_tasks(
+                    params['minTime'], params['maxTime'],
+                    [str(j['_id']) for j in ujs_jobs]))
+        else:
+            if with_tasks:
+                exec_tasks = self.metrics_dbi.list_exec_tasks(
+                    params['minTime'], params['maxTime'])
+            ujs_jobs = self.metrics_dbi.list_ujs_results(params['user_ids'],
+                                                         params['minTime'],
+                                                         params['maxTime'],
+                                                         ujs_fields)
+            if stream:
+                return {'job_states': self._iter_job_states(
+                    exec_tasks, ujs_jobs, fields)}
         ujs_jobs = self._convert_isodate_to_milis(
             ujs_jobs, ['created', 'started', 'updated'])
 
-        return {'job_states': self._join_task_ujs(exec_tasks, ujs_jobs)}
+        job_states = {'job_states': self._join_task_ujs(exec_tasks, ujs_jobs,
+                                                        fields)}
+        if next_token:
+            job_states['continuation_token'] = next_token
+        return job_states
 
     def get_narrative_stats(self, requesting_user, params, token, exclude_kbstaff=True):
         """
@@ -529,7 +857,7 @@ class MetricsMongoDBController:
                 raise ValueError('You do not have permisson to '
                                  'invoke this action.')
 
-        params = self._process_parameters(params)
+        params = self._process_query_parameters(params)
 
         # 1. get the narr_owners data for lookups
         if exclude_kbstaff:
@@ -562,7 +890,7 @@ class MetricsMongoDBController:
         if not self._is_admin(requesting_user):
                 raise ValueError('You do not have permisson to '
                                  'invoke this action.')
-        params = self._process_parameters(params)
+        params = self._process_query_parameters(params)
         params['minTime'] = datetime.datetime.fromtimestamp(params['minTime'] / 1000)
         params['maxTime'] = datetime.datetime.fromtimestamp(params['maxTime'] / 1000)
 
@@ -581,7 +909,7 @@ class MetricsMongoDBController:
         if not self._is_admin(requesting_user):
                 raise ValueError('You do not have permisson to '
                                  'invoke this action.')
-        params = self._process_parameters(params)
+        params = self._process_query_parameters(params)
         params['minTime'] = datetime.datetime.fromtimestamp(params['minTime'] / 1000)
         params['maxTime'] = datetime.datetime.fromtimestamp(params['maxTime'] / 1000)
 
@@ -594,7 +922,7 @@ class MetricsMongoDBController:
                 raise ValueError('You do not have permisson to '
                                  'invoke this action.')
 
-        params = self._process_parameters(params)
+        params = self._process_query_parameters(params)
         params['minTime'] = datetime.datetime.fromtimestamp(params['minTime'] / 1000)
         params['maxTime'] = datetime.datetime.fromtimestamp(params['maxTime'] / 1000)
 
@@ -608,7 +936,7 @@ class MetricsMongoDBController:
                 raise ValueError('You do not have permisson to '
                                  'invoke this action.')
 
-        params = self._process_parameters(params)
+        params = self._process_query_parameters(params)
         params['minTime'] = datetime.datetime.fromtimestamp(params['minTime'] / 1000)
         params['maxTime'] = datetime.datetime.fromtimestamp(params['maxTime'] / 1000)
 
@@ -620,26 +948,101 @@ class MetricsMongoDBController:
     # end putting the deleted functions back
 
     # function(s) to update the metrics db
+    def _incremental_parameters(self, phase, params, end_time):
+        """
+        _incremental_parameters--the parameters for one phase of an
+        incremental update_metrics run: from the phase's checkpoint (or,
+        on the first run, the start of the requested range) to end_time.
+        """
+        phase_params = dict(params)
+        start_time = self.metrics_dbi.get_checkpoint(phase)
+        if start_time is None:
+            start_time = _convert_to_datetime(
+                self._process_parameters(dict(params))['minTime'])
+        if phase == 'activities':
+            # activities are counted per whole day and the counts are $set,
+            # so recount the day the checkpoint falls in from its start
+            start_time = datetime.datetime.combine(start_time.date(),
+                                                   datetime.time())
+        phase_params['epoch_range'] = (start_time, end_time)
+        return phase_params
+
+    def _max_time_read(self, times, params):
+        """
+        _max_time_read--the latest of times (the datetimes read by an update
+        phase) within the time range of params, or None if there is none
+        """
+        max_time = _convert_to_datetime(
+            self._process_parameters(dict(params))['maxTime'])
+        times = [t for t in times
+                 if isinstance(t, datetime.datetime) and t <= max_time]
+        return max(times) if times else None
+
+    def _run_update_phase(self, phase, upd_func, params, token, end_time):
+        """
+        _run_update_phase--run one update_metrics phase and, for incremental
+        runs, advance its checkpoint once the phase has succeeded: to the
+        latest timestamp the phase read (its params['high_water_mark']),
+        for the records committed late with an earlier one to be read on
+        the next run; a phase that read nothing keeps its checkpoint.
+        Unless the phase wrote nothing, the version of the cache namespace
+        of the collection it writes to is bumped.
+        """
+        upd_ret = None
+        try:
+            if not params.get('incremental'):
+                upd_ret = upd_func(dict(params), token)
+            else:
+                phase_params = self._incremental_parameters(phase, params,
+                                                            end_time)
+                upd_ret = upd_func(phase_params, token)
+                if phase_params.get('high_water_mark') is not None:
+                    self.metrics_dbi.advance_checkpoint(
+                        phase, phase_params['high_water_mark'])
+        finally:
+            if upd_ret != 0:
+                metrics_cache.bump_namespaces(
+                    MongoMetricsDBI._MT_CACHE_NS[phase])
+                if phase == 'users':
+                    self.kbstaff_list = None
+        return upd_ret
+
     def update_metrics(self, requesting_user, params, token):
         """
         update_metrics--updates the metrics db collections
+        With params['incremental'] set, each phase processes only the data
+        after its last successful checkpoint in metrics.update_checkpoints.
         """
         if not self._is_metrics_admin(requesting_user):
             raise ValueError('You do not have permission to '
                              'invoke this action.')
 
+        # all phases run up to the same end time, which is not in the future
+        end_time = min(_convert_to_datetime(
+            self._process_parameters(dict(params))['maxTime']),
+            datetime.datetime.utcnow())
+
         # 1. update users
-        action_result1 = self._update_user_info(params, token)
+        action_result1 = self._run_update_phase(
+            'users', self._update_user_info, params, token, end_time)
 
         # 2. update activities
-        action_result2 = self._update_daily_activities(params, token)
+        action_result2 = self._run_update_phase(
+            'activities', self._update_daily_activities, params, token,
+            end_time)
 
         # 3. update narratives
-        action_result3 = self._update_narratives(params, token)
+        action_result3 = self._run_update_phase(
+            'narratives', self._update_narratives, params, token, end_time)
+
+        # 4. roll up the monthly workspace counts
+        action_result4 = self._run_update_phase(
+            'ws_rollup', self._update_ws_rollup, params, token, end_time)
 
         return {'metrics_result': {'user_updates': action_result1,
                                    'activity_updates': action_result2,
-                                   'narrative_updates': action_result3}}
+                                   'narrative_updates': action_result3,
+                                   'ws_rollup_updates': action_result4}}
 
     # functions to get the requested records from metrics db...
     def get_active_users_counts(self, requesting_user,
@@ -654,7 +1057,7 @@ class MetricsMongoDBController:
 
         kb_list = self._get_kbstaff_list()
 
-        params = self._process_parameters(params)
+        params = self._process_query_parameters(params)
 
         if exclude_kbstaff:
             mt_ret = self.metrics_dbi.aggr_unique_users_per_day(
@@ -669,25 +1072,53 @@ class MetricsMongoDBController:
         return {'metrics_result': mt_ret}
 
     def get_user_details(self, requesting_user, params, token,
-                         exclude_kbstaff=False):
+                         exclude_kbstaff=False, stream=False):
         """
         get_user_details--query the metrics/users db to retrieve user info.
+        With stream=True, the users of an unpaged request are yielded as
+        they are converted (off the same cached read) instead of listed.
+        Given fields, only those fields of the users are read and returned.
         """
         if not self._is_admin(requesting_user):
                 raise ValueError('You do not have permisson to '
                                  'invoke this action.')
 
-        params = self._process_parameters(params)
-        mt_ret = self.metrics_dbi.get_user_info(
-            params['user_ids'], params['minTime'],
-            params['maxTime'], exclude_kbstaff)
+        fields = self._field_parameters(params, _USER_FIELDS)
+        params = self._process_query_parameters(params)
+        limit, after = self._page_parameters(params)
+        next_token = None
+        if limit or after is not None:
+            page_fields = None
+            if fields is not None:
+                # with the page key
+                page_fields = sorted(set(fields) |
+                                     set(['signup_at', 'username']))
+            mt_ret, next_token = self._page_end(
+                list(self.metrics_dbi.iter_user_info(
+                    params['user_ids'], params['minTime'], params['maxTime'],
+                    exclude_kbstaff, after, limit + 1 if limit else 0,
+                    page_fields)),
+                limit, ['signup_at', 'username'])
+            mt_ret = self._select_fields(mt_ret, fields)
+        else:
+            mt_ret = self.metrics_dbi.get_user_info(
+                params['user_ids'], params['minTime'],
+                params['maxTime'], exclude_kbstaff, fields)
+            if stream:
+                return {'metrics_result': (
+                    self._convert_isodate_to_milis(
+                        [u], ['signup_at', 'last_signin_at'])[0]
+                    for u in mt_ret)}
 
         if not mt_ret:
             print("No user records returned!")
         else:
             mt_ret = self._convert_isodate_to_milis(
                 mt_ret, ['signup_at', 'last_signin_at'])
-        return {'metrics_result': mt_ret}
+        user_details = {'metrics_result': mt_ret}
+        if next_token:
+            user_details['continuation_token'] = next_token
+        return user_details
 
     def get_signup_retn_users(self, requesting_user, params, token,
                               exclude_kbstaff=False):
@@ -699,7 +1130,7 @@ class MetricsMongoDBController:
                 raise ValueError('You do not have permisson to '
                                  'invoke this action.')
 
-        params = self._process_parameters(params)
+        params = self._process_query_parameters(params)
         if exclude_kbstaff:
             kb_list = self._get_kbstaff_list()
             mt_ret = self.metrics_dbi.aggr_signup_retn_users(
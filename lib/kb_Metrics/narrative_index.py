@@ -0,0 +1,241 @@
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+_MAGIC = b'KBMNIDX3'
+# magic, number of entries, number of strings; its 16 bytes keep the int64
+# ws_ids that follow it aligned
+_HEADER = struct.Struct('<8sII')
+_INT64_RANGE = (-2 ** 63, 2 ** 63 - 1)
+
+
+def _version_code(narr_ver, intern):
+    """
+    _version_code--narr_ver as stored in the version array: the number
+    itself, or -1 - the string id of a version that is not a plain number
+    """
+    if narr_ver.isdigit() and str(int(narr_ver)) == narr_ver and \
+            int(narr_ver) < 2 ** 31:
+        return int(narr_ver)
+    return -1 - intern(narr_ver)
+
+
+def write_index(path, name_map):
+    """
+    write_index--write name_map ({ws_id: (ws_nm, narr_nm, narr_ver)}) as an
+    index file at path: the sorted ws_ids, the ids of their names in a
+    table of interned UTF-8 strings and their versions, as flat arrays.
+    The file is written aside and renamed into place, so that readers
+    only ever map a complete one.
+    """
+    str_ids = {}
+    str_offsets = [0]
+    blob = []
+
+    def intern(string):
+        sid = str_ids.get(string)
+        if sid is None:
+            sid = str_ids[string] = len(blob)
+            blob.append(string.encode('utf-8'))
+            str_offsets.append(str_offsets[-1] + len(blob[-1]))
+        return sid
+
+    ws_ids = sorted(name_map)
+    name_ids = []
+    versions = []
+    for ws_id in ws_ids:
+        ws_nm, narr_nm, narr_ver = name_map[ws_id]
+        # a missing name or version is stored as its default, see
+        # MetricsMongoDBController._map_ws_narr_names_list
+        name_ids.extend((intern(ws_nm or ''), intern(narr_nm or '')))
+        versions.append(_version_code(narr_ver or '1', intern))
+
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(ws_ids), len(blob)))
+        f.write(np.array(ws_ids, dtype='<i8').tobytes())
+        f.write(np.array(name_ids, dtype='<u4').tobytes())
+        f.write(np.array(versions, dtype='<i4').tobytes())
+        f.write(np.array(str_offsets, dtype='<u4').tobytes())
+        f.write(b''.join(blob))
+        f.flush()
+        os.fsync(f.fileno())
+    os.rename(tmp_path, path)
+
+
+class IndexTable:
+    '''
+    IndexTable--read-only view of an index file written by write_index.
+    The file is memory-mapped and its arrays are NumPy views of the
+    mapping, so all the processes share the same pages of the OS page
+    cache instead of holding their own copies.
+    '''
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, n_entries, n_strings = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            raise ValueError('{} is not a narrative name index'.format(path))
+
+        pos = _HEADER.size
+        arrays = []
+        for dtype, count in [('<i8', n_entries), ('<u4', 2 * n_entries),
+                             ('<i4', n_entries), ('<u4', n_strings + 1)]:
+            arrays.append(np.frombuffer(self._mm, dtype=dtype, count=count,
+                                        offset=pos))
+            pos += arrays[-1].nbytes
+        self.ws_ids, name_ids, self.versions, self.str_offsets = arrays
+        self.name_ids = name_ids.reshape(n_entries, 2)
+        self._blob_start = pos
+
+    def __len__(self):
+        return len(self.ws_ids)
+
+    def _string(self, sid):
+        start = self._blob_start + int(self.str_offsets[sid])
+        end = self._blob_start + int(self.str_offsets[sid + 1])
+        return self._mm[start:end].decode('utf-8')
+
+    def lookup(self, ws_ids):
+        """
+        lookup--(ws_nm, narr_nm, narr_ver) of each of ws_ids (ints), or None
+        for those not in the index, found with one vectorized search
+        """
+        if not len(self.ws_ids):
+            return [None] * len(ws_ids)
+        # ids beyond int64 cannot be in the index, nor can -1
+        keys = np.array([k if _INT64_RANGE[0] <= k <= _INT64_RANGE[1] else -1
+                         for k in ws_ids], dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.ws_ids, keys),
+                         len(self.ws_ids) - 1)
+        found = (self.ws_ids[pos] == keys).tolist()
+        name_ids = self.name_ids[pos].tolist()
+        versions = self.versions[pos].tolist()
+
+        strings = {}  # each distinct string is decoded once
+
+        def string(sid):
+            if sid not in strings:
+                strings[sid] = self._string(sid)
+            return strings[sid]
+
+        ret = []
+        for i, is_found in enumerate(found):
+            if not is_found:
+                ret.append(None)
+                continue
+            ver = versions[i]
+            ret.append((string(name_ids[i][0]), string(name_ids[i][1]),
+                        str(ver) if ver >= 0 else string(-1 - ver)))
+        return ret
+
+    def get(self, ws_id):
+        """
+        get--(ws_nm, narr_nm, narr_ver) of ws_id, or None
+        """
+        return self.lookup([ws_id])[0]
+
+    def memory_footprint(self):
+        """
+        memory_footprint--the sizes of the index: its number of entries and
+        of distinct strings, and the bytes mapped (shared by all processes)
+        """
+        return {'entries': len(self.ws_ids),
+                'strings': len(self.str_offsets) - 1,
+                'mapped_bytes': len(self._mm)}
+
+
+class NarrativeNameIndex:
+    '''
+    NarrativeNameIndex--the narrative names by ws_id, shared by the server
+    processes through an index file. The file is rebuilt from loader()
+    (a {ws_id: (ws_nm, narr_nm, narr_ver)} dict) once it is refresh_secs
+    old, by one process at a time; each process swaps the new file in
+    from a background thread.
+    '''
+
+    def __init__(self, path, loader, refresh_secs=1800):
+        self.path = path
+        self.loader = loader
+        self.refresh_secs = refresh_secs
+        self._table = None
+        self._file_id = None
+        self._lock = threading.Lock()
+
+    def _current(self):
+        table = self._table
+        if table is None:
+            with self._lock:
+                if self._table is None:
+                    self.refresh()
+                    refresher = threading.Thread(target=self._refresh_loop)
+                    refresher.daemon = True
+                    refresher.start()
+                table = self._table
+        return table
+
+    def get(self, ws_id):
+        """
+        get--(ws_nm, narr_nm, narr_ver) of ws_id, or None
+        """
+        return self._current().get(ws_id)
+
+    def lookup(self, ws_ids):
+        """
+        lookup--(ws_nm, narr_nm, narr_ver) of each of ws_ids, or None
+        """
+        return self._current().lookup(ws_ids)
+
+    def memory_footprint(self):
+        return self._current().memory_footprint()
+
+    def __len__(self):
+        return len(self._current())
+
+    def _is_stale(self):
+        try:
+            if time.time() - os.stat(self.path).st_mtime >= self.refresh_secs:
+                return True
+            # or written in another format
+            with open(self.path, 'rb') as f:
+                return f.read(len(_MAGIC)) != _MAGIC
+        except (OSError, IOError):
+            return True
+
+    def refresh(self):
+        """
+        refresh--rebuild the index file if it is missing or stale (while
+        the other processes wait on the lock for it) and swap it in
+        """
+        with open(self.path + '.lock', 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if self._is_stale():
+                    write_index(self.path, self.loader())
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+        st = os.stat(self.path)
+        file_id = (st.st_ino, st.st_mtime)
+        if file_id != self._file_id:
+            # readers still holding the old table keep their own mapping
+            self._table = IndexTable(self.path)
+            self._file_id = file_id
+            logging.info('narrative name index loaded: {}'.format(
+                self._table.memory_footprint()))
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(min(self.refresh_secs, 60))
+            try:
+                self.refresh()
+            except Exception as e:
+                logging.warning('narrative name index refresh failed: '
+                                '{}'.format(e))
@@ -15,14 +15,25 @@ import us.kbase.common.service.Tuple2;
 
 /**
  * <p>Original spec-file type: AppMetricsParams</p>
- * 
+ * <pre>
+ * limit - the most job states to return (default 0 for all of them);
+ *     when there are more, the result has a continuation_token
+ * continuation_token - the continuation_token of the previous page,
+ *     to get the next one (with the same user_ids and epoch_range)
+ * fields - the fields of the job states to return (e.g., job_id,
+ *     status, app_id, creation_time); all of them by default. Only the
+ *     data the given fields are assembled from is read.
+ * </pre>
  * 
  */
 @JsonInclude(JsonInclude.Include.NON_NULL)
 @Generated("com.googlecode.jsonschema2pojo")
 @JsonPropertyOrder({
     "user_ids",
-    "epoch_range"
+    "epoch_range",
+    "limit",
+    "continuation_token",
+    "fields"
 })
 public class AppMetricsParams {
 
@@ -30,6 +41,12 @@ public class AppMetricsParams {
     private List<String> userIds;
     @JsonProperty("epoch_range")
     private Tuple2 <Long, Long> epochRange;
+    @JsonProperty("limit")
+    private java.lang.Long limit;
+    @JsonProperty("continuation_token")
+    private java.lang.String continuationToken;
+    @JsonProperty("fields")
+    private List<String> fields;
     private Map<java.lang.String, Object> additionalProperties = new HashMap<java.lang.String, Object>();
 
     @JsonProperty("user_ids")
@@ -62,6 +79,51 @@ public class AppMetricsParams {
         return this;
     }
 
+    @JsonProperty("limit")
+    public java.lang.Long getLimit() {
+        return limit;
+    }
+
+    @JsonProperty("limit")
+    public void setLimit(java.lang.Long limit) {
+        this.limit = limit;
+    }
+
+    public AppMetricsParams withLimit(java.lang.Long limit) {
+        this.limit = limit;
+        return this;
+    }
+
+    @JsonProperty("continuation_token")
+    public java.lang.String getContinuationToken() {
+        return continuationToken;
+    }
+
+    @JsonProperty("continuation_token")
+    public void setContinuationToken(java.lang.String continuationToken) {
+        this.continuationToken = continuationToken;
+    }
+
+    public AppMetricsParams withContinuationToken(java.lang.String continuationToken) {
+        this.continuationToken = continuationToken;
+        return this;
+    }
+
+    @JsonProperty("fields")
+    public List<String> getFields() {
+        return fields;
+    }
+
+    @JsonProperty("fields")
+    public void setFields(List<String> fields) {
+        this.fields = fields;
+    }
+
+    public AppMetricsParams withFields(List<String> fields) {
+        this.fields = fields;
+        return this;
+    }
+
     @JsonAnyGetter
     public Map<java.lang.String, Object> getAdditionalProperties() {
         return this.additionalProperties;
@@ -74,7 +136,7 @@ public class AppMetricsParams {
 
     @Override
     public java.lang.String toString() {
-        return ((((((("AppMetricsParams"+" [userIds=")+ userIds)+", epochRange=")+ epochRange)+", additionalProperties=")+ additionalProperties)+"]");
+        return ((((((((((((("AppMetricsParams"+" [userIds=")+ userIds)+", epochRange=")+ epochRange)+", limit=")+ limit)+", continuationToken=")+ continuationToken)+", fields=")+ fields)+", additionalProperties=")+ additionalProperties)+"]");
     }
 
 }
@@ -14,13 +14,17 @@ import us.kbase.common.service.UObject;
 
 /**
  * <p>Original spec-file type: AppMetricsResult</p>
- * 
+ * <pre>
+ * continuation_token - set when there are job states left after this
+ *     page, see AppMetricsParams
+ * </pre>
  * 
  */
 @JsonInclude(JsonInclude.Include.NON_NULL)
 @Generated("com.googlecode.jsonschema2pojo")
 @JsonPropertyOrder({
-    "job_states"
+    "job_states",
+    "continuation_token"
 })
 public class AppMetricsResult {
 
@@ -43,6 +47,21 @@ public class AppMetricsResult {
         return this;
     }
 
+    @JsonProperty("continuation_token")
+    public java.lang.String getContinuationToken() {
+        return continuationToken;
+    }
+
+    @JsonProperty("continuation_token")
+    public void setContinuationToken(java.lang.String continuationToken) {
+        this.continuationToken = continuationToken;
+    }
+
+    public AppMetricsResult withContinuationToken(java.lang.String continuationToken) {
+        this.continuationToken = continuationToken;
+        return this;
+    }
+
     @JsonAnyGetter
     public Map<String, Object> getAdditionalProperties() {
         return this.additionalProperties;
@@ -55,7 +74,7 @@ public class AppMetricsResult {
 
     @Override
     public String toString() {
-        return ((((("AppMetricsResult"+" [jobStates=")+ jobStates)+", additionalProperties=")+ additionalProperties)+"]");
+        return ((((((("AppMetricsResult"+" [jobStates=")+ jobStates)+", continuationToken=")+ continuationToken)+", additionalProperties=")+ additionalProperties)+"]");
     }
 
 }
@@ -17,6 +17,15 @@ import us.kbase.common.service.Tuple2;
  * <p>Original spec-file type: MetricsInputParams</p>
  * <pre>
  * unified input/output parameters
+ * incremental - used by update_metrics only; if set to 1, each update
+ *     phase only processes the data recorded after its last successful
+ *     checkpoint instead of the whole epoch_range (default 0)
+ * limit, continuation_token - used by get_user_details and
+ *     get_nonkbuser_details only; page through the users as the
+ *     AppMetricsParams ones do through the job states
+ * fields - used by get_user_details and get_nonkbuser_details only;
+ *     the fields of the users to return (e.g., username, signup_at);
+ *     all of them by default
  * </pre>
  * 
  */
@@ -24,7 +33,11 @@ import us.kbase.common.service.Tuple2;
 @Generated("com.googlecode.jsonschema2pojo")
 @JsonPropertyOrder({
     "user_ids",
-    "epoch_range"
+    "epoch_range",
+    "incremental",
+    "limit",
+    "continuation_token",
+    "fields"
 })
 public class MetricsInputParams {
 
@@ -32,6 +45,14 @@ public class MetricsInputParams {
     private List<String> userIds;
     @JsonProperty("epoch_range")
     private Tuple2 <Long, Long> epochRange;
+    @JsonProperty("incremental")
+    private Long incremental;
+    @JsonProperty("limit")
+    private java.lang.Long limit;
+    @JsonProperty("continuation_token")
+    private java.lang.String continuationToken;
+    @JsonProperty("fields")
+    private List<String> fields;
     private Map<java.lang.String, Object> additionalProperties = new HashMap<java.lang.String, Object>();
 
     @JsonProperty("user_ids")
@@ -64,6 +85,66 @@ public class MetricsInputParams {
         return this;
     }
 
+    @JsonProperty("incremental")
+    public Long getIncremental() {
+        return incremental;
+    }
+
+    @JsonProperty("incremental")
+    public void setIncremental(Long incremental) {
+        this.incremental = incremental;
+    }
+
+    public MetricsInputParams withIncremental(Long incremental) {
+        this.incremental = incremental;
+        return this;
+    }
+
+    @JsonProperty("limit")
+    public java.lang.Long getLimit() {
+        return limit;
+    }
+
+    @JsonProperty("limit")
+    public void setLimit(java.lang.Long limit) {
+        this.limit = limit;
+    }
+
+    public MetricsInputParams withLimit(java.lang.Long limit) {
+        this.limit = limit;
+        return this;
+    }
+
+    @JsonProperty("continuation_token")
+    public java.lang.String getContinuationToken() {
+        return continuationToken;
+    }
+
+    @JsonProperty("continuation_token")
+    public void setContinuationToken(java.lang.String continuationToken) {
+        this.continuationToken = continuationToken;
+    }
+
+    public MetricsInputParams withContinuationToken(java.lang.String continuationToken) {
+        this.continuationToken = continuationToken;
+        return this;
+    }
+
+    @JsonProperty("fields")
+    public List<String> getFields() {
+        return fields;
+    }
+
+    @JsonProperty("fields")
+    public void setFields(List<String> fields) {
+        this.fields = fields;
+    }
+
+    public MetricsInputParams withFields(List<String> fields) {
+        this.fields = fields;
+        return this;
+    }
+
     @JsonAnyGetter
     public Map<java.lang.String, Object> getAdditionalProperties() {
         return this.additionalProperties;
@@ -76,7 +157,7 @@ public class MetricsInputParams {
 
     @Override
     public java.lang.String toString() {
-        return ((((((("MetricsInputParams"+" [userIds=")+ userIds)+", epochRange=")+ epochRange)+", additionalProperties=")+ additionalProperties)+"]");
+        return ((((((((((((((("MetricsInputParams"+" [userIds=")+ userIds)+", epochRange=")+ epochRange)+", incremental=")+ incremental)+", limit=")+ limit)+", continuationToken=")+ continuationToken)+", fields=")+ fields)+", additionalProperties=")+ additionalProperties)+"]");
     }
 
 }
@@ -14,13 +14,17 @@ import us.kbase.common.service.UObject;
 
 /**
  * <p>Original spec-file type: MetricsOutput</p>
- * 
+ * <pre>
+ * continuation_token - set when there are records left after this
+ *     page, see MetricsInputParams
+ * </pre>
  * 
  */
 @JsonInclude(JsonInclude.Include.NON_NULL)
 @Generated("com.googlecode.jsonschema2pojo")
 @JsonPropertyOrder({
-    "metrics_result"
+    "metrics_result",
+    "continuation_token"
 })
 public class MetricsOutput {
 
@@ -43,6 +47,21 @@ public class MetricsOutput {
         return this;
     }
 
+    @JsonProperty("continuation_token")
+    public java.lang.String getContinuationToken() {
+        return continuationToken;
+    }
+
+    @JsonProperty("continuation_token")
+    public void setContinuationToken(java.lang.String continuationToken) {
+        this.continuationToken = continuationToken;
+    }
+
+    public MetricsOutput withContinuationToken(java.lang.String continuationToken) {
+        this.continuationToken = continuationToken;
+        return this;
+    }
+
     @JsonAnyGetter
     public Map<String, Object> getAdditionalProperties() {
         return this.additionalProperties;
@@ -55,7 +74,7 @@ public class MetricsOutput {
 
     @Override
     public String toString() {
-        return ((((("MetricsOutput"+" [metricsResult=")+ metricsResult)+", additionalProperties=")+ additionalProperties)+"]");
+        return ((((((("MetricsOutput"+" [metricsResult=")+ metricsResult)+", continuationToken=")+ continuationToken)+", additionalProperties=")+ additionalProperties)+"]");
     }
 
 }
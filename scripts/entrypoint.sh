@@ -15,6 +15,8 @@ elif [ "${1}" = "test" ] ; then
   make test
 elif [ "${1}" = "async" ] ; then
   sh ./scripts/run_async.sh
+elif [ "${1}" = "ingest" ] ; then
+  sh ./scripts/run_ingester.sh
 elif [ "${1}" = "init" ] ; then
   echo "Initialize module"
 elif [ "${1}" = "bash" ] ; then
@@ -0,0 +1,4 @@
+script_dir=$(dirname "$(readlink -f "$0")")
+export KB_DEPLOYMENT_CONFIG=$script_dir/../deploy.cfg
+export PYTHONPATH=$script_dir/../lib:$PYTHONPATH
+python -u $script_dir/../lib/kb_Metrics/metrics_ingester.py
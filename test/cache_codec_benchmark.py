@@ -0,0 +1,63 @@
+"""
+Compares the cache codecs on the test/db_files fixtures: the time to encode
+and decode each collection's records and the size of their payloads.
+The JSON codec cannot encode the datetimes/ObjectIds of the records, so
+it is measured on them rendered as extended JSON (bson.json_util) as the
+closest JSON equivalent; as its decoding leaves the {"$date": ...} and
+{"$oid": ...} documents as they are, its decode times are a lower bound.
+
+    PYTHONPATH=lib python test/cache_codec_benchmark.py [repeats]
+"""
+import glob
+import json
+import os
+import sys
+import timeit
+
+from bson import json_util
+
+from kb_Metrics.cache_codec import JsonCodec, MsgpackCodec
+
+DB_FILES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_files')
+
+
+def _time_ms(func, repeats):
+    return min(timeit.repeat(func, number=1, repeat=repeats)) * 1000
+
+
+def benchmark(records, repeats):
+    """
+    benchmark--{codec name: (encode ms, decode ms, payload bytes)} of
+    records; the codecs have to give them back unchanged
+    """
+    json_records = json.loads(json_util.dumps(records))
+    codecs = [('json (extended)', JsonCodec(), json_records),
+              ('msgpack', MsgpackCodec(compress_min_bytes=float('inf')),
+               records),
+              ('msgpack+zstd', MsgpackCodec(), records)]
+    results = {}
+    for name, codec, value in codecs:
+        payload = codec.encode(value)
+        assert codec.decode(payload) == value, name
+        results[name] = (_time_ms(lambda: codec.encode(value), repeats),
+                         _time_ms(lambda: codec.decode(payload), repeats),
+                         len(payload))
+    return results
+
+
+def main(repeats=20):
+    row = '{:<42} {:<16} {:>10} {:>10} {:>10}'
+    print(row.format('fixture', 'codec', 'enc ms', 'dec ms', 'bytes'))
+    for path in sorted(glob.glob(os.path.join(DB_FILES, '*.json'))):
+        with open(path) as f:
+            records = json_util.loads(f.read())
+        results = benchmark(records, repeats)
+        for name in sorted(results):
+            enc_ms, dec_ms, n_bytes = results[name]
+            print(row.format(os.path.basename(path), name,
+                             '{:.2f}'.format(enc_ms), '{:.2f}'.format(dec_ms),
+                             n_bytes))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
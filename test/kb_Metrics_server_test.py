@@ -5,7 +5,10 @@ import json  # noqa: F401
 import time
 import datetime
 import copy
+import threading
+from io import BytesIO
 from bson.objectid import ObjectId
+from bson.tz_util import utc
 from pymongo import MongoClient
 from mock import patch
 from os import environ
@@ -14,14 +17,25 @@ try:
 except ImportError:
     from configparser import ConfigParser  # py3
 
-from pymongo.errors import WriteError, ConfigurationError
+from pymongo.errors import (WriteError, ConfigurationError, BulkWriteError,
+                            OperationFailure)
+from pymongo.results import BulkWriteResult
 
 from installed_clients.WorkspaceClient import Workspace as workspaceService
 from kb_Metrics.kb_MetricsImpl import kb_Metrics
-from kb_Metrics.kb_MetricsServer import MethodContext
+from kb_Metrics.kb_MetricsServer import (MethodContext, JSONObjectEncoder,
+                                         JSONRPCServiceCustom,
+                                         StreamingJSONEncoder, _chunked,
+                                         application)
 from kb_Metrics.authclient import KBaseAuth as _KBaseAuth
 from kb_Metrics.metricsdb_controller import MetricsMongoDBController
 from kb_Metrics.metrics_dbi import MongoMetricsDBI
+from kb_Metrics.metrics_ingester import WorkspaceChangeIngester
+from kb_Metrics import metrics_cache
+from kb_Metrics.metrics_cache import LRUCache, cache_it
+from kb_Metrics.cache_codec import JsonCodec, MsgpackCodec
+from kb_Metrics.narrative_index import (NarrativeNameIndex, IndexTable,
+                                        write_index)
 from kb_Metrics.Util import _unix_time_millis_from_datetime
 
 
@@ -60,20 +74,45 @@ class kb_MetricsTest(unittest.TestCase):
         cls.client = MongoClient(port=27017)
         cls.init_mongodb()
 
+    def setUp(self):
+        # the tests change the db contents, so start each from a cold cache
+        metrics_cache.clear()
+
     @classmethod
     def tearDownClass(cls):
         if hasattr(cls, 'wsName'):
             cls.wsClient.delete_workspace({'workspace': cls.wsName})
             print('Test workspace was deleted')
 
+    @classmethod
+    def _init_replica_set(cls, client, timeout=30):
+        """
+        _init_replica_set: make the local mongod (started with a replSetName,
+        see the Dockerfile) the primary of its single-node replica set, for
+        the change streams; a mongod run without one is left as it is
+        """
+        try:
+            client.admin.command('replSetInitiate')
+        except OperationFailure as e:
+            # already initiated, or not started as a replica set member
+            print('replSetInitiate: {}'.format(e))
+        if not client.admin.command('isMaster').get('setName'):
+            return
+        deadline = time.time() + timeout
+        while not client.admin.command('isMaster').get('ismaster'):
+            if time.time() > deadline:
+                raise RuntimeError('the local replica set has no primary')
+            time.sleep(0.5)
+
     @classmethod
     def init_mongodb(cls):
         print('starting to build local mongoDB')
 
-        os.system("sudo service mongodb start")
+        os.system("sudo service mongod start")
         os.system("mongod --version")
-        os.system("cat /var/log/mongodb/mongodb.log "
+        os.system("cat /var/log/mongodb/mongod.log "
                   "| grep 'waiting for connections on port 27017'")
+        cls._init_replica_set(cls.client)
 
         cls._insert_data(cls.client, 'workspace', 'workspaces')
         cls._insert_data(cls.client, 'exec_engine', 'exec_tasks')
@@ -263,6 +302,11 @@ class kb_MetricsTest(unittest.TestCase):
                          '5968e5fde4b08b65f9ff5d7d')
         self.assertEqual(exec_tasks[2]['job_input']['wsid'], 23165)
 
+        # the same tasks streamed in the order sorted on the server
+        tasks_iter = dbi.iter_exec_tasks(min_time, max_time)
+        self.assertFalse(isinstance(tasks_iter, list))
+        self.assertEqual(list(tasks_iter), exec_tasks)
+
     # Uncomment to skip this test
     # @unittest.skip("skipped MetricsMongoDBs_list_user_objects_from_wsobjs")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -331,6 +375,12 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertIn(ws_owners[1]['username'], 'jplfaria')
         self.assertIn(ws_owners[1]['name'], 'jplfaria:1464632279763')
 
+        # testing owners of the given workspaces only
+        ws_owners = dbi.list_ws_owners([7645, 27834, 99999999])
+        self.assertEqual(len(ws_owners), 2)
+        self.assertEqual({wo['ws_id']: wo['username'] for wo in ws_owners},
+                         {7645: 'jplfaria', 27834: 'psdehal'})
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_MetricsMongoDBs_aggr_user_details")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -364,6 +414,12 @@ class kb_MetricsTest(unittest.TestCase):
         users = dbi.aggr_user_details(user_list0, min_time, max_time)
         self.assertEqual(len(users), 37)
 
+        # sorted by signup time on the server, and streamed the same
+        signups = [u['signup_at'] for u in users]
+        self.assertEqual(signups, sorted(signups))
+        self.assertEqual(list(dbi.iter_user_details(user_list0, min_time,
+                                                    max_time)), users)
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_MetricsMongoDBs_aggr_signup_retn_users")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -736,6 +792,177 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertEqual(users[2]['numOfUsers'], 6)
         self.assertEqual(users[3]['numOfUsers'], 9)
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBs_aggr_unique_users_per_day_cache")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    def test_MetricsMongoDBs_aggr_unique_users_per_day_cache(self):
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        min_time = 1483228800000  # 2017-1-1
+        max_time = 1522454400000
+        # none of the days cached
+        metrics_cache.bump_namespaces('metrics.daily_activities')
+        users = dbi.aggr_unique_users_per_day(min_time, max_time)
+
+        def from_day(min_t, max_t):
+            with patch.object(dbi, '_unique_users_day_rows',
+                              wraps=dbi._unique_users_day_rows) as mock_rows, \
+                    patch.object(metrics_cache, 'get_values',
+                                 wraps=metrics_cache.get_values) as mock_get:
+                self.assertEqual(dbi.aggr_unique_users_per_day(min_t, max_t),
+                                 users if max_t == max_time else
+                                 [u for u in users
+                                  if u['yyyy-mm-dd'].startswith('2017-')])
+            # the cached days are read in a single lookup
+            self.assertEqual(mock_get.call_count, 1)
+            return mock_rows.call_args[0][3]
+
+        # the days that are over are all served from the cache
+        self.assertEqual(from_day(min_time, max_time),
+                         datetime.datetime(2019, 1, 1))
+
+        # only the days from the first one not cached on are aggregated
+        metrics_cache.bump_namespaces('metrics.daily_activities')
+        self.assertIsNone(from_day(min_time, min_time))
+        self.assertEqual(from_day(min_time, max_time),
+                         datetime.datetime(2018, 1, 1))
+        self.assertEqual(from_day(min_time, max_time),
+                         datetime.datetime(2019, 1, 1))
+
+        # an update of the daily activities invalidates the cached days
+        metrics_cache.bump_namespaces('metrics.daily_activities')
+        self.assertIsNone(from_day(min_time, max_time))
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBs_ws_month_rows")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    def test_MetricsMongoDBs_ws_month_rows(self):
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        time_range = {'$gte': datetime.datetime(2015, 1, 1, 12),
+                      '$lte': datetime.datetime(2018, 4, 30)}
+
+        tot_logins = dbi._ws_month_rows('total_logins', [], None,
+                                        [time_range])
+        self.assertEqual(len(tot_logins), 4)
+        self.assertIn({'_id': {'year': 2016, 'month': 7},
+                       'year_mon_total_logins': 26}, tot_logins)
+
+        def assert_sorted(metric, rows):
+            # in the order {"$sort": {"_id": 1}} compares the _id fields in
+            keys = [[row['_id'][f] for f in dbi._WS_MONTH_AGGRS[metric][0]]
+                    for row in rows]
+            self.assertEqual(keys, sorted(keys))
+
+        assert_sorted('total_logins', tot_logins)
+
+        # a modified workspace moves to the month of its new moddate
+        ws_coll = dbi.metricsDBs['workspace']['workspaces']
+        moddate = ws_coll.find_one({'ws': 8737})['moddate']
+        ws_coll.update_one({'ws': 8737}, {'$set': {
+            'moddate': datetime.datetime(2018, 4, 2)}})
+        try:
+            self.assertIn({'_id': {'year': 2016, 'month': 7},
+                           'year_mon_total_logins': 25},
+                          dbi._ws_month_rows('total_logins', [], None,
+                                             [time_range]))
+        finally:
+            ws_coll.update_one({'ws': 8737}, {'$set': {'moddate': moddate}})
+        self.assertEqual(dbi._ws_month_rows('total_logins', [], None,
+                                            [time_range]),
+                         tot_logins)
+
+        assert_sorted('user_stats', dbi._ws_month_rows('user_stats', [], None,
+                                                       [time_range]))
+        usr_logins = dbi._ws_month_rows('user_stats', ['qzhang'], None,
+                                        [time_range])
+        for ul in usr_logins:
+            self.assertEqual(ul['_id']['username'], 'qzhang')
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_run_MetricsMongoDBs_update_ws_rollup")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    def test_run_MetricsMongoDBs_update_ws_rollup(self):
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        db_rollup = dbi.metricsDBs['metrics']['monthly_user_ws_rollup']
+        db_ckpts = dbi.metricsDBs['metrics']['update_checkpoints']
+        min_time = datetime.datetime(2015, 1, 1, 12)
+        max_time = datetime.datetime(2018, 4, 30)
+        metrics = ['total_logins', 'user_stats']
+        time_range = {'$gte': min_time, '$lte': max_time}
+        expected = dict((m, dbi._ws_month_rows(m, [], None, [time_range]))
+                        for m in metrics)
+
+        # only the whole months that are over are rolled up
+        self.assertTrue(dbi.update_ws_rollup(min_time, max_time) > 0)
+        rolled_up = dbi.get_rollup_months()
+        self.assertIn((2015, 1), rolled_up)
+        self.assertIn((2016, 7), rolled_up)
+        self.assertIn((2018, 3), rolled_up)
+        self.assertNotIn((2018, 4), rolled_up)
+        self.assertEqual(dbi.update_ws_rollup(
+            datetime.datetime(2018, 4, 2), max_time), 0)
+        ws_rollup = db_rollup.find_one({'_id.username': 'eapearson',
+                                        '_id.year': 2016, '_id.month': 7})
+        self.assertIn({'_id': {'username': 'eapearson', 'year': 2016,
+                               'month': 7},
+                       'numWs': ws_rollup['numWs'],
+                       'numObjs': ws_rollup['numObjs']},
+                      expected['user_stats'])
+
+        # the rolled up months are read from the rollup and the partial
+        # first and last ones counted on the workspaces, in one aggregation
+        for m in metrics:
+            with patch.object(dbi, '_ws_month_rows',
+                              wraps=dbi._ws_month_rows) as mock_rows:
+                self.assertEqual(
+                    dbi._aggr_ws_monthly(m, [], min_time, max_time),
+                    expected[m])
+                self.assertEqual(
+                    [c[0][3] for c in mock_rows.call_args_list],
+                    [[{'$gte': min_time,
+                       '$lte': datetime.datetime(2015, 2, 1) -
+                       datetime.timedelta(milliseconds=1)},
+                      {'$gte': datetime.datetime(2018, 4, 1),
+                       '$lte': max_time}]])
+
+        self.assertEqual(
+            dbi._aggr_ws_monthly('total_logins', [], min_time, max_time,
+                                 ['eapearson']),
+            dbi._ws_month_rows('total_logins', [], ['eapearson'],
+                               [time_range]))
+        usr_ws = dbi._aggr_ws_monthly('user_stats', ['eapearson'],
+                                      min_time, max_time)
+        self.assertTrue(usr_ws)
+        for uw in usr_ws:
+            self.assertEqual(uw['_id']['username'], 'eapearson')
+
+        # a workspace modified since has moved out of its rolled up month,
+        # which is recounted on the next rollup whatever its time range
+        july = (datetime.datetime(2016, 7, 1),
+                datetime.datetime(2016, 8, 1) -
+                datetime.timedelta(milliseconds=1))
+        ws_coll = dbi.metricsDBs['workspace']['workspaces']
+        moddate = ws_coll.find_one({'ws': 8737})['moddate']
+        ws_coll.update_one({'ws': 8737},
+                           {'$set': {'moddate': datetime.datetime.utcnow()}})
+        try:
+            self.assertTrue(dbi.update_ws_rollup(
+                datetime.datetime(2018, 4, 2), max_time) > 0)
+            ws_rollup = db_rollup.find_one({'_id.username': 'eapearson',
+                                            '_id.year': 2016,
+                                            '_id.month': 7})
+            self.assertEqual(ws_rollup['ws_ids'], [8468])
+            self.assertIn({'_id': {'username': 'eapearson', 'year': 2016,
+                                   'month': 7},
+                           'numWs': 1, 'numObjs': 95},
+                          dbi._aggr_ws_monthly('user_stats', [], *july))
+            self.assertEqual(dbi.update_ws_rollup(
+                datetime.datetime(2018, 4, 2), max_time), 0)
+        finally:
+            ws_coll.update_one({'ws': 8737}, {'$set': {'moddate': moddate}})
+
+        db_rollup.drop()
+        db_ckpts.delete_one({'_id': dbi._WS_ROLLUP_MONTHS})
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_update_user_records_WriteError")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -811,6 +1038,54 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertEqual(murecord['last_signin_at'], dt2)
         self.assertEqual(murecord['kbase_staff'], isKBstaff)
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBs_bulk_update_user_records")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    def test_MetricsMongoDBs_bulk_update_user_records(self):
+        dt1 = datetime.datetime(2018, 3, 12, 1, 13, 30)
+        dt2 = datetime.datetime(2018, 3, 12, 1, 35, 30)
+        user_records = []
+        for i in range(5):
+            upd_filter_set = {'username': 'test_bu{}'.format(i),
+                              'email': 'test_be{}'.format(i)}
+            upd_data_set = {'full_name': 'test_bnm{}'.format(i),
+                            'roles': [], 'signup_at': dt1,
+                            'last_signin_at': dt2}
+            user_records.append((upd_filter_set, upd_data_set, i == 0))
+
+        # records do not exist (yet)
+        db_mu = self.client.metrics.users
+        for upd_filter_set, _, _ in user_records:
+            assert db_mu.find_one(upd_filter_set) is None
+
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        # testing freshly upserted result, written in batches of 2
+        upd_ret = dbi.bulk_update_user_records(user_records, batch_size=2)
+        self.assertEqual(upd_ret, (0, 5))
+
+        murecord = db_mu.find_one({'username': 'test_bu0',
+                                   'email': 'test_be0'})
+        self.assertEqual(murecord['full_name'], 'test_bnm0')
+        self.assertEqual(murecord['signup_at'], dt1)
+        self.assertEqual(murecord['last_signin_at'], dt2)
+        self.assertTrue(murecord['kbase_staff'])
+        self.assertIn('recordLastUpdated', murecord)
+
+        # testing updating existing records, recordLastUpdated is always reset
+        dt3 = datetime.datetime(2018, 3, 13, 1, 35, 30)
+        user_records[1][1]['last_signin_at'] = dt3
+        user_records[3][1]['last_signin_at'] = dt3
+        upd_ret = dbi.bulk_update_user_records(user_records, batch_size=2)
+        self.assertEqual(upd_ret, (5, 0))
+
+        murecord = db_mu.find_one({'username': 'test_bu3',
+                                   'email': 'test_be3'})
+        self.assertEqual(murecord['last_signin_at'], dt3)
+        self.assertFalse(murecord['kbase_staff'])
+
+        # testing empty input
+        self.assertEqual(dbi.bulk_update_user_records([]), (0, 0))
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_MetricsMongoDBs_insert_activity_records")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -1006,6 +1281,87 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertEqual(db_mda.find_one(
             upd_filter_set2)['obj_numModified'], 93)
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBs_bulk_update_activity_records")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    def test_MetricsMongoDBs_bulk_update_activity_records(self):
+        # Fake data, the first and the last records share the same key
+        upd_filter_set1 = {'_id': {'username': 'qz',
+                                   'ws_id': 20199981,
+                                   'year_mod': 2019,
+                                   'month_mod': 1,
+                                   'day_mod': 1}}
+        upd_filter_set2 = {'_id': {'username': 'qz',
+                                   'ws_id': 20199982,
+                                   'year_mod': 2019,
+                                   'month_mod': 1,
+                                   'day_mod': 2}}
+        upd_filter_set3 = {'_id': {'username': 'qz',
+                                   'ws_id': 20199983,
+                                   'year_mod': 2019,
+                                   'month_mod': 1,
+                                   'day_mod': 3}}
+        act_records = [(upd_filter_set1, {'obj_numModified': 81}),
+                       (upd_filter_set2, {'obj_numModified': 82}),
+                       (upd_filter_set3, {'obj_numModified': 83}),
+                       (copy.deepcopy(upd_filter_set1),
+                        {'obj_numModified': 4})]
+
+        db_mda = self.client.metrics.daily_activities
+        assert db_mda.find_one(upd_filter_set1) is None
+        assert db_mda.find_one(upd_filter_set2) is None
+        assert db_mda.find_one(upd_filter_set3) is None
+
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        # testing freshly upserted result with merged counters
+        upd_ret = dbi.bulk_update_activity_records(act_records,
+                                                   batch_size=2)
+        self.assertEqual(upd_ret, (0, 3))
+        self.assertEqual(db_mda.find_one(
+            upd_filter_set1)['obj_numModified'], 85)
+        self.assertEqual(db_mda.find_one(
+            upd_filter_set2)['obj_numModified'], 82)
+        self.assertEqual(db_mda.find_one(
+            upd_filter_set3)['obj_numModified'], 83)
+
+        # testing updating existing record
+        upd_ret = dbi.bulk_update_activity_records(
+            [(upd_filter_set2, {'obj_numModified': 92})])
+        self.assertEqual(upd_ret, (1, 0))
+        self.assertEqual(db_mda.find_one(
+            upd_filter_set2)['obj_numModified'], 92)
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBs_bulk_write_dup_key")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    @patch('pymongo.collection.Collection.bulk_write')
+    def test_MetricsMongoDBs_bulk_write_dup_key(self, mock_bulk):
+        bulk_ret = BulkWriteResult({'nModified': 1, 'nUpserted': 0}, True)
+        mock_bulk.side_effect = [
+            BulkWriteError({'writeErrors': [{'index': 1, 'code': 11000}],
+                            'nModified': 0, 'nUpserted': 1}),
+            bulk_ret]
+
+        act_records = [({'_id': {'ws_id': 1, 'day_mod': 1}},
+                        {'obj_numModified': 1}),
+                       ({'_id': {'ws_id': 1, 'day_mod': 2}},
+                        {'obj_numModified': 2})]
+
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        # the duplicate key failure is retried once as an update
+        upd_ret = dbi.bulk_update_activity_records(act_records)
+        self.assertEqual(upd_ret, (1, 1))
+        self.assertEqual(mock_bulk.call_count, 2)
+        self.assertEqual(len(mock_bulk.call_args_list[1][0][0]), 1)
+
+        # other write errors are raised
+        mock_bulk.reset_mock()
+        mock_bulk.side_effect = BulkWriteError(
+            {'writeErrors': [{'index': 0, 'code': 99999}],
+             'nModified': 0, 'nUpserted': 1})
+        with self.assertRaises(BulkWriteError):
+            dbi.bulk_update_activity_records(act_records)
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_update_narrative_records_WriteError")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -1097,6 +1453,327 @@ class kb_MetricsTest(unittest.TestCase):
                          datetime.datetime(2019, 1, 24, 19, 35, 48, 1000))
         self.assertEqual(mnrecord['numObj'], 7)
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBs_bulk_update_narrative_records")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    def test_MetricsMongoDBs_bulk_update_narrative_records(self):
+        # Fake data
+        dt1 = datetime.datetime(2019, 1, 24, 19, 35, 42)
+        dt2 = datetime.datetime(2019, 1, 24, 19, 35, 48, 1000)
+        narr_records = []
+        for i in range(3):
+            upd_filter_set = {'object_id': 1,
+                              'object_version': 1,
+                              'workspace_id': 20199971 + i}
+            upd_data_set = {'name': 'qz1:narrative_154835854200{}'.format(i),
+                            'last_saved_at': dt1,
+                            'last_saved_by': 'qz1',
+                            'numObj': i,
+                            'nice_name': 'nice_to_have_{}'.format(i),
+                            'desc': '',
+                            'deleted': False}
+            narr_records.append((upd_filter_set, upd_data_set))
+
+        db_mn = self.client.metrics.narratives
+        for upd_filter_set, _ in narr_records:
+            assert db_mn.find_one(upd_filter_set) is None
+        n_no_access = db_mn.find({'access_count': {'$exists': False}}).count()
+
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        # testing freshly upserted result
+        upd_ret = dbi.bulk_update_narrative_records(narr_records,
+                                                    batch_size=2)
+        self.assertEqual(upd_ret, (0, 3))
+        for upd_filter_set, upd_data_set in narr_records:
+            mnrecord = db_mn.find_one(upd_filter_set)
+            self.assertEqual(mnrecord['nice_name'],
+                             upd_data_set['nice_name'])
+            self.assertEqual(mnrecord['first_access'], dt1)
+            self.assertEqual(mnrecord['access_count'], 1)
+
+        # testing updating existing records
+        narr_records[0][1]['last_saved_at'] = dt2
+        upd_ret = dbi.bulk_update_narrative_records(narr_records[:1])
+        self.assertEqual(upd_ret, (1, 0))
+        mnrecord = db_mn.find_one(narr_records[0][0])
+        self.assertEqual(mnrecord['last_saved_at'], dt2)
+        self.assertEqual(mnrecord['first_access'], dt1)
+        self.assertEqual(mnrecord['access_count'], 2)
+
+        # no other records were touched or created
+        self.assertEqual(
+            db_mn.find({'access_count': {'$exists': False}}).count(),
+            n_no_access)
+        self.assertIsNone(db_mn.find_one({'workspace_id':
+                                          {'$exists': False}}))
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBs_checkpoints")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    def test_MetricsMongoDBs_checkpoints(self):
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        dt1 = datetime.datetime(2019, 2, 1, 10, 0, 0)
+        dt2 = datetime.datetime(2019, 2, 2, 10, 0, 0)
+
+        # no checkpoint recorded yet
+        self.assertIsNone(dbi.get_checkpoint('test_phase'))
+
+        upd_ret = dbi.advance_checkpoint('test_phase', dt1)
+        self.assertTrue(upd_ret.raw_result.get('upserted'))
+        self.assertEqual(dbi.get_checkpoint('test_phase'), dt1)
+
+        # checkpoints only move forward
+        dbi.advance_checkpoint('test_phase', dt2)
+        self.assertEqual(dbi.get_checkpoint('test_phase'), dt2)
+        dbi.advance_checkpoint('test_phase', dt1)
+        self.assertEqual(dbi.get_checkpoint('test_phase'), dt2)
+
+        # other phases are independent
+        self.assertIsNone(dbi.get_checkpoint('test_phase2'))
+        dbi.metricsDBs['metrics']['update_checkpoints'].delete_many(
+            {'_id': 'test_phase'})
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBs_ensure_indexes")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    def test_MetricsMongoDBs_ensure_indexes(self):
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        mt_narrs = dbi.metricsDBs['metrics']['narratives']
+        narr_idx = 'object_id_1_object_version_1_workspace_id_1'
+
+        # all the declared indexes exist after provisioning
+        dbi.ensure_indexes()
+        mt_idx_keys = dict()
+        for coll_name in dbi._MT_INDEXES:
+            mt_idx_keys[coll_name] = [
+                idx['key'] for idx in
+                dbi.metricsDBs['metrics'][coll_name].index_information().values()]
+        for coll_name, idx_keys in dbi._MT_INDEXES.items():
+            for keys in idx_keys:
+                self.assertIn(keys, mt_idx_keys[coll_name])
+
+        # nothing left to create
+        self.assertEqual(dbi.ensure_indexes(), [])
+
+        # a missing index gets rebuilt and reported
+        mt_narrs.drop_index(narr_idx)
+        self.assertEqual(dbi.ensure_indexes(), ['narratives.' + narr_idx])
+        self.assertIn(narr_idx, mt_narrs.index_information())
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_metrics_cache_LRUCache")
+    def test_metrics_cache_LRUCache(self):
+        lru = LRUCache(max_entries=3, max_bytes=100)
+        self.assertIs(lru.get(('f', 'a')), metrics_cache._MISSING)
+
+        # evicted by entry count, least recently used first
+        for k in ['a', 'b', 'c']:
+            lru.put(('f', k), k, 60, 10)
+        self.assertEqual(lru.get(('f', 'a')), 'a')
+        lru.put(('f', 'd'), 'd', 60, 10)
+        self.assertEqual(len(lru), 3)
+        self.assertIs(lru.get(('f', 'b')), metrics_cache._MISSING)
+        self.assertEqual(lru.get(('f', 'a')), 'a')
+
+        # evicted by size; a value over the whole budget is not kept
+        lru.put(('f', 'e'), 'e', 60, 85)
+        self.assertEqual(len(lru), 2)
+        self.assertEqual(lru.get(('f', 'e')), 'e')
+        lru.put(('f', 'big'), 'big', 60, 101)
+        self.assertIs(lru.get(('f', 'big')), metrics_cache._MISSING)
+
+        # clearing drops the stats of the groups too
+        self.assertTrue(lru.group_stats())
+        lru.clear()
+        self.assertEqual(lru.group_stats(), {})
+
+        # a group over its own limit gives up its oldest entry
+        lru.put(('f', 'a'), 'a', 60, 10)
+        lru.put(('g', 'a'), 'a', 60, 10)
+        lru.put(('f', 'b'), 'b', 60, 10, group_limit=1)
+        self.assertIs(lru.get(('f', 'a')), metrics_cache._MISSING)
+        self.assertEqual(lru.get(('g', 'a')), 'a')
+
+        # expired entries are misses, but still there as stale values
+        lru.put(('f', 'x'), 'x', 0.01, 10)
+        time.sleep(0.02)
+        self.assertIs(lru.get(('f', 'x')), metrics_cache._MISSING)
+        self.assertEqual(lru.get_stale(('f', 'x')), 'x')
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_metrics_cache_cache_it")
+    def test_metrics_cache_cache_it(self):
+        class Loader:
+            calls = []
+
+            @cache_it(limit=10, expire=60)
+            def load(self, ws_ids, dt=None):
+                Loader.calls.append(ws_ids)
+                return [{'ws': ws_id, 'names': ('a', 'b')} for ws_id in ws_ids]
+
+        ld1 = Loader()
+        ret1 = ld1.load([1, 2], dt=datetime.datetime(2018, 1, 1))
+        self.assertEqual(len(Loader.calls), 1)
+
+        # a hit, whatever the instance, served from the in-process tier
+        ret2 = Loader().load([1, 2], dt=datetime.datetime(2018, 1, 1))
+        self.assertEqual(len(Loader.calls), 1)
+        self.assertEqual(ret1, ret2)
+        self.assertEqual(ret2[0]['names'], ('a', 'b'))
+
+        # callers get their own copies
+        ret2[0]['ws'] = 100
+        self.assertEqual(ld1.load([1, 2], dt=datetime.datetime(2018, 1, 1))[0]['ws'], 1)
+
+        # different arguments make different entries
+        ld1.load([1, 2], dt=datetime.datetime(2018, 1, 2))
+        self.assertEqual(len(Loader.calls), 2)
+
+        # arguments that cannot be part of a key bypass the cache
+        ld1.load([1, 2], dt=object())
+        ld1.load([1, 2], dt=object())
+        self.assertEqual(len(Loader.calls), 4)
+
+        metrics_cache.clear()
+        ld1.load([1, 2], dt=datetime.datetime(2018, 1, 1))
+        self.assertEqual(len(Loader.calls), 5)
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_metrics_cache_single_flight")
+    def test_metrics_cache_single_flight(self):
+        calls = []
+
+        def loader(value):
+            def load():
+                calls.append(value)
+                time.sleep(0.2)
+                return value
+            return load
+
+        # concurrent misses of a key run its loader only once
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+                       metrics_cache._load('f', 'k', loader([1]), 60)))
+                   for _ in range(5)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        self.assertEqual(calls, [[1]])
+        self.assertEqual(results, [[1]] * 5)
+        self.assertEqual(metrics_cache._flights, {})
+
+        # while an expired key is reloaded, the others get the old value
+        metrics_cache._local.put(('f', 's'), 'old', 0.01, 10)
+        time.sleep(0.02)
+        reload_th = threading.Thread(
+            target=metrics_cache._load, args=('f', 's', loader('new'), 60))
+        reload_th.start()
+        time.sleep(0.05)
+        self.assertEqual(metrics_cache._load('f', 's', loader('new2'), 60),
+                         'old')
+        reload_th.join()
+        self.assertEqual(calls, [[1], 'new'])
+        self.assertEqual(metrics_cache._local.get(('f', 's')), 'new')
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_metrics_cache_namespaces")
+    def test_metrics_cache_namespaces(self):
+        class Loader:
+            calls = 0
+
+            @cache_it(limit=10, expire=60, namespaces=['test.coll'])
+            def load(self, ws_id):
+                Loader.calls += 1
+                return ws_id
+
+        ver = metrics_cache.namespace_versions(['test.coll'])[0]
+        Loader().load(1)
+        Loader().load(1)
+        self.assertEqual(Loader.calls, 1)
+
+        # bumping the namespace makes the cached entries unreachable
+        metrics_cache.bump_namespaces('test.coll')
+        self.assertEqual(metrics_cache.namespace_versions(['test.coll']),
+                         [ver + 1])
+        Loader().load(1)
+        self.assertEqual(Loader.calls, 2)
+
+        # other namespaces are left alone
+        metrics_cache.bump_namespaces('test.other')
+        Loader().load(1)
+        self.assertEqual(Loader.calls, 2)
+
+        # the versions are read from redis at most every few seconds
+        metrics_cache._versions_read.pop('test.coll', None)
+        with patch.object(metrics_cache._remote, 'counters',
+                          return_value=[ver + 5]) as mock_counters:
+            self.assertEqual(metrics_cache.namespace_versions(['test.coll']),
+                             [ver + 5])
+            self.assertEqual(metrics_cache.namespace_versions(['test.coll']),
+                             [ver + 5])
+        self.assertEqual(mock_counters.call_count, 1)
+
+        # without a redis, the entries only live for fallback_expire
+        class ShortLoader:
+            calls = 0
+
+            @cache_it(limit=10, expire=60, namespaces=['test.coll'],
+                      fallback_expire=0.05)
+            def load(self, ws_id):
+                ShortLoader.calls += 1
+                return ws_id
+
+        with patch.object(metrics_cache._remote, 'connection',
+                          return_value=None):
+            ShortLoader().load(1)
+            ShortLoader().load(1)
+            self.assertEqual(ShortLoader.calls, 1)
+            time.sleep(0.1)
+            ShortLoader().load(1)
+            self.assertEqual(ShortLoader.calls, 2)
+
+            metrics_cache.put_values('test.values', [([1], 'a'), ([2], 'b')],
+                                     60, fallback_expire=0.05)
+            self.assertEqual(metrics_cache.get_values(
+                'test.values', [[1], [2], [3]]), ['a', 'b', None])
+            time.sleep(0.1)
+            self.assertEqual(metrics_cache.get_values(
+                'test.values', [[1], [2]]), [None, None])
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_metrics_cache_stats")
+    def test_metrics_cache_stats(self):
+        class Loader:
+            @cache_it(limit=2, expire=60)
+            def load_stats(self, ws_id):
+                return [ws_id] * 10
+
+        func_name = '{}.load_stats'.format(__name__)
+
+        def func_stats():
+            return metrics_cache.stats()['functions'].get(func_name, {})
+
+        before = func_stats()
+        for ws_id in [1, 1, 2, 3]:
+            Loader().load_stats(ws_id)
+        after = func_stats()
+
+        def delta(stat):
+            return after[stat] - before.get(stat, 0)
+
+        self.assertEqual(delta('hits'), 1)
+        self.assertEqual(delta('misses'), 3)
+        self.assertEqual(delta('loads'), 3)
+        # the third ws_id evicted the first from the group of 2
+        self.assertEqual(delta('evictions'), 1)
+        self.assertEqual(after['entries'], 2)
+        self.assertTrue(after['bytes'] > 0)
+        self.assertTrue(after['load_secs'] >= 0)
+
+        status = self.getImpl().status(self.getContext())[0]
+        self.assertIn(func_name, status['cache_stats']['functions'])
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_MetricsMongoDBs_get_user_info")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -1110,6 +1787,10 @@ class kb_MetricsTest(unittest.TestCase):
         # testing get_user_info return data
         users = dbi.get_user_info(user_list0, min_time, max_time)
         self.assertEqual(len(users), 37)
+        signups = [u['signup_at'] for u in users]
+        self.assertEqual(signups, sorted(signups))
+        self.assertEqual(list(dbi.iter_user_info(user_list0, min_time,
+                                                 max_time)), users)
         users = dbi.get_user_info(user_list, min_time, max_time)
         self.assertEqual(len(users), 4)
         self.assertIn('username', users[0])
@@ -1257,6 +1938,18 @@ class kb_MetricsTest(unittest.TestCase):
         for uj in ujs:
             self.assertIn('_id', uj)
 
+        # testing list_ujs_results reading only the given fields (and _id)
+        ujs = dbi.list_ujs_results([], min_time, max_time, ['status'])
+        self.assertEqual(len(ujs), 17)
+        self.assertEqual(ujs[0]['status'], 'queued')
+        for uj in ujs:
+            self.assertIn('_id', uj)
+            self.assertTrue(set(uj) <= set(['_id', 'status']))
+        ujs = dbi.list_ujs_results([], min_time, max_time, [])
+        self.assertEqual(len(ujs), 17)
+        for uj in ujs:
+            self.assertEqual(list(uj), ['_id'])
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_MetricsMongoDBs_list_narrative_info")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -1496,6 +2189,45 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertEqual(min_time_from_today, -2)
         self.assertEqual(max_time_from_today, 0)
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped MetricsMongoDBController_process_query_parameters")
+    def test_MetricsMongoDBController_process_query_parameters(self):
+        # a closed range is kept as is, the user_ids are sorted
+        user_list = ['user_2', 'user_1', 'user_2']
+        params = {'user_ids': user_list,
+                  'epoch_range': ('2018-02-23T00:00:00+0000',
+                                  '2018-02-25T00:00:00+0000')}
+        ret_params = self.db_controller._process_query_parameters(params)
+        self.assertEqual(ret_params['user_ids'], ['user_1', 'user_2'])
+        self.assertEqual(params['user_ids'], user_list)
+        self.assertEqual(ret_params.get('minTime'), 1519344000000)
+        self.assertEqual(ret_params.get('maxTime'), 1519516800000)
+
+        # the default, most recent 48 hours, is aligned to the time bucket
+        bucket_ms = self.db_controller.time_bucket_secs * 1000
+        now_ms = _unix_time_millis_from_datetime(datetime.datetime.utcnow())
+        ret_params1 = self.db_controller._process_query_parameters({})
+        ret_params2 = self.db_controller._process_query_parameters(
+            {'epoch_range': (None, None)})
+        self.assertEqual(ret_params1['minTime'] % bucket_ms, 0)
+        self.assertEqual(ret_params1['maxTime'] % bucket_ms, 0)
+        self.assertGreaterEqual(ret_params1['maxTime'], now_ms)
+        self.assertGreaterEqual(ret_params1['maxTime'] - ret_params1['minTime'],
+                                48 * 3600 * 1000)
+        if ret_params2['maxTime'] == ret_params1['maxTime']:
+            # not straddling a bucket boundary between the two calls
+            self.assertEqual(ret_params2['minTime'], ret_params1['minTime'])
+
+        # no alignment without a time bucket
+        saved_bucket = self.db_controller.time_bucket_secs
+        self.db_controller.time_bucket_secs = 0
+        try:
+            ret_params = self.db_controller._process_query_parameters({})
+            self.assertEqual(ret_params['maxTime'] - ret_params['minTime'],
+                             48 * 3600 * 1000)
+        finally:
+            self.db_controller.time_bucket_secs = saved_bucket
+
     # Uncomment to skip this test
     # @unittest.skip("test _is_admin")
     def test_db_controller_is_admin(self):
@@ -1813,12 +2545,10 @@ class kb_MetricsTest(unittest.TestCase):
             "authparam": "DEFAULT"
         }]
 
-        # make sure the narratimve_name_map exists
-        if self.db_controller.narrative_name_map == {}:
-            self.db_controller.narrative_name_map = self.db_controller._get_narrative_name_map()
+        task_map = self.db_controller._map_exec_tasks(exec_tasks)
         # testing the correct data items appear in the assembled result
         joined_ujs0 = self.db_controller._assemble_ujs_state(ujs_jobs[0],
-                                                             exec_tasks)
+                                                             task_map)
         self.assertEqual(joined_ujs0['wsid'], '15206')
         self.assertNotIn('narrative_name', joined_ujs0)
         self.assertNotIn('narrative_objNo', joined_ujs0)
@@ -1833,7 +2563,7 @@ class kb_MetricsTest(unittest.TestCase):
                          ['workspace_name'])
 
         joined_ujs1 = self.db_controller._assemble_ujs_state(ujs_jobs[1],
-                                                             exec_tasks)
+                                                             task_map)
         self.assertNotIn('wsid', joined_ujs1)
         self.assertEqual(joined_ujs1['app_id'], mthd.replace('.', '/'))
         self.assertEqual(joined_ujs1['method'], mthd)
@@ -1842,7 +2572,7 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertNotIn('workspace_name', joined_ujs1)
 
         joined_ujs2 = self.db_controller._assemble_ujs_state(ujs_jobs[2],
-                                                             exec_tasks)
+                                                             task_map)
         self.assertEqual(joined_ujs2['wsid'], '23165')
         self.assertEqual(joined_ujs2['app_id'],
                          'kb_cufflinks/run_Cuffdiff')
@@ -1855,7 +2585,7 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertIn('client_groups', joined_ujs2)
 
         joined_ujs3 = self.db_controller._assemble_ujs_state(ujs_jobs[3],
-                                                             exec_tasks)
+                                                             task_map)
         et_job_input = exec_tasks[3]["job_input"]
         self.assertEqual(joined_ujs3['wsid'], et_job_input['wsid'])
         self.assertEqual(joined_ujs3['narrative_name'], 'Method Cell Refactor - UI Fixes')
@@ -1868,7 +2598,7 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertIn('workspace_name', joined_ujs3)
 
         joined_ujs4 = self.db_controller._assemble_ujs_state(ujs_jobs[4],
-                                                             exec_tasks)
+                                                             task_map)
         self.assertEqual(joined_ujs4['wsid'], ujs_jobs[4]['authparam'])
         self.assertEqual(joined_ujs4['narrative_name'], 'outx')
         self.assertEqual(joined_ujs4['narrative_objNo'], '1')
@@ -1879,7 +2609,7 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertEqual(joined_ujs4['workspace_name'], 'pranjan77:1466168703797')
 
         joined_ujs5 = self.db_controller._assemble_ujs_state(ujs_jobs[5],
-                                                             exec_tasks)
+                                                             task_map)
         et_job_input = exec_tasks[5]["job_input"]
         etj_params = et_job_input["params"][0]
         etj_methd = et_job_input["method"]
@@ -2003,6 +2733,18 @@ class kb_MetricsTest(unittest.TestCase):
                          ujs_jobs[2]['updated'])
         self.assertIn('client_groups', joined_results[2])
 
+        # the input jobs are left untouched
+        self.assertIn('_id', ujs_jobs[0])
+        self.assertIn('authparam', ujs_jobs[0])
+        self.assertNotIn('job_id', ujs_jobs[0])
+
+        # the first exec_task listed for a ujs_job_id wins
+        task_map = self.db_controller._map_exec_tasks(
+            exec_tasks + [{'ujs_job_id': exec_tasks[0]['ujs_job_id']}])
+        self.assertEqual(len(task_map), len(exec_tasks))
+        self.assertIs(task_map[str(exec_tasks[0]['ujs_job_id'])],
+                      exec_tasks[0])
+
     # Uncomment to skip this test
     # @unittest.skip("skipped_get_client_groups_from_cat")
     def test_db_ontroller_get_client_groups_from_cat(self):
@@ -2016,6 +2758,40 @@ class kb_MetricsTest(unittest.TestCase):
             if target_clnt in clnt['app_id']:
                 self.assertIn(target_clnt, clnt['client_groups'])
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped_map_client_groups")
+    def test_MetricsMongoDBController_map_client_groups(self):
+        client_groups = [
+            {'app_id': 'kb_upload/import_fastq_sra_as_reads_from_web',
+             'client_groups': ['kb_upload']},
+            {'app_id': 'AssemblyRAST/run_arast',
+             'client_groups': ['bigmemlong']},
+            {'app_id': 'assemblyrast/run_arast',
+             'client_groups': ['bigmem']}]
+        clnt_map = self.db_controller._map_client_groups(client_groups)
+        self.assertEqual(len(clnt_map), 2)
+        self.assertEqual(clnt_map['assemblyrast/run_arast'], ['bigmemlong'])
+        self.assertEqual(self.db_controller._map_client_groups(None), {})
+
+        # the assembled job state picks up the mapped client groups
+        ujs = {'_id': '5968cd75e4b08b65f9ff5d7c',
+               'created': 1500046845485, 'updated': 1500046850810,
+               'authstrat': 'DEFAULT', 'authparam': 'DEFAULT',
+               'desc': 'Execution engine job for AssemblyRAST.run_arast',
+               'complete': True, 'error': False}
+        saved_map = self.db_controller.client_groups_map
+        self.db_controller.client_groups_map = clnt_map
+        try:
+            u_j_s = self.db_controller._assemble_ujs_state(ujs, {})
+            self.assertEqual(u_j_s['app_id'], 'AssemblyRAST/run_arast')
+            self.assertEqual(u_j_s['client_groups'], ['bigmemlong'])
+
+            ujs['desc'] = 'Execution engine job for kb_foo.run_foo'
+            u_j_s = self.db_controller._assemble_ujs_state(ujs, {})
+            self.assertEqual(u_j_s['client_groups'], ['njs'])
+        finally:
+            self.db_controller.client_groups_map = saved_map
+
     # Uncomment to skip this test
     # @unittest.skip("skipped_get_activities_from_wsobjs")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -2040,6 +2816,12 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertEqual(user_acts[1]['_id']['day_mod'], 15)
         self.assertEqual(user_acts[1]['obj_numModified'], 21)
 
+        # every activity of a workspace gets the owner, not just the first
+        ws_acts = [act for act in user_acts if act['_id']['ws_id'] == 27834]
+        self.assertEqual(len(ws_acts), 2)
+        for act in ws_acts:
+            self.assertEqual(act['_id']['username'], 'psdehal')
+
     # Uncomment to skip this test
     # @unittest.skip("skipped get_narratives_from_wsobjs")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -2109,6 +2891,29 @@ class kb_MetricsTest(unittest.TestCase):
                          datetime.datetime(2018, 1, 24, 19, 35, 30, 1000))
         self.assertFalse(narrs[1]['deleted'])
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped _match_narrative_obj")
+    def test_MetricsMongoDBController_match_narrative_obj(self):
+        w_objs = [{'object_name': 'Narrative.1513709108341', 'object_id': 1},
+                  {'object_name': 'psdehal:narrative_1513709108341',
+                   'object_id': 2},
+                  {'object_name': 'plain_name', 'object_id': 3}]
+
+        # the first timestamp match before the exact match wins
+        obj = self.db_controller._match_narrative_obj(
+            'psdehal:narrative_1513709108341', w_objs, 1)
+        self.assertEqual(obj['object_id'], 1)
+
+        # names without a timestamp only match exactly
+        obj = self.db_controller._match_narrative_obj('plain_name', w_objs, 2)
+        self.assertEqual(obj['object_id'], 3)
+        self.assertIsNone(
+            self.db_controller._match_narrative_obj('other_name', w_objs, None))
+
+        # no objects in the workspace
+        self.assertIsNone(
+            self.db_controller._match_narrative_obj('qz:1513709108341', [], None))
+
     # Uncomment to skip this test
     # @unittest.skip("skipped _get_narrative_name_map")
     def test_MetricsMongoDBController_get_narrative_name_map(self):
@@ -2145,6 +2950,237 @@ class kb_MetricsTest(unittest.TestCase):
                          {'ws_id': 99991,
                           'narr_name_map': ('fakeusr:narrative_1513709108341', 'Faking Test', '1')})
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_cache_codec_MsgpackCodec")
+    def test_cache_codec_MsgpackCodec(self):
+        value = [{'_id': ObjectId('5a6b7c8d9e0f1a2b3c4d5e6f'),
+                  'created': datetime.datetime(2018, 1, 24, 19, 35, 30, 561000),
+                  'names': ('wjriehl:1468439004137', u'Updater Testing', '1'),
+                  'counts': {8726: 1.5, 99991: None},
+                  'complete': True, 'desc': u'\u2013'}]
+
+        # the datetimes, ObjectIds, tuples and int keys come back unchanged
+        codec = MsgpackCodec()
+        payload = codec.encode(value)
+        self.assertEqual(payload[:1], b'\x00')
+        self.assertEqual(codec.decode(payload), value)
+        self.assertIsNone(JsonCodec().encode(value))
+        self.assertEqual(JsonCodec().decode(JsonCodec().encode([{'a': 1}])),
+                         [{'a': 1}])
+
+        # large payloads are compressed
+        payload = codec.encode(value * 100)
+        self.assertEqual(payload[:1], b'\x01')
+        self.assertLess(len(payload), len(codec.encode(value)) * 10)
+        self.assertEqual(codec.decode(payload), value * 100)
+
+        # values that would not come back unchanged are not encoded
+        self.assertIsNone(codec.encode({'s': set([1])}))
+        self.assertIsNone(codec.encode(
+            [datetime.datetime(2018, 1, 1, tzinfo=utc)]))
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_narrative_index_NarrativeNameIndex")
+    def test_narrative_index_NarrativeNameIndex(self):
+        index_path = os.path.join(self.scratch, 'test_narrative_index')
+        if os.path.exists(index_path):
+            os.remove(index_path)
+        name_maps = [{8781: ('vkumar:1468639677500', u'Ecoli refseq \u2013 July', '45'),
+                      27834: ('psdehal:narrative_1513709108341', 'Staging Test', '1'),
+                      33473: ('qzhang:narrative_1529080473649', 'Staging Test', '07')},
+                     {8781: ('vkumar:1468639677500', 'Ecoli refseq', '46')}]
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return name_maps[len(loads) - 1]
+
+        # the index file is built on first use
+        narr_index = NarrativeNameIndex(index_path, loader, refresh_secs=60)
+        self.assertEqual(narr_index.get(8781),
+                         ('vkumar:1468639677500', u'Ecoli refseq \u2013 July', '45'))
+        self.assertEqual(narr_index.get(27834),
+                         ('psdehal:narrative_1513709108341', 'Staging Test', '1'))
+        self.assertIsNone(narr_index.get(15206))
+        self.assertEqual(len(narr_index), 3)
+
+        # batch lookups, with the versions that are no plain number kept as is
+        self.assertEqual(narr_index.lookup([33473, 15206, 2 ** 64, 27834]),
+                         [('qzhang:narrative_1529080473649', 'Staging Test', '07'),
+                          None, None,
+                          ('psdehal:narrative_1513709108341', 'Staging Test', '1')])
+        footprint = narr_index.memory_footprint()
+        self.assertEqual(footprint['entries'], 3)
+        self.assertEqual(footprint['strings'], 6)
+        self.assertEqual(footprint['mapped_bytes'],
+                         os.path.getsize(index_path))
+        # the ws_ids are read in place from an aligned offset
+        self.assertEqual(narr_index._table.ws_ids.ctypes.data % 8, 0)
+
+        # another process maps the same file without rebuilding it
+        other_index = NarrativeNameIndex(index_path, loader, refresh_secs=60)
+        self.assertEqual(len(other_index), 3)
+        self.assertEqual(len(loads), 1)
+
+        # a stale file is rebuilt and swapped in, the old table still reads
+        old_table = narr_index._table
+        narr_index.refresh_secs = 0
+        narr_index.refresh()
+        self.assertEqual(len(loads), 2)
+        self.assertEqual(narr_index.get(8781),
+                         ('vkumar:1468639677500', 'Ecoli refseq', '46'))
+        self.assertIsNone(narr_index.get(27834))
+        self.assertEqual(old_table.get(27834)[2], '1')
+        self.assertEqual(len(IndexTable(index_path)), 1)
+
+        # the names (and version) a workspace has none of default to ''
+        # (and '1')
+        write_index(index_path, {8781: (None, None, None),
+                                 27834: ('psdehal:narrative_1513709108341',
+                                         None, '2')})
+        self.assertEqual(IndexTable(index_path).lookup([8781, 27834]),
+                         [('', '', '1'),
+                          ('psdehal:narrative_1513709108341', '', '2')])
+        os.remove(index_path)
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_kb_MetricsServer_StreamingJSONEncoder")
+    def test_kb_MetricsServer_StreamingJSONEncoder(self):
+        def records(n):
+            for i in range(n):
+                yield {'job_id': str(i), u'n\xe9': i, 'tags': set(['a']),
+                       'vals': [1, 2.5, None, True, u'μ']}
+
+        def as_json(obj):
+            return json.loads(json.dumps(obj, cls=JSONObjectEncoder))
+
+        # the lazy sequences, nested or not, are written as lists would be
+        users = self.client.metrics.users
+        proj = {'_id': 0, 'username': 1, 'kbase_staff': 1}
+        lazy = {'result': [{'job_states': records(300),
+                            'nested': [(1, 2), records(2)], 1: 'a', None: 2,
+                            'users': users.find({}, proj)}]}
+        whole = {'result': [{'job_states': list(records(300)),
+                             'nested': [(1, 2), list(records(2))], 1: 'a',
+                             None: 2, 'users': list(users.find({}, proj))}]}
+        enc = StreamingJSONEncoder()
+        self.assertEqual(json.loads(''.join(enc.iter_json(lazy))),
+                         as_json(whole))
+        self.assertEqual(json.loads(''.join(enc.iter_json(
+                             [{'records': [records(2)]}, records(0)]))),
+                         as_json([{'records': [list(records(2))]}, []]))
+        for value in [{}, [], 'a', 1, None, {'a': {'b': [set([1])]}}]:
+            self.assertEqual(''.join(enc.iter_json(value)),
+                             json.dumps(value, cls=JSONObjectEncoder))
+        with self.assertRaises(TypeError):
+            list(enc.iter_json({(1, 2): 'a'}))
+
+        # the chunks are of at least chunk_bytes, but the last
+        chunks = list(_chunked(enc.iter_json({'job_states': records(300)}),
+                               1024))
+        self.assertGreater(len(chunks), 1)
+        for chunk in chunks[:-1]:
+            self.assertGreaterEqual(len(chunk), 1024)
+        self.assertEqual(json.loads(''.join(chunks)),
+                         as_json({'job_states': list(records(300))}))
+        self.assertEqual(list(_chunked(iter(['ab', 'c', 'def']), 3)),
+                         ['abc', 'def'])
+        self.assertEqual(list(_chunked(iter(['ab', 'c', 'd']), 3)),
+                         ['abc', 'd'])
+        self.assertEqual(list(_chunked(iter([]), 3)), [])
+
+        # and the records are read as the chunks are
+        read = []
+
+        def logged(n):
+            for rec in records(n):
+                read.append(rec)
+                yield rec
+
+        chunks = _chunked(enc.iter_json({'job_states': logged(300)}), 1024)
+        next(chunks)
+        self.assertLess(len(read), 30)
+        list(chunks)
+        self.assertEqual(len(read), 300)
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_kb_MetricsServer_Application_stream")
+    def test_kb_MetricsServer_Application_stream(self):
+        def records(n, fail_at):
+            for i in range(n):
+                if i == fail_at:
+                    raise ValueError('cursor lost')
+                yield {'job_id': str(i), 'status': 'done' * 10}
+
+        def get_records(ctx, params):
+            recs = records(params['n'], params.get('fail_at'))
+            if not ctx.get('stream'):
+                recs = list(recs)
+            return [{'job_states': recs}]
+
+        def get_status(ctx):
+            return [{'state': 'OK'}]
+
+        rpc_service = JSONRPCServiceCustom()
+        rpc_service.add(get_records, name='kb_Metrics.get_records',
+                        types=[dict])
+        rpc_service.add(get_status, name='kb_Metrics.get_status', types=[])
+
+        def call(method, params, chunk_bytes=1024):
+            body = json.dumps({'method': 'kb_Metrics.' + method,
+                               'params': params, 'version': '1.1',
+                               'id': '17'})
+            environ = {'REQUEST_METHOD': 'POST',
+                       'CONTENT_LENGTH': str(len(body)),
+                       'wsgi.input': BytesIO(body.encode('utf-8')),
+                       'REMOTE_ADDR': '127.0.0.1'}
+            resp = {}
+
+            def start_response(status, headers):
+                resp['status'] = status
+                resp['headers'] = dict(headers)
+
+            with patch.object(application, 'rpc_service', rpc_service), \
+                    patch.object(application, 'chunk_bytes', chunk_bytes):
+                resp['body'] = application(environ, start_response)
+            return resp
+
+        expected = {'version': '1.1', 'id': '17', 'result': [
+            {'job_states': list(records(200, None))}]}
+
+        # the lazy results are streamed, without a content-length
+        resp = call('get_records', [{'n': 200}])
+        self.assertEqual(resp['status'], '200 OK')
+        self.assertNotIn('content-length', resp['headers'])
+        chunks = list(resp['body'])
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(json.loads(''.join(chunks)), expected)
+
+        # the others are sent whole, as they are with streaming turned off
+        resp = call('get_status', [])
+        self.assertEqual(resp['headers']['content-length'],
+                         str(len(resp['body'][0])))
+        self.assertEqual(json.loads(resp['body'][0])['result'],
+                         [{'state': 'OK'}])
+        resp = call('get_records', [{'n': 200}], chunk_bytes=0)
+        self.assertEqual(resp['status'], '200 OK')
+        self.assertIn('content-length', resp['headers'])
+        self.assertEqual(json.loads(resp['body'][0]), expected)
+
+        # an error in the first chunk is still a jsonrpc error
+        resp = call('get_records', [{'n': 200, 'fail_at': 5}])
+        self.assertEqual(resp['status'], '500 Internal Server Error')
+        error = json.loads(resp['body'][0])
+        self.assertEqual(error['id'], '17')
+        self.assertEqual(error['error']['name'], 'Unexpected Server Error')
+        self.assertIn('cursor lost', error['error']['error'])
+
+        # a later one cuts the response short
+        resp = call('get_records', [{'n': 200, 'fail_at': 150}])
+        self.assertEqual(resp['status'], '200 OK')
+        with self.assertRaisesRegexp(ValueError, 'cursor lost'):
+            list(resp['body'])
+
     # Uncomment to skip this test
     # @unittest.skip("skipped _map_ws_narr_names")
     def test_MetricsMongoDBController_map_ws_narr_names(self):
@@ -2225,12 +3261,26 @@ class kb_MetricsTest(unittest.TestCase):
         end_datetime = datetime.datetime.strptime('2018-03-31T00:00:10.000Z',
                                                   '%Y-%m-%dT%H:%M:%S.%fZ')
         params = {'epoch_range': (start_datetime, end_datetime)}
+        mt_acts = self.db_controller.metrics_dbi.metricsDBs['metrics'][
+            'daily_activities']
+        day_id = {'ws_id': 27834, 'year_mod': 2018, 'month_mod': 1,
+                  'day_mod': 24}
+        mt_acts.insert_one({'_id': day_id, 'obj_numModified': 3})
 
         # testing update_daily_activities with given user_ids
         upd_ret = self.db_controller._update_daily_activities(
             params, self.getContext()['token'])
         self.assertEqual(upd_ret, 8)
 
+        # the day keyed without its owner by an older update is replaced,
+        # the days of the workspaces without a known owner are kept
+        self.assertIsNone(mt_acts.find_one({'_id': day_id}))
+        self.assertEqual(len(list(mt_acts.find(
+            {'_id.ws_id': 27834, '_id.year_mod': 2018, '_id.month_mod': 1,
+             '_id.day_mod': 24}))), 1)
+        self.assertIsNotNone(mt_acts.find_one(
+            {'_id.ws_id': 27772, '_id.username': {'$exists': False}}))
+
         # testing update_daily_activities with no match to update
         start_datetime = datetime.datetime.strptime('2018-03-25T00:00:00+0000',
                                                     '%Y-%m-%dT%H:%M:%S+0000')
@@ -2288,6 +3338,246 @@ class kb_MetricsTest(unittest.TestCase):
             params, self.getContext()['token'])
         self.assertEqual(upd_ret1, 0)
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBController_run_update_phase")
+    def test_MetricsMongoDBController_run_update_phase(self):
+        users_ns = MongoMetricsDBI._MT_CACHE_NS['users']
+        ver = metrics_cache.namespace_versions([users_ns])[0]
+
+        # a phase that wrote nothing leaves the cached entries valid
+        upd_ret = self.db_controller._run_update_phase(
+            'users', lambda params, token: 0, {}, None, None)
+        self.assertEqual(upd_ret, 0)
+        self.assertEqual(metrics_cache.namespace_versions([users_ns]), [ver])
+
+        # a phase that wrote records invalidates them
+        self.db_controller._get_kbstaff_list()
+        upd_ret = self.db_controller._run_update_phase(
+            'users', lambda params, token: 2, {}, None, None)
+        self.assertEqual(upd_ret, 2)
+        self.assertEqual(metrics_cache.namespace_versions([users_ns]),
+                         [ver + 1])
+        self.assertIsNone(self.db_controller.kbstaff_list)
+
+        # so does a phase that failed part way
+        def upd_failed(params, token):
+            raise ValueError('phase failed')
+        with self.assertRaises(ValueError):
+            self.db_controller._run_update_phase(
+                'users', upd_failed, {}, None, None)
+        self.assertEqual(metrics_cache.namespace_versions([users_ns]),
+                         [ver + 2])
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped_run_update_metrics_incremental")
+    @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
+    def test_run_MetricsMongoDBController_update_metrics_incremental(self):
+        dbi = MongoMetricsDBI('', self.db_names, 'admin', 'password')
+        db_ckpts = dbi.metricsDBs['metrics']['update_checkpoints']
+        db_ckpts.drop()
+
+        start_datetime = datetime.datetime(2018, 1, 1, 12, 30)
+        end_datetime = datetime.datetime(2018, 3, 31)
+        for phase in ['users', 'activities', 'narratives']:
+            dbi.advance_checkpoint(phase, start_datetime)
+
+        # testing incremental update from the checkpoints on
+        params = {'user_ids': [], 'incremental': 1,
+                  'epoch_range': (None, end_datetime)}
+        ret = self.db_controller.update_metrics(
+            'qzhang', params, self.getContext()['token'])
+        upds = ret['metrics_result']
+        self.assertEqual(upds['user_updates'], 37)
+        self.assertEqual(upds['activity_updates'], 8)
+        self.assertEqual(upds['narrative_updates'], 1)
+
+        # the checkpoints advanced to the latest timestamp each phase read
+        # (the last login, the last object saved and the narrative's moddate)
+        time_range = {'$gte': start_datetime, '$lte': end_datetime}
+        auth2_users = dbi.metricsDBs['auth2']['users']
+        self.assertEqual(dbi.get_checkpoint('users'), max(
+            [u['create'] for u in auth2_users.find({'create': time_range})] +
+            [u['login'] for u in auth2_users.find({'login': time_range})]))
+        ws_objs = dbi.metricsDBs['workspace']['workspaceObjects']
+        self.assertEqual(dbi.get_checkpoint('activities'), max(
+            o['moddate'] for o in ws_objs.find({'moddate': time_range})))
+        self.assertEqual(dbi.get_checkpoint('narratives'),
+                         datetime.datetime(2018, 1, 24, 19, 35, 30, 1000))
+        self.assertEqual(dbi.get_checkpoint('ws_rollup'),
+                         datetime.datetime(2018, 3, 1))
+
+        # only what is left from the checkpoints on is processed again:
+        # the activities of the (whole) last day and the narrative saved at
+        # the checkpoint
+        ret = self.db_controller.update_metrics(
+            'qzhang', params, self.getContext()['token'])
+        upds = ret['metrics_result']
+        self.assertEqual(upds['activity_updates'], 5)
+        self.assertEqual(upds['narrative_updates'], 1)
+
+        # a phase reading nothing keeps its checkpoint, and the end of the
+        # range is never past the current time
+        dbi.advance_checkpoint('narratives', datetime.datetime(2018, 4, 1))
+        future = datetime.datetime.utcnow() + datetime.timedelta(days=30)
+        ret = self.db_controller.update_metrics(
+            'qzhang', dict(params, epoch_range=(None, future)),
+            self.getContext()['token'])
+        self.assertEqual(ret['metrics_result']['narrative_updates'], 0)
+        self.assertEqual(dbi.get_checkpoint('narratives'),
+                         datetime.datetime(2018, 4, 1))
+        self.assertLess(dbi.get_checkpoint('ws_rollup'),
+                        datetime.datetime.utcnow())
+        db_ckpts.drop()
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_run_WorkspaceChangeIngester_flush")
+    def test_run_WorkspaceChangeIngester_flush(self):
+        ingester = WorkspaceChangeIngester(self.cfg)
+        changes = [{'ns': {'db': 'workspace', 'coll': 'workspaceObjects'},
+                    'fullDocument': {'moddate': datetime.datetime(
+                        2018, 1, 24, 19, 35, 30)}},
+                   {'ns': {'db': 'workspace', 'coll': 'workspaceObjects'},
+                    'fullDocument': {'moddate': datetime.datetime(
+                        2018, 3, 30, 22, 0, 0)}},
+                   {'ns': {'db': 'workspace', 'coll': 'workspaces'},
+                    'fullDocument': {'moddate': datetime.datetime(
+                        2018, 1, 1)}},
+                   {'ns': {'db': 'workspace', 'coll': 'workspaces'},
+                    'fullDocument': {'moddate': datetime.datetime(
+                        2018, 3, 31)}},
+                   {'ns': {'db': 'workspace', 'coll': 'workspaces'},
+                    'fullDocument': None}]
+
+        # testing the moddate ranges of the changes
+        self.assertEqual(
+            ingester._moddate_range(changes, 'workspaceObjects'),
+            (datetime.datetime(2018, 1, 24, 19, 35, 30),
+             datetime.datetime(2018, 3, 30, 22, 0, 0)))
+        self.assertIsNone(ingester._moddate_range(changes[2:], 'foo'))
+
+        # testing the activities/narratives recomputed for the changes
+        act_upds, narr_upds = ingester._flush(changes)
+        self.assertEqual(act_upds, 8)
+        self.assertEqual(narr_upds, 1)
+        self.assertEqual(ingester._flush([]), (0, 0))
+
+        # a single narrative save: the workspace's moddate comes after that
+        # of its narrative object, which is found all the same
+        mt_narrs = self.client.metrics.narratives
+        mt_narrs.delete_many({'workspace_id': 6824})
+        ws_doc = self.client.workspace.workspaces.find_one({'ws': 6824})
+        act_upds, narr_upds = ingester._flush(
+            [{'ns': {'db': 'workspace', 'coll': 'workspaces'},
+              'fullDocument': {'moddate': ws_doc['moddate']}}])
+        self.assertEqual((act_upds, narr_upds), (0, 1))
+        narr = mt_narrs.find_one({'workspace_id': 6824})
+        self.assertEqual(narr['object_id'], 1)
+        self.assertEqual(narr['last_saved_at'], ws_doc['moddate'])
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_run_WorkspaceChangeIngester_ingest")
+    def test_run_WorkspaceChangeIngester_ingest(self):
+        if not self.client.admin.command('isMaster').get('setName'):
+            raise unittest.SkipTest('change streams need a replica set, '
+                                    'see _init_replica_set')
+        cfg = dict(self.cfg)
+        cfg['ingest-batch-seconds'] = 1
+        ingester = WorkspaceChangeIngester(cfg)
+        db_ckpts = self.client.metrics.update_checkpoints
+        db_ckpts.delete_many({'_id': ingester._STREAM_ID})
+
+        new_obj = {'ws': 20199961, 'id': 1, 'numver': 1, 'del': False,
+                   'name': 'test_ingested_obj',
+                   'moddate': datetime.datetime(2019, 2, 14, 10, 0, 0)}
+
+        def insert_later():
+            time.sleep(2)
+            self.client.workspace.workspaceObjects.insert_one(new_obj)
+
+        inserter = threading.Thread(target=insert_later)
+        inserter.start()
+        self.assertEqual(ingester.ingest(max_batches=1), 1)
+        inserter.join()
+
+        # the new object is counted and the resume token is persisted
+        mdarecord = self.client.metrics.daily_activities.find_one(
+            {'_id.ws_id': 20199961, '_id.year_mod': 2019,
+             '_id.month_mod': 2, '_id.day_mod': 14})
+        self.assertEqual(mdarecord['obj_numModified'], 1)
+        self.assertIsNotNone(
+            ingester.metrics_dbi.get_resume_token(ingester._STREAM_ID))
+        self.client.workspace.workspaceObjects.delete_one(
+            {'ws': 20199961, 'id': 1})
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_WorkspaceChangeIngester_ingest_stream")
+    def test_WorkspaceChangeIngester_ingest_stream(self):
+        cfg = dict(self.cfg)
+        cfg['ingest-batch-size'] = 2
+        cfg['ingest-batch-seconds'] = 60
+        ingester = WorkspaceChangeIngester(cfg)
+
+        def change(token):
+            return {'_id': token,
+                    'ns': {'db': 'workspace', 'coll': 'workspaceObjects'},
+                    'fullDocument': {'moddate': datetime.datetime(
+                        2018, 1, 24, 19, 35, 30)}}
+
+        class MockChangeStream(object):
+            # try_next returns the changes, or None for the (idle) tokens,
+            # and stops the ingester once they run out
+            def __init__(self, events):
+                self.events = list(events)
+                self.resume_token = None
+
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                return False
+
+            def try_next(self):
+                if not self.events:
+                    ingester.stop()
+                    return None
+                event = self.events.pop(0)
+                if isinstance(event, dict):
+                    self.resume_token = event['_id']
+                    return event
+                self.resume_token = event
+                return None
+
+        events = [change('t1'), None, change('t2'), 'idle3', 'idle3',
+                  change('t4'), 'idle5']
+        dbi = ingester.metrics_dbi
+        with patch.object(dbi, 'get_resume_token', return_value=None), \
+                patch.object(dbi, 'watch_ws_changes',
+                             return_value=MockChangeStream(events)), \
+                patch.object(dbi, 'save_resume_token') as mock_save, \
+                patch.object(ingester, '_flush',
+                             return_value=(1, 0)) as mock_flush:
+            self.assertEqual(ingester.ingest(), 2)
+
+        # a full batch is flushed, and so is the partial one when stopped
+        self.assertEqual([c[0][0] for c in mock_flush.call_args_list],
+                         [[change('t1'), change('t2')], [change('t4')]])
+        self.assertFalse(ingester.running)
+
+        # the token is saved after each flush and, once, while idle; not
+        # while a batch is pending, for its changes not to be skipped
+        self.assertEqual([c[0][1] for c in mock_save.call_args_list],
+                         ['t2', 'idle3', 't4'])
+
+        # max_batches ends the ingestion on the batch flushed
+        events = [change('t1'), change('t2'), change('t3')]
+        with patch.object(dbi, 'get_resume_token', return_value='t0'), \
+                patch.object(dbi, 'watch_ws_changes',
+                             return_value=MockChangeStream(events)), \
+                patch.object(dbi, 'save_resume_token') as mock_save, \
+                patch.object(ingester, '_flush', return_value=(1, 0)):
+            self.assertEqual(ingester.ingest(max_batches=1), 1)
+        self.assertEqual([c[0][1] for c in mock_save.call_args_list], ['t2'])
+
     # Uncomment to skip this test
     # @unittest.skip("skipped MetricsMongoDBController_get_user_job_states")
     def test_db_controller_get_user_job_states(self):
@@ -2366,6 +3656,148 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertIn('job_id', ujs1[0])
         self.assertEqual(ujs1[0]['status'], 'queued')
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_db_controller_get_user_job_states_pages")
+    def test_db_controller_get_user_job_states_pages(self):
+        requesting_user = 'qzhang'
+        params = {'user_ids': ['tgu2', 'umaganapathyswork', 'arfath'],
+                  'epoch_range': (datetime.datetime(2017, 7, 14, 2, 55, 32),
+                                  datetime.datetime(2017, 7, 14, 16, 8, 53,
+                                                    956000))}
+        ujs = self.db_controller.get_user_job_states(
+            requesting_user, dict(params),
+            self.getContext()['token'])['job_states']
+        self.assertEqual(len(ujs), 16)
+
+        # paging through the same jobs, in the order of their creation
+        pages = []
+        params['limit'] = 5
+        while True:
+            ujs_ret = self.db_controller.get_user_job_states(
+                requesting_user, dict(params), self.getContext()['token'])
+            pages.append(ujs_ret['job_states'])
+            if 'continuation_token' not in ujs_ret:
+                break
+            params['continuation_token'] = ujs_ret['continuation_token']
+        self.assertEqual([len(page) for page in pages], [5, 5, 5, 1])
+        paged = [j for page in pages for j in page]
+        self.assertItemsEqual(paged, ujs)
+        creation_times = [j['creation_time'] for j in paged]
+        self.assertEqual(creation_times, sorted(creation_times))
+
+        # invalid paging parameters
+        with self.assertRaisesRegexp(ValueError, 'Invalid continuation_token'):
+            self.db_controller.get_user_job_states(
+                requesting_user, dict(params, continuation_token='abc'),
+                self.getContext()['token'])
+        with self.assertRaisesRegexp(ValueError, 'non-negative integer'):
+            self.db_controller.get_user_job_states(
+                requesting_user, dict(params, limit=-1),
+                self.getContext()['token'])
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_db_controller_get_user_job_states_stream")
+    def test_db_controller_get_user_job_states_stream(self):
+        requesting_user = 'qzhang'
+        params = {'user_ids': ['tgu2', 'umaganapathyswork', 'arfath'],
+                  'epoch_range': (datetime.datetime(2017, 7, 14, 2, 55, 32),
+                                  datetime.datetime(2017, 7, 14, 16, 8, 53,
+                                                    956000))}
+        ujs = self.db_controller.get_user_job_states(
+            requesting_user, dict(params),
+            self.getContext()['token'])['job_states']
+        self.assertEqual(len(ujs), 16)
+
+        # the same job states, yielded a few jobs at a time
+        batch_size = self.db_controller.stream_batch_size
+        self.db_controller.stream_batch_size = 3
+        try:
+            # off the cached lists, not re-read per batch
+            with patch.object(self.db_controller.metrics_dbi,
+                              'iter_exec_tasks') as mock_iter_exec_tasks, \
+                    patch.object(self.db_controller.metrics_dbi,
+                                 'iter_ujs_results') as mock_iter_ujs_results:
+                ujs_ret = self.db_controller.get_user_job_states(
+                    requesting_user, dict(params), self.getContext()['token'],
+                    stream=True)
+                self.assertNotIsInstance(ujs_ret['job_states'], list)
+                self.assertItemsEqual(list(ujs_ret['job_states']), ujs)
+            mock_iter_exec_tasks.assert_not_called()
+            mock_iter_ujs_results.assert_not_called()
+        finally:
+            self.db_controller.stream_batch_size = batch_size
+
+        # a paged request still gets its page listed
+        params['limit'] = 5
+        ujs_ret = self.db_controller.get_user_job_states(
+            requesting_user, dict(params), self.getContext()['token'],
+            stream=True)
+        self.assertEqual(len(ujs_ret['job_states']), 5)
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_db_controller_get_user_job_states_fields")
+    def test_db_controller_get_user_job_states_fields(self):
+        requesting_user = 'qzhang'
+        params = {'user_ids': ['tgu2', 'umaganapathyswork', 'arfath'],
+                  'epoch_range': (datetime.datetime(2017, 7, 14, 2, 55, 32),
+                                  datetime.datetime(2017, 7, 14, 16, 8, 53,
+                                                    956000))}
+        ujs = self.db_controller.get_user_job_states(
+            requesting_user, dict(params),
+            self.getContext()['token'])['job_states']
+        self.assertEqual(len(ujs), 16)
+        ujs_map = {j['job_id']: j for j in ujs}
+
+        def assert_fields(job_states, fields):
+            self.assertEqual(len(job_states), 16)
+            for j in job_states:
+                self.assertEqual(j, {f: ujs_map[j['job_id']][f]
+                                     for f in fields
+                                     if f in ujs_map[j['job_id']]})
+
+        # fields of the job states only, without reading the exec_tasks
+        fields = ['job_id', 'status', 'creation_time', 'finish_time']
+        with patch.object(self.db_controller.metrics_dbi,
+                          'list_exec_tasks') as mock_list_exec_tasks:
+            ujs_ret = self.db_controller.get_user_job_states(
+                requesting_user, dict(params, fields=fields),
+                self.getContext()['token'])
+        mock_list_exec_tasks.assert_not_called()
+        assert_fields(ujs_ret['job_states'], fields)
+
+        # fields joined with the exec_tasks and the narrative names
+        fields = ['job_id', 'app_id', 'narrative_name', 'workspace_name']
+        ujs_ret = self.db_controller.get_user_job_states(
+            requesting_user, dict(params, fields=fields),
+            self.getContext()['token'])
+        assert_fields(ujs_ret['job_states'], fields)
+        ujs_ret = self.db_controller.get_user_job_states(
+            requesting_user, dict(params, fields=fields),
+            self.getContext()['token'], stream=True)
+        assert_fields(list(ujs_ret['job_states']), fields)
+
+        # paging through the job states with their fields
+        paged = []
+        params.update(fields=['job_id', 'user'], limit=7)
+        while True:
+            ujs_ret = self.db_controller.get_user_job_states(
+                requesting_user, dict(params), self.getContext()['token'])
+            paged.extend(ujs_ret['job_states'])
+            if 'continuation_token' not in ujs_ret:
+                break
+            params['continuation_token'] = ujs_ret['continuation_token']
+        assert_fields(paged, ['job_id', 'user'])
+
+        # invalid fields
+        with self.assertRaisesRegexp(ValueError, 'Invalid fields'):
+            self.db_controller.get_user_job_states(
+                requesting_user, dict(params, fields=['job_id', 'foo']),
+                self.getContext()['token'])
+        with self.assertRaisesRegexp(ValueError, 'must be a list'):
+            self.db_controller.get_user_job_states(
+                requesting_user, dict(params, fields='job_id'),
+                self.getContext()['token'])
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_run_MetricsMongoDBController_get_total_logins_from_ws")
     def test_run_MetricsMongoDBController_get_total_logins_from_ws(self):
@@ -2470,6 +3902,81 @@ class kb_MetricsTest(unittest.TestCase):
         self.assertEqual(users[1]['last_signin_at'], 1518794641938)
         self.assertEqual(users[1]['roles'], [])
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBController_get_user_details_pages")
+    def test_MetricsMongoDBController_get_user_details_pages(self):
+        params = {'user_ids': [],
+                  'epoch_range': (datetime.datetime(2018, 1, 1),
+                                  datetime.datetime(2018, 3, 31, 0, 0, 10))}
+        users = self.db_controller.get_user_details(
+            self.getContext()['user_id'], dict(params),
+            self.getContext()['token'])['metrics_result']
+
+        # paging through the same users, in the order of their signup
+        paged = []
+        params['limit'] = 7
+        while True:
+            ret = self.db_controller.get_user_details(
+                self.getContext()['user_id'], dict(params),
+                self.getContext()['token'])
+            self.assertTrue(len(ret['metrics_result']) <= 7)
+            paged.extend(ret['metrics_result'])
+            if 'continuation_token' not in ret:
+                break
+            params['continuation_token'] = ret['continuation_token']
+        self.assertEqual(paged, users)
+        self.assertEqual(len(paged), len(set(u['username'] for u in paged)))
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBController_get_user_details_stream")
+    def test_MetricsMongoDBController_get_user_details_stream(self):
+        params = {'user_ids': [],
+                  'epoch_range': (datetime.datetime(2018, 1, 1),
+                                  datetime.datetime(2018, 3, 31, 0, 0, 10))}
+        users = self.db_controller.get_user_details(
+            self.getContext()['user_id'], dict(params),
+            self.getContext()['token'])['metrics_result']
+
+        # off the cached list
+        with patch.object(self.db_controller.metrics_dbi,
+                          'iter_user_info') as mock_iter_user_info:
+            ret = self.db_controller.get_user_details(
+                self.getContext()['user_id'], dict(params),
+                self.getContext()['token'], stream=True)
+            self.assertNotIsInstance(ret['metrics_result'], list)
+            self.assertEqual(list(ret['metrics_result']), users)
+        mock_iter_user_info.assert_not_called()
+
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_MetricsMongoDBController_get_user_details_fields")
+    def test_MetricsMongoDBController_get_user_details_fields(self):
+        params = {'user_ids': [],
+                  'epoch_range': (datetime.datetime(2018, 1, 1),
+                                  datetime.datetime(2018, 3, 31, 0, 0, 10))}
+        users = self.db_controller.get_user_details(
+            self.getContext()['user_id'], dict(params),
+            self.getContext()['token'])['metrics_result']
+        fields = ['username', 'last_signin_at']
+        expected = [{f: u[f] for f in fields if f in u} for u in users]
+
+        ret = self.db_controller.get_user_details(
+            self.getContext()['user_id'], dict(params, fields=fields),
+            self.getContext()['token'])
+        self.assertEqual(ret['metrics_result'], expected)
+
+        # the page key is not returned unless asked for
+        ret = self.db_controller.get_user_details(
+            self.getContext()['user_id'],
+            dict(params, fields=fields, limit=7),
+            self.getContext()['token'])
+        self.assertEqual(ret['metrics_result'], expected[:7])
+        self.assertIn('continuation_token', ret)
+
+        with self.assertRaisesRegexp(ValueError, 'Invalid fields'):
+            self.db_controller.get_user_details(
+                self.getContext()['user_id'], dict(params, fields=['_id']),
+                self.getContext()['token'])
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_MetricsMongoDBController_get_signup_retn_users")
     @patch.object(MongoMetricsDBI, '__init__', new=mock_MongoMetricsDBI)
@@ -2797,6 +4304,43 @@ class kb_MetricsTest(unittest.TestCase):
                          {u'username': 'wjriehl', u'year': 2016, 'month': 7})
         self.assertEqual(usr_ws[2]['count_user_ws'], 3)
 
+    # Uncomment to skip this test
+    # @unittest.skip("skipped test_run_MetricsMongoDBController_get_user_ws_stats_single_pass")
+    def test_run_MetricsMongoDBController_get_user_ws_stats_single_pass(self):
+        m_params = {
+            'epoch_range': (datetime.datetime(2016, 1, 1),
+                            datetime.datetime(2018, 4, 30)),
+            'user_ids': ['pranjan77', 'psdehal', 'wjriehl', 'qzhang']
+        }
+        dbi = self.db_controller.metrics_dbi
+        # none of the per-user workspace stats cached
+        metrics_cache.bump_namespaces('metrics.monthly_user_ws_rollup')
+        with patch.object(dbi, '_ws_month_rows',
+                          wraps=dbi._ws_month_rows) as mock_rows:
+            usr_ws = self.db_controller.get_user_ws_stats(
+                    self.getContext()['user_id'], m_params,
+                    self.getContext()['token'])['metrics_result']
+            self.assertEqual(mock_rows.call_count, 1)
+
+            # the other two reports are served from the same result
+            usr_logins = self.db_controller.get_user_login_stats_from_ws(
+                    self.getContext()['user_id'], m_params,
+                    self.getContext()['token'])['metrics_result']
+            usr_objs = self.db_controller.get_user_numObjs_from_ws(
+                    self.getContext()['user_id'], m_params,
+                    self.getContext()['token'])['metrics_result']
+            self.assertEqual(mock_rows.call_count, 1)
+
+        self.assertEqual(len(usr_ws), 3)
+        self.assertEqual(usr_ws[0], {'_id': {'username': 'pranjan77',
+                                             'year': 2016, 'month': 7},
+                                     'count_user_ws': 6})
+        self.assertEqual(usr_logins[0], {'_id': usr_ws[0]['_id'],
+                                         'year_mon_user_logins': 6})
+        self.assertEqual([uo['_id'] for uo in usr_objs],
+                         [uw['_id'] for uw in usr_ws])
+        self.assertIn('count_user_numObjs', usr_objs[0])
+
     # Uncomment to skip this test
     # @unittest.skip("skipped test_run_MetricsMongoDBController_get_narrative_stats")
     def test_run_MetricsMongoDBController_get_narrative_stats(self):